@@ -0,0 +1 @@
+"""Crawl benchmarks against a local stand-in of the SEC endpoints."""
@@ -0,0 +1,135 @@
+"""End-to-end crawl benchmark against the local SEC stand-in.
+
+Runs ``CrawlerPipeline.crawler_workflow`` (prefetch, download, extraction and storage)
+against :class:`FakeSecServer` and reports throughput and latency::
+
+    python -m benchmarks.crawl_benchmark --filings 500 --latency 0.05 --throttle-rate 0.01
+
+All crawl outputs are written to a temporary directory. The database write rate is only
+reported when a database is configured (``POSTGRES_ENGINE`` or local mode), use a
+throwaway database for benchmarks.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.fake_sec_server import FakeEdgarCorpus, FakeSecServer
+from benchmarks.recorder import BenchmarkRecorder, percentile
+from nps_crawling.config import Config
+
+
+def run_benchmark(filings: int = 200,
+                  latency: float = 0.02,
+                  jitter: float = 0.0,
+                  throttle_rate: float = 0.0,
+                  requests_per_second: float = 100.0,
+                  html_bytes: int = 200_000,
+                  pdf_pages: int = 20,
+                  workdir: Path | None = None) -> dict:
+    """Crawls ``filings`` synthetic filings from a local stand-in of EDGAR and returns the measurements."""
+    from nps_crawling.crawler.pre_fetch_utils import rate_limiter
+    from nps_crawling.crawler.utils import CrawlerPipeline
+
+    corpus = FakeEdgarCorpus.synthetic(filings=filings, html_bytes=html_bytes, pdf_pages=pdf_pages)
+    with tempfile.TemporaryDirectory() as tmp, \
+            FakeSecServer(corpus, latency=latency, jitter=jitter, throttle_rate=throttle_rate) as server:
+        root: Path = Path(workdir or tmp)
+        query_file: Path = root / "query" / "benchmark.json"
+        query_file.parent.mkdir(parents=True, exist_ok=True)
+        query_file.write_text(json.dumps({"queries": {"benchmark": {
+            "query_base": f"{server.url}/LATEST/search-index?",
+            "keyword": "nps",
+            "filing_limit": filings,
+        }}}), encoding="utf-8")
+
+        overrides: dict = {
+            "DATA_PATH": root / "data",
+            "RAW_JSON_PATH_CRAWLER": root / "data" / "benchmark" / "json_raw",
+            "CRAWL_SEC_BASE_URL": server.url,
+            "CRAWL_SEC_REQUESTS_PER_SECOND": requests_per_second,
+            "CRAWL_SEC_QUERY_LIMIT_COUNT": filings,
+            "CRAWL_PREFETCH_CACHE_TTL_HOURS": 0,
+            "CRAWL_RESPONSE_CACHE": False,
+            "CRAWL_OFFLINE": False,
+            "CRAWL_INCREMENTAL": False,
+        }
+        saved: dict = {name: getattr(Config, name) for name in overrides}
+        for name, value in overrides.items():
+            setattr(Config, name, value)
+        # The shared SEC bucket is created on first use with the configured rate
+        rate_limiter._sec_bucket = None
+        BenchmarkRecorder.last = None
+
+        started: float = time.perf_counter()
+        try:
+            CrawlerPipeline().crawler_workflow(
+                search_parameter_files=[str(query_file)],
+                ignore_lookup=True,
+                settings_overrides={
+                    "EXTENSIONS": {"benchmarks.recorder.BenchmarkRecorder": 0},
+                    "CRAWL_CHECKPOINT_ENABLED": False,
+                    "STATS_DUMP": False,
+                    "LOG_LEVEL": "WARNING",
+                },
+            )
+        finally:
+            total_seconds: float = time.perf_counter() - started
+            for name, value in saved.items():
+                setattr(Config, name, value)
+            rate_limiter._sec_bucket = None
+
+        crawl: dict = BenchmarkRecorder.last or {"items": 0, "crawl_seconds": 0.0, "latencies": [],
+                                                  "db_rows": 0, "db_seconds": 0.0, "reason": "not run"}
+        crawl_seconds: float = crawl["crawl_seconds"]
+        return {
+            "filings": filings,
+            "items": crawl["items"],
+            "reason": crawl["reason"],
+            "total_seconds": round(total_seconds, 3),
+            "crawl_seconds": round(crawl_seconds, 3),
+            "filings_per_second": round(crawl["items"] / crawl_seconds, 2) if crawl_seconds else None,
+            "latency_p50_ms": _ms(percentile(crawl["latencies"], 50)),
+            "latency_p99_ms": _ms(percentile(crawl["latencies"], 99)),
+            "db_rows": crawl["db_rows"],
+            "db_rows_per_second": round(crawl["db_rows"] / crawl["db_seconds"], 1) if crawl["db_seconds"] else None,
+            "requests": dict(server.requests),
+        }
+
+
+def _ms(seconds: float | None) -> float | None:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+
+def main(argv: list[str] | None = None) -> dict:
+    """Runs the benchmark from the command line and prints the measurements."""
+    parser = argparse.ArgumentParser(description="Crawl benchmark against a local stand-in of EDGAR.")
+    parser.add_argument("--filings", type=int, default=200, help="Number of filings to crawl")
+    parser.add_argument("--latency", type=float, default=0.02, help="Server latency per request in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Additional random latency in seconds")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of requests answered with 429")
+    parser.add_argument("--requests-per-second", type=float, default=100.0, help="Rate limit of the crawler")
+    parser.add_argument("--html-bytes", type=int, default=200_000, help="Size of HTML documents")
+    parser.add_argument("--pdf-pages", type=int, default=20, help="Pages of PDF documents")
+    parser.add_argument("--json", type=Path, help="Write the measurements to this file")
+    args = parser.parse_args(argv)
+
+    result: dict = run_benchmark(filings=args.filings,
+                                 latency=args.latency,
+                                 jitter=args.jitter,
+                                 throttle_rate=args.throttle_rate,
+                                 requests_per_second=args.requests_per_second,
+                                 html_bytes=args.html_bytes,
+                                 pdf_pages=args.pdf_pages)
+    for key, value in result.items():
+        print(f"{key:>20}: {value}")
+    if args.json:
+        args.json.write_text(json.dumps(result, indent=2), encoding="utf-8")
+    return result
+
+
+if __name__ == "__main__":
+    main()
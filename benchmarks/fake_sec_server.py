@@ -0,0 +1,302 @@
+"""Local stand-in of the SEC endpoints used by the crawler.
+
+The server answers the three kinds of requests a crawl makes:
+
+- ``/LATEST/search-index``: EDGAR full-text search pages (100 hits per page, ``from``
+  offset, ``startdt``/``enddt`` window, ``gte`` relation beyond 10,000 hits).
+- ``/files/company_tickers.json``: the CIK to ticker mapping.
+- ``/Archives/edgar/data/<cik>/<accession>/<file>``: filing documents (HTML, PDF, XML)
+  of configurable sizes.
+
+Hits are synthetic or loaded from recorded search pages, documents are always synthetic.
+Every request can be delayed and answered with ``429 Too Many Requests`` at a configurable
+rate. Point the crawler at the server with ``Config.CRAWL_SEC_BASE_URL = server.url``.
+"""
+from __future__ import annotations
+
+import datetime
+import json
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+PAGE_SIZE: int = 100
+MAX_HITS: int = 10_000
+
+_FORMS: tuple[str, ...] = ("10-K", "10-Q", "8-K", "DEF 14A", "S-1")
+_STATES: tuple[str, ...] = ("CA", "NY", "TX", "DE", "WA", "MA")
+_SICS: tuple[str, ...] = ("7372", "2834", "6022", "3674", "5961")
+_PARAGRAPH: str = (
+    "Customer satisfaction remains a priority for the Company. Our net promoter score (NPS) "
+    "improved during the fiscal year, supported by investments in service quality and support. "
+    "Revenue, operating income and cash flows are discussed in the following sections. "
+)
+
+
+def build_pdf(pages: list[str]) -> bytes:
+    """Builds a minimal PDF with one line of text per page."""
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages)))
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(pages):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>")
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for i, obj in enumerate(objects):
+        offsets.append(len(out))
+        out += f"{i + 1} 0 obj\n{obj}\nendobj\n".encode()
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+
+@dataclass
+class FakeEdgarCorpus:
+    """Search hits and document sizes served by :class:`FakeSecServer`."""
+
+    hits: list[dict]
+    html_bytes: int = 200_000
+    xml_bytes: int = 50_000
+    pdf_pages: int = 20
+    companies: dict[str, tuple[str, str]] = field(default_factory=dict)
+
+    @classmethod
+    def synthetic(cls,
+                  filings: int = 500,
+                  companies: int = 50,
+                  file_types: dict[str, float] | None = None,
+                  start: datetime.date = datetime.date(2020, 1, 1),
+                  end: datetime.date = datetime.date(2024, 12, 31),
+                  seed: int = 0,
+                  **sizes) -> FakeEdgarCorpus:
+        """Creates ``filings`` random hits of ``companies`` companies, newest first.
+
+        ``file_types`` maps document extensions to their share (default: 70% htm, 20% pdf, 10% xml).
+        """
+        rng = random.Random(seed)
+        file_types = file_types or {"htm": 0.7, "pdf": 0.2, "xml": 0.1}
+        company_table: dict[str, tuple[str, str]] = {
+            f"{i + 1:010d}": (f"TCK{i}", f"Company {i} Inc.") for i in range(companies)
+        }
+        ciks: list[str] = list(company_table)
+        days: int = (end - start).days
+
+        hits: list[dict] = []
+        for i in range(filings):
+            cik: str = rng.choice(ciks)
+            ticker, title = company_table[cik]
+            file_date: datetime.date = start + datetime.timedelta(days=rng.randint(0, days))
+            adsh: str = f"{cik}-{file_date.year % 100:02d}-{i:06d}"
+            extension: str = rng.choices(list(file_types), weights=list(file_types.values()))[0]
+            form: str = rng.choice(_FORMS)
+            hits.append({
+                "_id": f"{adsh}:doc{i}.{extension}",
+                "_index": "edgar_file",
+                "_source": {
+                    "ciks": [cik], "period_ending": None, "file_num": [f"001-{i:05d}"],
+                    "display_names": [f"{title}  ({ticker})  (CIK {cik})"], "xsl": None, "sequence": 1,
+                    "root_forms": [form], "file_date": file_date.isoformat(),
+                    "biz_states": [rng.choice(_STATES)], "sics": [rng.choice(_SICS)], "form": form,
+                    "adsh": adsh, "film_num": [], "biz_locations": ["Springfield, " + rng.choice(_STATES)],
+                    "file_type": form, "file_description": "", "inc_states": [rng.choice(_STATES)],
+                },
+            })
+        hits.sort(key=lambda hit: hit["_source"]["file_date"], reverse=True)
+        return cls(hits=hits, companies=company_table, **sizes)
+
+    @classmethod
+    def from_search_pages(cls, paths: list[Path], **sizes) -> FakeEdgarCorpus:
+        """Creates the corpus from recorded EDGAR search pages (JSON files)."""
+        hits: list[dict] = []
+        seen: set[str] = set()
+        for path in paths:
+            for hit in json.loads(Path(path).read_text(encoding="utf-8"))["hits"]["hits"]:
+                if hit["_id"] not in seen:
+                    seen.add(hit["_id"])
+                    hits.append(hit)
+        hits.sort(key=lambda hit: hit["_source"].get("file_date") or "", reverse=True)
+        return cls(hits=hits, **sizes)
+
+    def search(self, query: dict[str, str]) -> dict:
+        """Returns the search page for the parsed query string ``query``."""
+        start: str = query.get("startdt", "")
+        end: str = query.get("enddt", "")
+        matches: list[dict] = [
+            hit for hit in self.hits
+            if (not start or hit["_source"]["file_date"] >= start) and (not end or hit["_source"]["file_date"] <= end)
+        ]
+        offset: int = min(int(query.get("from", 0)), MAX_HITS)
+        total: dict = {"value": MAX_HITS, "relation": "gte"} if len(matches) > MAX_HITS \
+            else {"value": len(matches), "relation": "eq"}
+        return {
+            "hits": {"total": total, "hits": matches[offset:min(offset + PAGE_SIZE, MAX_HITS)]},
+            "query": {"from": offset, "size": PAGE_SIZE},
+        }
+
+    def company_tickers(self) -> dict:
+        """Returns ``company_tickers.json`` of all companies."""
+        return {
+            str(i): {"cik_str": int(cik), "ticker": ticker, "title": title}
+            for i, (cik, (ticker, title)) in enumerate(self.companies.items())
+        }
+
+    def document(self, name: str) -> tuple[bytes, str]:
+        """Returns the body and content type of the document ``name``."""
+        extension: str = name.rsplit(".", 1)[-1].lower()
+        if extension == "pdf":
+            return build_pdf([f"Page {i + 1}. {_PARAGRAPH[:80]}" for i in range(self.pdf_pages)]), "application/pdf"
+        if extension == "xml":
+            paragraph: str = f"<p>{_PARAGRAPH}</p>"
+            body: str = "<?xml version=\"1.0\"?><document>" \
+                + paragraph * max(1, self.xml_bytes // len(paragraph)) + "</document>"
+            return body.encode(), "application/xml"
+        paragraph = f"<p>{_PARAGRAPH}</p>\n"
+        body = "<html><body>" + paragraph * max(1, self.html_bytes // len(paragraph)) + "</body></html>"
+        return body.encode(), "text/html"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: _Server
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):  # noqa: A002
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str, headers: dict | None = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):  # noqa: N802
+        fake: FakeSecServer = self.server.fake
+        url = urlparse(self.path)
+        route: str = "search" if url.path.startswith("/LATEST/search-index") \
+            else "tickers" if url.path == "/files/company_tickers.json" \
+            else "archives" if url.path.startswith("/Archives/edgar/data/") \
+            else "unknown"
+
+        fake.delay()
+        fake.count(route)
+        if route != "unknown" and fake.should_throttle():
+            fake.count("throttled")
+            self._send(429, b'{"message": "Too Many Requests"}', "application/json",
+                       {"Retry-After": str(fake.retry_after)})
+            return
+
+        if route == "search":
+            query: dict[str, str] = {key: values[0] for key, values in parse_qs(url.query).items()}
+            self._send(200, json.dumps(fake.corpus.search(query)).encode(), "application/json")
+        elif route == "tickers":
+            self._send(200, json.dumps(fake.corpus.company_tickers()).encode(), "application/json")
+        elif route == "archives":
+            body, content_type = fake.document(url.path.rsplit("/", 1)[-1])
+            self._send(200, body, content_type)
+        else:
+            self._send(404, b"Not Found", "text/plain")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    fake: FakeSecServer
+
+
+class FakeSecServer:
+    """Threaded HTTP server serving a :class:`FakeEdgarCorpus` with latency and throttling.
+
+    Args:
+        corpus: Search hits and document sizes to serve.
+        latency: Seconds every request is delayed.
+        jitter: Additional uniformly distributed delay of up to ``jitter`` seconds.
+        throttle_rate: Share of requests answered with ``429`` (0 to 1).
+        retry_after: ``Retry-After`` seconds of throttled responses.
+    """
+
+    def __init__(self,
+                 corpus: FakeEdgarCorpus | None = None,
+                 latency: float = 0.0,
+                 jitter: float = 0.0,
+                 throttle_rate: float = 0.0,
+                 retry_after: int = 0,
+                 host: str = "127.0.0.1",
+                 port: int = 0,
+                 seed: int = 0):
+        """Initializes the server, :meth:`start` binds and serves it."""
+        self.corpus: FakeEdgarCorpus = corpus or FakeEdgarCorpus.synthetic()
+        self.latency: float = latency
+        self.jitter: float = jitter
+        self.throttle_rate: float = throttle_rate
+        self.retry_after: int = retry_after
+        self.requests: Counter = Counter()
+        self._address: tuple[str, int] = (host, port)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._documents: dict[str, tuple[bytes, str]] = {}
+        self._server: _Server | None = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to use instead of ``https://www.sec.gov``."""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def delay(self) -> None:
+        with self._lock:
+            seconds: float = self.latency + (self._rng.uniform(0, self.jitter) if self.jitter else 0.0)
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def should_throttle(self) -> bool:
+        with self._lock:
+            return self.throttle_rate > 0 and self._rng.random() < self.throttle_rate
+
+    def count(self, route: str) -> None:
+        with self._lock:
+            self.requests[route] += 1
+
+    def document(self, name: str) -> tuple[bytes, str]:
+        """Returns the document ``name``, built once per document type."""
+        extension: str = name.rsplit(".", 1)[-1].lower()
+        with self._lock:
+            if extension not in self._documents:
+                self._documents[extension] = self.corpus.document(name)
+            return self._documents[extension]
+
+    def start(self) -> FakeSecServer:
+        """Starts serving in a background thread."""
+        self._server = _Server(self._address, _Handler)
+        self._server.fake = self
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-sec-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stops the server."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> FakeSecServer:
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
@@ -0,0 +1,61 @@
+"""Scrapy extension collecting the measurements of a benchmark crawl."""
+from __future__ import annotations
+
+import math
+import time
+
+from scrapy import signals
+from scrapy.crawler import Crawler
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    """Returns the nearest-rank ``q`` percentile (0-100) of ``values``."""
+    if not values:
+        return None
+    ordered: list[float] = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+class BenchmarkRecorder:
+    """Scrapy extension recording download latencies and item throughput of a crawl."""
+
+    # Measurements of the last finished crawl
+    last: dict | None = None
+
+    def __init__(self, crawler: Crawler):
+        """Initializes the recorder."""
+        self.crawler: Crawler = crawler
+        self.latencies: list[float] = []
+        self.items: int = 0
+        self.opened: float = 0.0
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler) -> BenchmarkRecorder:
+        recorder = cls(crawler)
+        crawler.signals.connect(recorder.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(recorder.response_received, signal=signals.response_received)
+        crawler.signals.connect(recorder.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(recorder.spider_closed, signal=signals.spider_closed)
+        return recorder
+
+    def spider_opened(self, spider) -> None:
+        self.opened = time.perf_counter()
+
+    def response_received(self, response, request, spider) -> None:
+        latency: float | None = request.meta.get("download_latency")
+        if latency is not None and "cached" not in response.flags:
+            self.latencies.append(latency)
+
+    def item_scraped(self, item, response, spider) -> None:
+        self.items += 1
+
+    def spider_closed(self, spider, reason: str) -> None:
+        stats = self.crawler.stats
+        BenchmarkRecorder.last = {
+            "reason": reason,
+            "items": self.items,
+            "crawl_seconds": time.perf_counter() - self.opened,
+            "latencies": self.latencies,
+            "db_rows": stats.get_value("storage/db_rows", 0),
+            "db_seconds": stats.get_value("storage/db_seconds", 0.0),
+        }
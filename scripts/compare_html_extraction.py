@@ -0,0 +1,105 @@
+"""Check that the fast lxml HTML extractor matches the BeautifulSoup reference.
+
+Runs ``CleanTextPipeline.extract_text`` over every record of the raw store and
+compares the fast extractor with the BeautifulSoup one:
+
+    python scripts/compare_html_extraction.py                        # compare both extractors
+    python scripts/compare_html_extraction.py --write-golden g.jsonl # store reference output
+    python scripts/compare_html_extraction.py --golden g.jsonl       # compare against it
+
+A golden file holds one JSON line per record (``key``, ``record``, ``text``) so
+the reference only has to be computed once, e.g. before changing the cleaner.
+Exits with status 1 when any record differs.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from tqdm import tqdm
+
+# Allow running as a plain script without installing the package
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from nps_crawling.preprocessing.cleaning import CleanTextPipeline
+from nps_crawling.utils.raw_store import create_raw_store
+
+
+def iter_documents(store, limit: int | None):
+    """Yield ``(key, record index, html)`` for the records of the raw store."""
+    keys = store.keys()[:limit] if limit else store.keys()
+    for key in keys:
+        for idx, record in enumerate(store.get(key)):
+            if isinstance(record.get("core_text"), str):
+                yield store.source_name(key), idx, record["core_text"]
+
+
+def first_difference(expected: str, actual: str) -> str:
+    """Describe where two texts start to differ."""
+    pos = next((i for i, (a, b) in enumerate(zip(expected, actual)) if a != b), min(len(expected), len(actual)))
+    return f"at char {pos}: expected {expected[pos:pos + 80]!r}, got {actual[pos:pos + 80]!r}"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--write-golden", type=Path, help="Write the BeautifulSoup output to this JSONL file.")
+    mode.add_argument("--golden", type=Path, help="Compare the fast extractor with this JSONL file.")
+    parser.add_argument("--store", help="Raw store type (json or segments), defaults to the configured one.")
+    parser.add_argument("--root", type=Path, help="Raw store directory.")
+    parser.add_argument("--limit", type=int, help="Only check the first N raw store entries.")
+    args = parser.parse_args()
+
+    cleaner = CleanTextPipeline()
+    documents = iter_documents(create_raw_store(args.store, args.root), args.limit)
+
+    if args.write_golden:
+        count = 0
+        with open(args.write_golden, "w", encoding="utf-8") as f:
+            for key, idx, html in tqdm(documents, desc="Writing golden file", unit="record"):
+                text = cleaner.extract_text(html, fast=False)
+                f.write(json.dumps({"key": key, "record": idx, "text": text}, ensure_ascii=False) + "\n")
+                count += 1
+        print(f"Wrote {count} records to {args.write_golden}")
+        return 0
+
+    golden = {}
+    if args.golden:
+        with open(args.golden, "r", encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                golden[(entry["key"], entry["record"])] = entry["text"]
+
+    checked, mismatches = 0, 0
+    reference_seconds, fast_seconds = 0.0, 0.0
+    for key, idx, html in tqdm(documents, desc="Comparing extractors", unit="record"):
+        if args.golden:
+            if (key, idx) not in golden:
+                continue
+            expected = golden[(key, idx)]
+        else:
+            start = time.perf_counter()
+            expected = cleaner.extract_text(html, fast=False)
+            reference_seconds += time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = cleaner.extract_text(html, fast=True)
+        fast_seconds += time.perf_counter() - start
+
+        checked += 1
+        if actual != expected:
+            mismatches += 1
+            print(f"MISMATCH {key} record {idx} {first_difference(expected, actual)}")
+
+    print(f"Checked {checked} records, {mismatches} mismatches")
+    if reference_seconds:
+        print(f"BeautifulSoup: {reference_seconds:.1f}s, fast: {fast_seconds:.1f}s")
+    else:
+        print(f"Fast: {fast_seconds:.1f}s")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -18,10 +18,16 @@ stream_handler.setLevel(logging.DEBUG)
 stream_handler.setFormatter(logging.Formatter('%(asctime)s [%(name)s] %(levelname)s: %(message)s'))
 log.addHandler(stream_handler)
 
-file_handler = logging.FileHandler('errors.log')
-file_handler.setLevel(logging.ERROR)
-file_handler.setFormatter(logging.Formatter('%(asctime)s [%(name)s] %(levelname)s: %(message)s'))
-log.addHandler(file_handler)
+
+def _log_errors_to_file() -> None:
+    """Appends errors to ``errors.log`` in the working directory, once the CLI runs a command."""
+    if any(isinstance(handler, logging.FileHandler) for handler in log.handlers):
+        return
+    file_handler = logging.FileHandler('errors.log')
+    file_handler.setLevel(logging.ERROR)
+    file_handler.setFormatter(logging.Formatter('%(asctime)s [%(name)s] %(levelname)s: %(message)s'))
+    log.addHandler(file_handler)
+
 
 def _ensure_docker_db_running() -> None:
     """Startet den Docker-Postgres-Container wenn er noch nicht laeuft.
@@ -80,6 +86,7 @@ def main(argv=None):
     if not getattr(args, "command", None):
         parser.print_help()
         sys.exit(1)
+    _log_errors_to_file()
 
     default_log_level = logging.INFO
     verbosity = default_log_level - ((getattr(args, "verbose", 0) - getattr(args, "quiet", 0)) * 10)
@@ -89,6 +96,7 @@ def main(argv=None):
     from nps_crawling.classification.classification_pipeline import ClassificationPipeline
     from nps_crawling.crawler import CrawlerPipeline
     from nps_crawling.preprocessing import PreProcessingPipeline
+    from nps_crawling.preprocessing.manifest import PreprocessingManifest
     from nps_crawling.results import ResultsPipeline
 
     try:
@@ -154,19 +162,33 @@ def main(argv=None):
                                      db_only=args.db_only, 
                                      prefetch_only=args.prefetch_only,
                                      ignore_lookup=args.ignore_lookup,
+                                     incremental=args.incremental,
+                                     refresh_prefetch=args.refresh_prefetch,
+                                     merge_queries=args.merge_queries,
+                                     offline=args.offline,
+                                     enqueue_only=args.enqueue,
+                                     worker=args.worker,
+                                     from_bulk=args.from_bulk,
                                      limit=args.limit)
         elif args.command == "process":
-            # need to do check here, since otherwise huggingface weights would still be loaded
+            # Data of runs before the manifest existed cannot be updated incrementally
             processed_dir = Config.NPS_CONTEXT_JSON_PATH / "files"
-            if processed_dir.exists() and any(processed_dir.glob("*.json")):
+            manifest_path = Config.NPS_CONTEXT_JSON_PATH / PreprocessingManifest.FILE_NAME
+            if (
+                not args.force
+                and not manifest_path.exists()
+                and processed_dir.exists()
+                and any(processed_dir.glob("*.json"))
+            ):
                 print(
                     f"Experiment '{Config.PREPROCESSING_VERSION}' already has processed "
-                    f"data at {processed_dir} — skipping preprocessing",
+                    f"data at {processed_dir} without a manifest — skipping preprocessing. "
+                    f"Run 'process --force' once to reprocess it and update it incrementally afterwards.",
                 )
             else:
                 DbAdapter().ensure_table_exists(include_classifications=False)
                 pre_processing = PreProcessingPipeline()
-                pre_processing.pre_processing_workflow()
+                pre_processing.pre_processing_workflow(force=args.force)
         elif args.command == "classify":
             classified_dir = Config.NPS_CLASSIFIED_JSON / "files"
 
@@ -259,6 +281,41 @@ def create_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Ignore lookup and crawl all filings regardless of existing database entries",
     )
+    crawl_parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only search filings newer than the high-water mark of the previous incremental crawl",
+    )
+    crawl_parser.add_argument(
+        "--refresh-prefetch",
+        action="store_true",
+        help="Ignore cached search results and query EDGAR again",
+    )
+    crawl_parser.add_argument(
+        "--merge-queries",
+        action="store_true",
+        help="Crawl the filings of all query files in a single spider run, each filing only once",
+    )
+    crawl_parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Only crawl filing documents from the local response cache, never download them",
+    )
+    crawl_parser.add_argument(
+        "--enqueue",
+        action="store_true",
+        help="Prefetch filings into the shared work queue of the database for crawl workers",
+    )
+    crawl_parser.add_argument(
+        "--worker",
+        action="store_true",
+        help="Crawl filings claimed from the shared work queue until it is drained",
+    )
+    crawl_parser.add_argument(
+        "--from-bulk",
+        metavar="PATH",
+        help="Seed the database from downloaded EDGAR bulk data (master.idx files or submissions.zip)",
+    )
     crawl_parser.add_argument(
         "--limit",
         action="store",
@@ -266,11 +323,16 @@ def create_parser() -> argparse.ArgumentParser:
         help="Limit the number of filings to crawl (for testing purposes)",
     )
 
-    subparsers.add_parser(
+    process_parser = subparsers.add_parser(
         "process",
         parents=[parent],
         description="Process data.",
     )
+    process_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Process all raw filings again, even the ones the manifest lists as current",
+    )
     classify_parser = subparsers.add_parser(
         "classify",
         parents=[parent],
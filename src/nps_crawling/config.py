@@ -60,11 +60,46 @@ class Config:
     # Crawl
     QUERY_PATH: Path = ROOT_DIR / "query"
     CRAWL_SEC_QUERY_LIMIT_COUNT: int = 10_000
-    CRAWL_DOWNLOAD_DELAY: float = 0.2
+    CRAWL_DOWNLOAD_DELAY: float = 0.0
+    CRAWL_SEC_REQUESTS_PER_SECOND: float = 10.0
+    CRAWL_SEC_MIN_REQUESTS_PER_SECOND: float = 0.5
+    CRAWL_PREFETCH_MAX_CONCURRENCY: int = 8
+    CRAWL_PREFETCH_MAX_RETRIES: int = 5
+    CRAWL_PREFETCH_CACHE_TTL_HOURS: float = 24
+    CRAWL_TICKER_CACHE_TTL_HOURS: float = 24
+    CRAWL_OFFLINE: bool = False
+    CRAWL_SEC_BASE_URL: str | None = None
+    CRAWL_RESPONSE_CACHE: bool = True
+    CRAWL_DB_FLUSH_ITEMS: int = 100
+    CRAWL_DB_FLUSH_SECONDS: float = 10.0
+    CRAWL_RAW_STORE: str = "json"
+    CRAWL_INCREMENTAL: bool = False
+    CRAWL_MERGE_QUERIES: bool = False
+    CRAWL_QUEUE_BATCH_SIZE: int = 50
+    CRAWL_QUEUE_LEASE_SECONDS: float = 600.0
+    CRAWL_QUEUE_MAX_ATTEMPTS: int = 3
+    CRAWL_QUEUE_WORKERS: int = 1
+    CRAWL_BULK_CHUNK_SIZE: int = 50_000
+    CRAWL_EVENT_BUS_QUEUED: bool = True
+    CRAWL_EVENT_COALESCE_SECONDS: float = 0.2
+    CRAWL_PDF_WORKERS: int = 2
+    CRAWL_PDF_MAX_PAGES: int = 0
+    CRAWL_PDF_MAX_BYTES: int = 50 * 1024 * 1024
+    CRAWL_DOWNLOAD_TRUNCATE_BYTES: dict[str, int] = {
+        "htm": 64 * 1024 * 1024,
+        "html": 64 * 1024 * 1024,
+        "txt": 64 * 1024 * 1024,
+        "xml": 64 * 1024 * 1024,
+    }
+    CRAWL_DOWNLOAD_WARN_BYTES: int = 16 * 1024 * 1024
+    CRAWL_PDF_STOP_ON_KEYWORD: bool = False
 
     # Preprocess
     PREPROCESSING_VERSION: str = "version_1"
     PREPROCESS_FILES_PER_CHUNK: int = 1000
+    PREPROCESS_EMBED_BATCH_SIZE: int = 2048
+    PREPROCESS_FAST_HTML_EXTRACTION: bool = True
+    PREPROCESS_RAW_PRESCREEN: bool = True
     SINGLE_KEYWORD_FILTER: str | list[str] | None = None
     SINGLE_KEYWORD_FILTER_STRICT: bool = True
     THRESHOLD_KEYWORD_SCOPE: list[str] | None = ["nps"]
@@ -0,0 +1,97 @@
+"""Crash-safe checkpoints of the filings dispatched and completed by a crawl."""
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import time
+from pathlib import Path
+
+from nps_crawling.config import Config
+from nps_crawling.crawler.pre_fetch_utils.filings import Filing
+
+logger = logging.getLogger(__name__)
+
+DISPATCHED: int = 0
+COMPLETED: int = 1
+
+
+class CrawlCheckpoint:
+    """SQLite set of filing IDs with their crawl status.
+
+    Every filing is recorded once when it is dispatched and updated once when it is
+    stored, so the cost per filing stays constant however long the crawl runs. A
+    restarted crawl skips completed filings with primary key lookups and dispatches
+    the filings that were still in flight again. The filing itself is stored with
+    the ID, so in-flight filings can be resumed without re-running their query.
+    """
+
+    def __init__(self, path: Path | None = None, chunk_size: int = 500):
+        """Opens the checkpoint at ``path`` (default: ``crawl_checkpoint.sqlite`` of the active project)."""
+        self.path: Path = (
+            Path(path) if path is not None else Config.RAW_JSON_PATH_CRAWLER.parent / "crawl_checkpoint.sqlite"
+        )
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.chunk_size: int = chunk_size
+
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS filings "
+            "(id TEXT PRIMARY KEY, status INTEGER NOT NULL, filing TEXT, updated_at REAL NOT NULL)",
+        )
+        self._conn.commit()
+
+    def _chunks(self, ids: list[str]):
+        for start in range(0, len(ids), self.chunk_size):
+            yield ids[start:start + self.chunk_size]
+
+    def completed(self, filing_ids: list[str]) -> set[str]:
+        """Returns the IDs of ``filing_ids`` that were already completed."""
+        done: set[str] = set()
+        for chunk in self._chunks(list(filing_ids)):
+            placeholders: str = ",".join("?" * len(chunk))
+            done.update(row[0] for row in self._conn.execute(
+                f"SELECT id FROM filings WHERE status = {COMPLETED} AND id IN ({placeholders})",  # noqa: S608
+                chunk,
+            ))
+        return done
+
+    def in_flight(self) -> list[Filing]:
+        """Returns the filings dispatched by a previous crawl that were never completed."""
+        filings: list[Filing] = []
+        for (payload,) in self._conn.execute(f"SELECT filing FROM filings WHERE status = {DISPATCHED} ORDER BY rowid"):
+            try:
+                filings.append(Filing.from_state(json.loads(payload)))
+            except (TypeError, ValueError) as e:
+                logger.warning(f"Skipping unreadable checkpoint entry: {e}")
+        return filings
+
+    def mark_dispatched(self, filings: list[Filing]) -> None:
+        """Records ``filings`` as dispatched, keeping filings that are already recorded."""
+        now: float = time.time()
+        self._conn.executemany(
+            f"INSERT OR IGNORE INTO filings (id, status, filing, updated_at) VALUES (?, {DISPATCHED}, ?, ?)",
+            ((filing.id, json.dumps(filing.to_state(), ensure_ascii=False), now) for filing in filings),
+        )
+        self._conn.commit()
+
+    def mark_completed(self, filing_ids: list[str]) -> None:
+        """Records ``filing_ids`` as completed."""
+        now: float = time.time()
+        self._conn.executemany(
+            f"INSERT INTO filings (id, status, updated_at) VALUES (?, {COMPLETED}, ?) "
+            f"ON CONFLICT(id) DO UPDATE SET status = {COMPLETED}, filing = NULL, updated_at = excluded.updated_at",
+            ((filing_id, now) for filing_id in filing_ids),
+        )
+        self._conn.commit()
+
+    def clear(self) -> None:
+        """Forgets all filings, e.g. after the crawl finished."""
+        self._conn.execute("DELETE FROM filings")
+        self._conn.commit()
+
+    def close(self) -> None:
+        """Closes the underlying database."""
+        self._conn.close()
@@ -0,0 +1,85 @@
+"""Work queue of filings shared by crawl workers on several processes or hosts."""
+from __future__ import annotations
+
+import logging
+import os
+import socket
+
+from nps_crawling.config import Config
+from nps_crawling.crawler.pre_fetch_utils.filings import Filing
+from nps_crawling.db.db_adapter import DbAdapter
+
+logger = logging.getLogger(__name__)
+
+
+def default_worker_id() -> str:
+    """Returns a worker name that is unique across hosts and processes."""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class CrawlQueue:
+    """Filings to crawl, stored in the ``{TABLE}_crawl_queue`` table and leased to workers.
+
+    A prefetch enqueues its filings once, any number of ``BetterSpider`` workers then
+    claim batches, crawl them and complete them after they were stored. Leases of a
+    worker are extended while it is alive; leases of dead workers expire and their
+    filings are claimed by other workers, up to ``max_attempts`` times.
+    """
+
+    def __init__(self,
+                 db: DbAdapter | None = None,
+                 worker_id: str | None = None,
+                 batch_size: int | None = None,
+                 lease_seconds: float | None = None,
+                 max_attempts: int | None = None):
+        """Initializes the queue and creates its table if needed. Defaults are read from ``Config``."""
+        self.db: DbAdapter = db if db is not None else DbAdapter()
+        self.worker_id: str = worker_id or default_worker_id()
+        self.batch_size: int = batch_size or Config.CRAWL_QUEUE_BATCH_SIZE
+        self.lease_seconds: float = lease_seconds or Config.CRAWL_QUEUE_LEASE_SECONDS
+        self.max_attempts: int = max_attempts or Config.CRAWL_QUEUE_MAX_ATTEMPTS
+        self.db.ensure_crawl_queue_exists()
+
+    def enqueue(self, filings: list[Filing], chunk_size: int = 1000) -> int:
+        """Adds ``filings`` to the queue. Returns the number of newly queued filings."""
+        queued: int = 0
+        for start in range(0, len(filings), chunk_size):
+            rows: list[dict] = [{"id": filing.id, "filing": filing.to_state()}
+                                for filing in filings[start:start + chunk_size]]
+            queued += self.db.enqueue_crawl_work(rows)
+        logger.info(f"Queued {queued} of {len(filings)} filings for crawling.")
+        return queued
+
+    def claim(self) -> list[Filing]:
+        """Leases the next batch of filings to this worker."""
+        rows: list[dict] = self.db.claim_crawl_work(self.worker_id, self.batch_size,
+                                                     self.lease_seconds, self.max_attempts)
+        return [Filing.from_state(row["filing"]) for row in rows]
+
+    def complete(self, filing_ids: list[str]) -> int:
+        """Marks crawled and stored filings of this worker as done."""
+        return self.db.complete_crawl_work(self.worker_id, filing_ids)
+
+    def fail(self, filing_ids: list[str]) -> int:
+        """Releases the leases of filings this worker could not crawl or store.
+
+        Every lease counts as an attempt: the filings are claimed again until they
+        were leased ``max_attempts`` times, then they are marked failed.
+        """
+        return self.db.fail_crawl_work(self.worker_id, filing_ids, self.max_attempts)
+
+    def heartbeat(self) -> int:
+        """Extends the leases of this worker's in-flight filings."""
+        return self.db.extend_crawl_leases(self.worker_id, self.lease_seconds)
+
+    def counts(self) -> dict[str, int]:
+        """Returns the number of queued filings per status."""
+        return self.db.crawl_queue_counts()
+
+    def is_drained(self) -> bool:
+        """Returns True when no filing is pending or leased by any worker with attempts left.
+
+        Filings on their last attempt are not waited for: they are completed or failed
+        by the worker holding them, or marked failed once their lease expired.
+        """
+        return not self.db.crawl_queue_open_count(self.max_attempts)
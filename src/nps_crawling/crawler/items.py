@@ -10,4 +10,7 @@ class FilingItem(scrapy.Item):
     filing: Filing = scrapy.Field()
     core_text: str = scrapy.Field()
     keyword: str = scrapy.Field()
+    keywords: list[str] = scrapy.Field()
     url: str = scrapy.Field()
+    # "truncated" or "skipped" when the document exceeded its download budget
+    download_status: str | None = scrapy.Field()
@@ -1 +1,174 @@
 """Middlewares for the crawler."""
+from __future__ import annotations
+
+import logging
+from urllib.parse import urlparse
+
+import scrapy
+from scrapy import signals
+from scrapy.crawler import Crawler
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from scrapy.responsetypes import responsetypes
+from scrapy.statscollectors import StatsCollector
+from scrapy.utils.defer import maybe_deferred_to_future
+from twisted.internet import reactor
+from twisted.internet.task import deferLater
+
+from nps_crawling.crawler.pre_fetch_utils.rate_limiter import (
+    SEC_HOSTS,
+    AdaptiveTokenBucket,
+    parse_retry_after,
+    sec_rate_limiter,
+)
+from nps_crawling.crawler.response_cache import ResponseCache, is_archive_url
+
+logger = logging.getLogger(__name__)
+
+
+class SecRateLimitMiddleware:
+    """Downloader middleware pacing all requests to the SEC hosts with one shared token bucket.
+
+    The bucket is the same one the prefetch uses, so search and download requests share
+    SEC's fair access budget. Throttled responses (429/503 by default) shrink the rate and
+    honour ``Retry-After``, healthy responses slowly raise it again. The current rate is
+    exposed as the ``sec_rate_limit/rate`` stat.
+    """
+
+    def __init__(self,
+                 bucket: AdaptiveTokenBucket,
+                 hosts: list[str],
+                 throttle_codes: list[int],
+                 stats: StatsCollector):
+        """Initializes the middleware."""
+        self.bucket: AdaptiveTokenBucket = bucket
+        self.hosts: set[str] = set(hosts)
+        self.throttle_codes: set[int] = set(throttle_codes)
+        self.stats: StatsCollector = stats
+        self.stats.set_value("sec_rate_limit/rate", self.bucket.rate)
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler) -> SecRateLimitMiddleware:
+        """Creates the middleware on the shared bucket, capped at ``SEC_RATE_LIMIT_MAX_RATE`` if set."""
+        if not crawler.settings.getbool("SEC_RATE_LIMIT_ENABLED", True):
+            raise NotConfigured
+        bucket: AdaptiveTokenBucket = sec_rate_limiter()
+        max_rate: float = crawler.settings.getfloat("SEC_RATE_LIMIT_MAX_RATE", 0.0)
+        if max_rate > 0:
+            bucket.set_max_rate(max_rate)
+        return cls(bucket=bucket,
+                   hosts=crawler.settings.getlist("SEC_RATE_LIMIT_HOSTS", list(SEC_HOSTS)),
+                   throttle_codes=[int(code) for code in
+                                   crawler.settings.getlist("SEC_RATE_LIMIT_THROTTLE_CODES", [429, 503])],
+                   stats=crawler.stats)
+
+    def _is_sec(self, request: scrapy.Request) -> bool:
+        return urlparse(request.url).hostname in self.hosts
+
+    async def process_request(self, request: scrapy.Request, spider: scrapy.Spider = None) -> None:
+        """Delays requests to SEC hosts until the bucket grants them a token."""
+        if not self._is_sec(request):
+            return None
+        delay: float = self.bucket.reserve()
+        if delay > 0:
+            self.stats.inc_value("sec_rate_limit/delayed_requests")
+            await maybe_deferred_to_future(deferLater(reactor, delay, lambda: None))
+        return None
+
+    def process_response(self,
+                         request: scrapy.Request,
+                         response: scrapy.http.Response,
+                         spider: scrapy.Spider = None) -> scrapy.http.Response:
+        """Lowers the rate of the bucket on throttling responses of SEC hosts and raises it on successes."""
+        if not self._is_sec(request):
+            return response
+
+        if response.status in self.throttle_codes:
+            retry_after: float | None = parse_retry_after(response.headers.get("Retry-After"))
+            rate: float = self.bucket.throttle(retry_after)
+            self.stats.inc_value("sec_rate_limit/throttled")
+            logger.warning(f"SEC throttled {request.url} with {response.status}, "
+                           f"lowering rate to {rate:.2f} requests per second.")
+        elif response.status < 400:
+            rate = self.bucket.recover()
+        else:
+            rate = self.bucket.rate
+
+        self.stats.set_value("sec_rate_limit/rate", rate)
+        self.stats.min_value("sec_rate_limit/min_rate", rate)
+        return response
+
+
+class ArchiveResponseCacheMiddleware:
+    """Downloader middleware serving SEC archive documents from the local :class:`ResponseCache`.
+
+    Successful downloads of ``Archives/edgar/data`` documents are stored, later requests
+    for the same URL are answered from disk without touching the network or the rate
+    limit. In replay-only mode requests that are not cached are dropped, so crawls can
+    run offline. Hits and misses are exposed as ``response_cache/*`` stats.
+    """
+
+    # Bodies are stored decoded, so these headers no longer describe them
+    _DROPPED_HEADERS: frozenset[str] = frozenset({"content-encoding", "content-length", "transfer-encoding"})
+
+    def __init__(self, cache: ResponseCache, stats: StatsCollector, replay_only: bool = False):
+        """Initializes the middleware."""
+        self.cache: ResponseCache = cache
+        self.stats: StatsCollector = stats
+        self.replay_only: bool = replay_only
+
+    @classmethod
+    def from_crawler(cls, crawler: Crawler) -> ArchiveResponseCacheMiddleware:
+        """Creates the middleware unless ``RESPONSE_CACHE_ENABLED`` is off."""
+        settings = crawler.settings
+        if not settings.getbool("RESPONSE_CACHE_ENABLED", True):
+            raise NotConfigured
+        middleware = cls(cache=ResponseCache(settings.get("RESPONSE_CACHE_DIR")),
+                         stats=crawler.stats,
+                         replay_only=settings.getbool("RESPONSE_CACHE_REPLAY_ONLY", False))
+        crawler.signals.connect(middleware.spider_closed, signal=signals.spider_closed)
+        return middleware
+
+    def process_request(self,
+                        request: scrapy.Request,
+                        spider: scrapy.Spider = None) -> scrapy.http.Response | None:
+        """Answers archive requests from the cache, dropping uncached ones in replay-only mode."""
+        if not is_archive_url(request.url):
+            return None
+
+        cached = self.cache.get(request.url)
+        if cached is None:
+            self.stats.inc_value("response_cache/miss")
+            if self.replay_only:
+                self.stats.inc_value("response_cache/ignored")
+                raise IgnoreRequest(f"{request.url} is not in the response cache (replay only)")
+            return None
+
+        self.stats.inc_value("response_cache/hit")
+        self.stats.inc_value("response_cache/hit_bytes", len(cached.body))
+        response_cls = responsetypes.from_args(headers=cached.headers, url=request.url, body=cached.body)
+        return response_cls(url=request.url, status=cached.status, headers=cached.headers,
+                            body=cached.body, request=request, flags=["cached"])
+
+    def process_response(self,
+                         request: scrapy.Request,
+                         response: scrapy.http.Response,
+                         spider: scrapy.Spider = None) -> scrapy.http.Response:
+        """Stores complete successful archive downloads in the cache."""
+        if "cached" in response.flags or response.status != 200 or not is_archive_url(request.url):
+            return response
+        if "download_stopped" in response.flags:
+            # Documents truncated by their download budget are incomplete
+            return response
+
+        headers: dict[str, list[str]] = {
+            key.decode("latin-1"): [value.decode("latin-1") for value in values]
+            for key, values in response.headers.items()
+            if key.decode("latin-1").lower() not in self._DROPPED_HEADERS
+        }
+        self.cache.put(request.url, response.status, headers, response.body)
+        self.stats.inc_value("response_cache/stored")
+        return response
+
+    def spider_closed(self, spider: scrapy.Spider) -> None:
+        """Closes the cache when the crawl ends."""
+        self.cache.close()
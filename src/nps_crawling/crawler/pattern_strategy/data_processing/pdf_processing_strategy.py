@@ -1,25 +1,93 @@
-import pypdf
-import logging
+import asyncio
 import io
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+import pypdf
 
+from nps_crawling.config import Config
 from nps_crawling.crawler.pattern_strategy.data_processing.processing_strategy import ProcessingStrategy
+from nps_crawling.utils.keyword_matcher import KeywordMatcher
 
 logger = logging.getLogger(__name__)
 
+_pool: Executor | None = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> Executor | None:
+    """Returns the process pool shared by all PDF extractions, or None to use a thread."""
+    global _pool
+    with _pool_lock:
+        if _pool is None and Config.CRAWL_PDF_WORKERS > 0:
+            # Spawn instead of fork: the crawler process runs the reactor in a separate thread.
+            _pool = ProcessPoolExecutor(max_workers=Config.CRAWL_PDF_WORKERS,
+                                        mp_context=multiprocessing.get_context("spawn"))
+        return _pool
+
+
+def extract_pdf_text(pdf_bytes: bytes,
+                     max_pages: int = 0,
+                     keywords: list[str] | None = None) -> str:
+    """Extracts the text of a PDF page by page.
+
+    Args:
+        pdf_bytes: Content of the PDF file.
+        max_pages: Stop after this many pages (0: all pages).
+        keywords: Stop after the first page that contains one of these keywords.
+    """
+    reader: pypdf.PdfReader = pypdf.PdfReader(io.BytesIO(pdf_bytes))
+    matcher: KeywordMatcher = KeywordMatcher(keywords or [])
+
+    text_parts: list[str] = []
+
+    for i, page in enumerate(reader.pages):
+        if max_pages > 0 and i >= max_pages:
+            break
+        page_text: str = page.extract_text() or ''
+        text_parts.append(page_text)
+        if matcher and matcher.search(page_text):
+            break
+
+    return '\n'.join(text_parts)
+
+
 class PdfProcessingStrategy(ProcessingStrategy):
-    def __init__(self) -> None:
+    def __init__(self,
+                 max_pages: int | None = None,
+                 max_bytes: int | None = None,
+                 stop_on_keyword: bool | None = None) -> None:
         super().__init__()
+        self.max_pages: int = Config.CRAWL_PDF_MAX_PAGES if max_pages is None else max_pages
+        self.max_bytes: int = Config.CRAWL_PDF_MAX_BYTES if max_bytes is None else max_bytes
+        self.stop_on_keyword: bool = Config.CRAWL_PDF_STOP_ON_KEYWORD if stop_on_keyword is None else stop_on_keyword
 
-    def extract(self, response) -> str:
-        logger.info(f"Extracting content from {response.url} as PDF.")
+    def _arguments(self, response) -> tuple[bytes, int, list[str] | None] | None:
         pdf_bytes: bytes = response.body
-        reader: pypdf.PdfReader = pypdf.PdfReader(io.BytesIO(pdf_bytes))
+        if self.max_bytes > 0 and len(pdf_bytes) > self.max_bytes:
+            logger.warning(f"Skipping PDF {response.url}: {len(pdf_bytes)} bytes exceed the limit of {self.max_bytes}.")
+            return None
 
-        text_parts: list[str] = []
+        keywords: list[str] | None = None
+        filing = response.meta.get('filing') if self.stop_on_keyword else None
+        if filing is not None:
+            keywords = [keyword.strip('"\'') for keyword in getattr(filing, 'keywords', [filing.keyword]) if keyword]
+        return pdf_bytes, self.max_pages, keywords
 
-        for page in reader.pages:
-            page_text: str = page.extract_text() or ''
-            text_parts.append(page_text)
+    def extract(self, response) -> str:
+        logger.info(f"Extracting content from {response.url} as PDF.")
+        arguments = self._arguments(response)
+        if arguments is None:
+            return ''
+        return extract_pdf_text(*arguments)
 
-        core_text: str = '\n'.join(text_parts)
-        return core_text
\ No newline at end of file
+    async def extract_async(self, response) -> str:
+        """Extracts the text in the PDF process pool, so the reactor is not blocked."""
+        logger.info(f"Extracting content from {response.url} as PDF in the background.")
+        arguments = self._arguments(response)
+        if arguments is None:
+            return ''
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_pool(), extract_pdf_text, *arguments)
@@ -4,4 +4,8 @@ class ProcessingStrategy(ABC):
 
     @abstractmethod
     def extract(self, response) -> str:
-        pass
\ No newline at end of file
+        pass
+
+    async def extract_async(self, response) -> str:
+        """Extracts the text without blocking the reactor. Strategies with expensive extraction override this."""
+        return self.extract(response)
@@ -5,4 +5,15 @@ class FetchStrategy(ABC):
 
     @abstractmethod
     def fetch(self, query_path: str, **kwargs) -> list[Filing]:
-        pass
\ No newline at end of file
+        pass
+
+    def fetch_many(self, query_paths: list[str], **kwargs) -> list[Filing]:
+        """Fetches the filings of all query files, one file after another."""
+        filings: list[Filing] = []
+        for query_path in query_paths:
+            filings.extend(self.fetch(query_path=query_path, **kwargs))
+        return filings
+
+    def commit(self) -> None:
+        """Persists the progress of the last fetch once its filings were crawled."""
+        pass
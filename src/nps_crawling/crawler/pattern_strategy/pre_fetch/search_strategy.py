@@ -1,6 +1,10 @@
 from nps_crawling.crawler.pattern_strategy.pre_fetch.fetch_strategy import FetchStrategy
-from nps_crawling.crawler.pre_fetch_utils.filings import Filing
+from nps_crawling.db.db_adapter import DbAdapter
+from nps_crawling.crawler.pre_fetch_utils.crawl_watermarks import CrawlWatermarks
+from nps_crawling.crawler.pre_fetch_utils.filings import Filing, merge_filings
+from nps_crawling.crawler.pre_fetch_utils.prefetch_cache import CachedQuery, PrefetchCache
 from nps_crawling.crawler.pre_fetch_utils.sec_params import SecSearchParams, create_search_params_from_config
+from nps_crawling.crawler.pre_fetch_utils.sec_prefetch import SecPrefetcher
 from nps_crawling.crawler.pre_fetch_utils.sec_query import SecQuery
 from nps_crawling.utils.event_bus import bus
 
@@ -14,56 +18,133 @@ logger = logging.getLogger(__name__)
 
 class SearchStrategy(FetchStrategy):
 
-    def __init__(self) -> None:
+    def __init__(self, watermarks: CrawlWatermarks | None = None) -> None:
         super().__init__()
+        self.watermarks: CrawlWatermarks | None = watermarks
+        # Marks of incremental queries, persisted by commit() after the crawl
+        self._pending_watermarks: list[tuple[SecSearchParams, list[Filing]]] = []
 
     def fetch(self, 
               query_path: str,
               **kwargs) -> list[Filing]:
-        
+        return self.fetch_many(query_paths=[query_path], **kwargs)
+
+    def fetch_many(self,
+                   query_paths: list[str],
+                   **kwargs) -> list[Filing]:
+        """Prefetches the queries of all files concurrently and merges their filings."""
         ignore_lookup = kwargs.get("ignore_lookup", False)
+        incremental = kwargs.get("incremental", False)
+        # Bypass the prefetch cache and always query EDGAR
+        refresh = kwargs.get("refresh", False)
         # Create search parameters based on queries
-        search_parameters: list[SecSearchParams] = create_search_params_from_config(query_path)
+        search_parameters: list[SecSearchParams] = []
+        for query_path in query_paths:
+            search_parameters.extend(create_search_params_from_config(query_path))
+
+        # Only search filings since the high-water mark of the previous incremental crawl
+        if incremental:
+            self._narrow_to_watermarks(search_parameters)
+
+        sec_queries: list[SecQuery] = self._create_queries(search_parameters)
+
+        # Serve queries from the prefetch cache, fetch the search pages of all others at once
+        cache: PrefetchCache = PrefetchCache()
+        filings_per_query: dict[int, list[Filing]] = {} if refresh else self._lookup_cache(cache, sec_queries)
+        filings_per_query.update(self._prefetch_missing(cache, sec_queries, filings_per_query))
+
+        if incremental:
+            self._defer_watermarks(sec_queries, filings_per_query)
+
+        if ignore_lookup:
+            logger.info("Ignoring database.")
+        else:
+            # fetch_filings already removed the filings known to the database
+            logger.info("Using database for duplicate-check.")
+
+        merged: list[Filing] = self._merge(sec_queries, filings_per_query)
+        bus.publish("prefetch.result", merged)
+
+        return merged
+
+    def _narrow_to_watermarks(self, search_parameters: list[SecSearchParams]) -> None:
+        """Narrows the date range of every query to the filings since its high-water mark."""
+        if self.watermarks is None:
+            self.watermarks = CrawlWatermarks()
+        for parameter in search_parameters:
+            self.watermarks.narrow(parameter)
+
+    @staticmethod
+    def _create_queries(search_parameters: list[SecSearchParams]) -> list[SecQuery]:
+        """Creates one query per search parameter set, all sharing one database adapter."""
+        # Share one database adapter (and engine) between all queries
+        db: DbAdapter | None = None
+        try:
+            db = DbAdapter()
+        except (ModuleNotFoundError, ValueError) as e:
+            logger.warning(f"Database unavailable for duplicate-check: {e}")
 
-        # Create queries
         sec_queries: list[SecQuery] = []
         for parameter in search_parameters:
             if parameter.filing_limit == -1:
                 parameter.filing_limit = get_project_settings()["SEC_QUERY_LIMIT_COUNT"]
+            sec_queries.append(SecQuery(sec_params=parameter, db=db))
+        return sec_queries
 
-            query: SecQuery = SecQuery(sec_params=parameter)
-            sec_queries.append(query)
+    @staticmethod
+    def _lookup_cache(cache: PrefetchCache, sec_queries: list[SecQuery]) -> dict[int, list[Filing]]:
+        """Returns the cached filings by query index for the queries found in the prefetch cache."""
+        filings_per_query: dict[int, list[Filing]] = {}
+        for i, query in enumerate(sec_queries):
+            cached: CachedQuery | None = cache.get(query.sec_params)
+            if cached is not None:
+                logger.info(f"Using {len(cached.filings)} cached filings of query {query.sec_params.id}.")
+                query.results, query.complete, query.truncated = cached.results, cached.complete, cached.truncated
+                filings_per_query[i] = cached.filings
+        return filings_per_query
 
-        # Fetch all filings per query
-        filings_dict: dict[str, Filing] = {}
-        duplicates: dict[str, list[Filing]] = {}
+    @staticmethod
+    def _prefetch_missing(cache: PrefetchCache,
+                          sec_queries: list[SecQuery],
+                          cached: dict[int, list[Filing]]) -> dict[int, list[Filing]]:
+        """Fetches the search pages of all queries not in ``cached`` at once and caches the fully fetched ones."""
+        missing: list[int] = [i for i in range(len(sec_queries)) if i not in cached]
+        pages_per_query: list[list[dict]] = SecPrefetcher.from_config().prefetch([sec_queries[i] for i in missing])
 
-        for query in sec_queries:
-            temp: list[Filing] = query.fetch_filings()
+        filings_per_query: dict[int, list[Filing]] = {}
+        for i, pages in zip(missing, pages_per_query):
+            query = sec_queries[i]
+            filings_per_query[i] = query.create_filings(pages)
+            # Failed or partial searches are fetched again by the next crawl
+            if query.complete or query.truncated:
+                cache.put(query.sec_params, filings_per_query[i], query.results, query.complete, query.truncated)
+        return filings_per_query
 
-            if ignore_lookup:
-                logger.info("Ignoring database.")
-                filings = temp
-                bus.publish("prefetch.result", temp)
+    def _defer_watermarks(self, sec_queries: list[SecQuery], filings_per_query: dict[int, list[Filing]]) -> None:
+        """Keeps the filings of the complete queries until commit() advances their high-water marks."""
+        for i, query in enumerate(sec_queries):
+            if query.complete:
+                self._pending_watermarks.append((query.sec_params, filings_per_query[i]))
             else:
-                logger.info("Using database for duplicate-check.")
-                temp = query.are_filings_present_in_db(filings=temp.copy())
-                print(len(temp))
-                for filing in temp:
-                    if filing.id in filings_dict:
-                        # Collect duplicates for analysis
-                        if filing.id not in duplicates:
-                            duplicates[filing.id] = [filings_dict[filing.id]]
-                            logger.debug(f"Found duplicate: {filing.id}")
-                        duplicates[filing.id].append(filing)
-                    else:
-                        filings_dict[filing.id] = filing
-
-                new_list: list[Filing] = list(filings_dict.values())
-                bus.publish("prefetch.result", new_list)
-                filings = new_list
-
-                for _id, dupes in duplicates.items():
-                    logger.info(f"Found for ID {_id} {len(dupes)} duplicates.")
-
-        return filings
\ No newline at end of file
+                logger.warning(f"Query {query.sec_params.id} was not fetched completely, "
+                               f"keeping its high-water mark.")
+
+    @staticmethod
+    def _merge(sec_queries: list[SecQuery], filings_per_query: dict[int, list[Filing]]) -> list[Filing]:
+        """Returns the new filings of all queries, merging the filings found by several queries."""
+        filings: list[Filing] = []
+        for i, query in enumerate(sec_queries):
+            filings.extend(query.fetch_filings(filings=filings_per_query[i]))
+
+        # Filings found by several queries are crawled once, with the keywords of all queries
+        merged: list[Filing] = merge_filings(filings)
+        if len(merged) < len(filings):
+            logger.info(f"Merged {len(filings) - len(merged)} duplicate filings found by several queries.")
+        return merged
+
+    def commit(self) -> None:
+        """Advances the high-water marks of the incremental queries fetched since the last commit."""
+        for parameter, filings in self._pending_watermarks:
+            mark: str | None = self.watermarks.advance(parameter, filings)
+            logger.info(f"High-water mark of query {parameter.id}: {mark}")
+        self._pending_watermarks = []
\ No newline at end of file
@@ -1,36 +1,52 @@
 """Pipelines for storing crawled data."""
 import json
+import time
 from datetime import datetime
 from uuid import uuid4
 
+from twisted.internet import task
+
 from nps_crawling.config import Config
 from nps_crawling.db.db_adapter import DbAdapter
+from nps_crawling.utils.raw_store import RawStore, create_raw_store
 
 import logging
 logger = logging.getLogger(__name__)    
 
 class SaveToJSONPipeline(Config):
-    """Collect scraped items during a crawl and persist them as JSON files.
+    """Collect scraped items during a crawl and persist them in the raw store.
 
-    Each record is written as a JSON file with two top-level keys:
+    Each record is stored with two top-level keys:
     - ``metadata``: all filing fields except ``core_text``
     - ``core_text``: the extracted text content of the filing
+
+    The raw store backend (one JSON file per filing or compressed segment files)
+    is selected by ``Config.CRAWL_RAW_STORE``.
     """
 
     def __init__(self):
         """Initialize pipeline state."""
-        self.json_root = Config.RAW_JSON_PATH_CRAWLER / "files"
+        self.raw_store: RawStore | None = None
         self.records = []
-        self.flush_every = 1
+        # Rows of a failed database write, retried with the next flush
+        self.failed_rows: dict[str, dict] = {}
+        self.flush_every = Config.CRAWL_DB_FLUSH_ITEMS
+        self.flush_interval = Config.CRAWL_DB_FLUSH_SECONDS
+        self._flush_loop = None
+        self.checkpoint = None
+        self.work_queue = None
+        self.crawler_stats = None
 
         self.stats = {
             "total_items_crawled": 0,
             "new_records_added_to_db": 0,
             "existing_records_updated": 0,
             "keywords_found": set(),
+            "truncated_documents": [],
+            "skipped_documents": [],
         }
 
-        # Initialize the database adapter for real-time upserts
+        # Initialize the database adapter for batched upserts
         try:
             self.db = DbAdapter()
         except ModuleNotFoundError as e:
@@ -41,11 +57,27 @@ class SaveToJSONPipeline(Config):
             self.db = None
 
     def open_spider(self, spider):
-        """Reset the in-memory buffer when the spider starts."""
+        """Reset the in-memory buffer and start the periodic flush when the spider starts."""
         self.records = []
+        self.failed_rows = {}
         self.start_timestamp = datetime.now()
+        # Filings are marked as completed in the spider's checkpoint once they are stored
+        self.checkpoint = getattr(spider, "checkpoint", None)
+        # Workers of a distributed crawl complete their filings in the shared work queue
+        self.work_queue = getattr(spider, "work_queue", None)
+        crawler = getattr(spider, "crawler", None)
+        self.crawler_stats = crawler.stats if crawler is not None else None
         self.dry_run = spider.settings.get("CRAWL_DB_ONLY", False)
         self.db_only = spider.settings.get("CRAWL_DB_ONLY", False)
+        self.flush_every = max(1, spider.settings.getint("CRAWL_DB_FLUSH_ITEMS", self.flush_every))
+        self.flush_interval = spider.settings.getfloat("CRAWL_DB_FLUSH_SECONDS", self.flush_interval)
+        if self.raw_store is None and not self.db_only:
+            self.raw_store = create_raw_store()
+
+        # Flush buffered items after flush_interval seconds even if the buffer is not full
+        if self.flush_interval > 0:
+            self._flush_loop = task.LoopingCall(self._flush_buffer)
+            self._flush_loop.start(self.flush_interval, now=False)
 
     def _to_serializable(self, val):
         """Recursively convert a value to a JSON-serializable type."""
@@ -53,6 +85,12 @@ class SaveToJSONPipeline(Config):
             return val
         if isinstance(val, list):
             return [self._to_serializable(x) for x in val]
+        if hasattr(val, "to_dict"):
+            return {
+                k: self._to_serializable(v)
+                for k, v in val.to_dict().items()
+                if not k.startswith("_")
+            }
         if hasattr(val, "__dict__"):
             return {
                 k: self._to_serializable(v)
@@ -62,59 +100,23 @@ class SaveToJSONPipeline(Config):
         return str(val)
 
     def process_item(self, item, spider):
-        """Buffer a single scraped item, store in DB immediately, and flush buffer when full."""
+        """Buffer a single scraped item and flush the buffer when it is full."""
         record = dict(item)
 
         url = self._to_serializable(record.pop("url"))
         core_text = self._to_serializable(record.pop("core_text", None))
         metadata = {k: self._to_serializable(v) for k, v in record.items()}
 
-        # 1. Add to Postgres right away
-        if hasattr(self, 'db') and self.db is not None:
-            # Reconstruct the filing dictionary since scrapy items are flat
-            filing = metadata.get("filing", {})
-            keyword = metadata.get("keyword")
-            filing_id = filing.get("id")
-
-            if filing_id:
-                self.stats["total_items_crawled"] += 1
-                if keyword:
-                    self.stats["keywords_found"].add(keyword)
-
-                if self.db.filing_exists(filing_id):
-                    self.stats["existing_records_updated"] += 1
-                    if keyword:
-                        self.db.add_keyword(filing_id, keyword)
-                else:
-                    self.stats["new_records_added_to_db"] += 1
-                    keywords_list = [keyword] if keyword else []
-                    # path_to_raw will be set later during the flush, so we set it to None initially
-
-                    try:
-                        self.db.add_filing(
-                            filing_id=filing_id,
-                            ciks=filing.get("ciks", []),
-                            ticker=filing.get("ticker", []),
-                            period_ending=filing.get("period_ending"),
-                            display_names=filing.get("display_names", []),
-                            root_forms=filing.get("root_forms", []),
-                            file_date=filing.get("file_date"),
-                            form=filing.get("form"),
-                            adsh=filing.get("adsh"),
-                            file_type=filing.get("file_type"),
-                            file_description=filing.get("file_description"),
-                            film_num=filing.get("film_num", []),
-                            keywords=keywords_list,
-                            blacklisted=False,
-                            project_relevant=None,
-                            path_to_raw=None,  # Will be set once batched to disk
-                            url=url,
-                        )
-                    except Exception as e:
-                        # Log silently or configure scrapy logger and skip
-                        pass
-
-        # 2. Add to Memory buffer for JSON export
+        filing_id = metadata.get("filing", {}).get("id")
+        keyword = metadata.get("keyword")
+        if filing_id:
+            self.stats["total_items_crawled"] += 1
+            self.stats["keywords_found"].update(metadata.get("keywords") or ([keyword] if keyword else []))
+            # Documents over their download budget
+            if metadata.get("download_status") in ("truncated", "skipped"):
+                self.stats[f"{metadata['download_status']}_documents"].append(filing_id)
+
+        # Database and JSON files are written together when the buffer is flushed
         self.records.append({"metadata": metadata, "core_text": core_text, "url": url})
 
         if len(self.records) >= self.flush_every:
@@ -123,8 +125,21 @@ class SaveToJSONPipeline(Config):
 
     def close_spider(self, spider):
         """Flush any remaining records when the spider closes."""
-        if self.records:
-            self._flush_buffer()
+        if self._flush_loop is not None and self._flush_loop.running:
+            self._flush_loop.stop()
+        self._flush_buffer()
+        if self.failed_rows:
+            logger.error(f"{len(self.failed_rows)} filings could not be written to the database")
+            # Other workers crawl the filings again
+            if self.work_queue is not None:
+                try:
+                    self.work_queue.fail(list(self.failed_rows))
+                except Exception as e:
+                    logger.error(f"Failed to release {len(self.failed_rows)} filings in the work queue: {e}")
+            self.failed_rows = {}
+        if self.raw_store is not None:
+            self.raw_store.close()
+            self.raw_store = None
 
         end_timestamp = datetime.now()
         duration = end_timestamp - getattr(self, "start_timestamp", end_timestamp)
@@ -165,6 +180,8 @@ class SaveToJSONPipeline(Config):
                 "new_records_added_to_db": self.stats["new_records_added_to_db"],
                 "existing_records_updated": self.stats["existing_records_updated"],
                 "unique_keywords_found": list(self.stats["keywords_found"]),
+                "truncated_documents": self.stats["truncated_documents"],
+                "skipped_documents": self.stats["skipped_documents"],
                 "crawl_duration": fmt_duration,
             },
         }
@@ -172,45 +189,86 @@ class SaveToJSONPipeline(Config):
         with open(report_path, "w", encoding="utf-8") as f:
             json.dump(report_data, f, indent=4, ensure_ascii=False)
 
+    def _filing_row(self, record: dict, path_to_raw: str | None) -> dict:
+        """Build the database row of a buffered record."""
+        filing = record.get("metadata", {}).get("filing", {})
+        keyword = record.get("metadata", {}).get("keyword")
+        keywords = record.get("metadata", {}).get("keywords") or ([keyword] if keyword else [])
+        return {
+            "id": filing.get("id"),
+            "ciks": filing.get("ciks", []),
+            "ticker": filing.get("ticker", []),
+            "period_ending": filing.get("period_ending"),
+            "display_names": filing.get("display_names", []),
+            "root_forms": filing.get("root_forms", []),
+            "file_date": filing.get("file_date"),
+            "form": filing.get("form"),
+            "adsh": filing.get("adsh"),
+            "file_type": filing.get("file_type"),
+            "file_description": filing.get("file_description"),
+            "film_num": filing.get("film_num", []),
+            "keywords": list(keywords),
+            "path_to_raw": path_to_raw,
+            "url": record.get("url"),
+            "download_status": record.get("metadata", {}).get("download_status"),
+        }
+
     def _flush_buffer(self):
-        if not self.records:
+        """Write the buffered records to disk and upsert them into the database in one statement.
+
+        Rows of a failed write are kept and written again with the next flush, their filings are only
+        completed in the checkpoint and the work queue once they are stored.
+        """
+        if not self.records and not self.failed_rows:
             return
 
-        ts = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
-
-        # Extract filing_id from the single record (flush_every = 1)
-        filing_id = (
-            self.records[0]
-            .get("metadata", {})
-            .get("filing", {})
-            .get("id", uuid4().hex)  # fallback if missing
-        )
-        # Windows erlaubt keine : * ? " < > | / \ in Dateinamen.
-        # SEC filing IDs enthalten oft ":" als Trenner (z.B. "0001234-23-007377:doc.htm")
-        safe_id = str(filing_id).translate(str.maketrans(':*?"<>|/\\', '_________'))
-        fname = f"{safe_id}.json"
-
-        # Save raw json to file
-        if not self.db_only:
-            saved_path = self.json_root / fname
-            with open(saved_path, "w", encoding="utf-8") as f:
-                json.dump(self.records, f, ensure_ascii=False, indent=2)
-        else:
-            saved_path = "DRY_RUN - no file saved"
-
-        # Update the path_to_raw in the database since the file is now saved
-        if hasattr(self, 'db') and self.db is not None:
-            for record in self.records:
-                metadata = record.get("metadata", {})
-                filing = metadata.get("filing", {})
-                filing_id = filing.get("id")
-
-                if filing_id:
-                    try:
-                        self.db.update_path_to_raw(filing_id, str(saved_path.absolute()))
-                        logger.info(f"{filing_id} updated")
-                    except Exception as e:
-                        logger.warn(f"Failed to update path_to_raw for {filing_id}: {e}")
-                        pass
+        records, self.records = self.records, []
+        # Their raw records are already in the store
+        rows, self.failed_rows = self.failed_rows, {}
 
-        self.records = []
+        for record in records:
+            filing_id = record.get("metadata", {}).get("filing", {}).get("id")
+
+            # Save raw record to the store
+            path_to_raw = None
+            if self.raw_store is not None:
+                path_to_raw = self.raw_store.put(filing_id or uuid4().hex, [record])
+
+            if not filing_id:
+                continue
+
+            # The same filing may be buffered several times with different keywords
+            row = self._filing_row(record, path_to_raw)
+            if filing_id in rows:
+                merged = rows[filing_id]
+                merged["keywords"] += [kw for kw in row["keywords"] if kw not in merged["keywords"]]
+                merged["path_to_raw"] = path_to_raw or merged["path_to_raw"]
+            else:
+                rows[filing_id] = row
+
+        if self.raw_store is not None:
+            self.raw_store.flush()
+
+        if getattr(self, "db", None) is not None and rows:
+            try:
+                started = time.perf_counter()
+                inserted = self.db.add_filings_bulk(list(rows.values()))
+                if self.crawler_stats is not None:
+                    self.crawler_stats.inc_value("storage/db_rows", len(rows))
+                    self.crawler_stats.inc_value("storage/db_seconds", time.perf_counter() - started)
+                self.stats["new_records_added_to_db"] += inserted
+                self.stats["existing_records_updated"] += len(rows) - inserted
+                logger.info(f"{len(rows)} filings written to the database ({inserted} new)")
+            except Exception as e:
+                logger.error(f"Failed to write {len(rows)} filings to the database, retrying with the next flush: {e}")
+                self.failed_rows = rows
+                return
+
+        if self.checkpoint is not None and rows:
+            self.checkpoint.mark_completed(list(rows))
+        if self.work_queue is not None and rows:
+            try:
+                self.work_queue.complete(list(rows))
+            except Exception as e:
+                # The leases expire and the filings are crawled again
+                logger.error(f"Failed to complete {len(rows)} filings in the work queue: {e}")
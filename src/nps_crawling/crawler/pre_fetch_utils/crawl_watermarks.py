@@ -0,0 +1,96 @@
+"""High-water marks of incremental crawls, kept per query in a local SQLite file."""
+from __future__ import annotations
+
+import datetime
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from pathlib import Path
+
+from nps_crawling.config import Config
+from nps_crawling.crawler.pre_fetch_utils.filings import Filing
+from nps_crawling.crawler.pre_fetch_utils.sec_params import SecSearchParams
+
+logger = logging.getLogger(__name__)
+
+# Parameters that do not change which filings a query matches, only when they were filed.
+_DATE_FIELDS: tuple[str, ...] = ("from_date", "to_date", "date_range", "filing_limit")
+
+
+def query_key(params: SecSearchParams) -> str:
+    """Returns a key that changes whenever the query matches a different set of filings."""
+    data: dict = dict(next(iter(params.create_dict().values())))
+    for field in _DATE_FIELDS:
+        data.pop(field, None)
+    return hashlib.sha1(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()  # noqa: S324
+
+
+def latest_filing(filings: list[Filing]) -> tuple[str, str] | None:
+    """Returns ``(file_date, accession number)`` of the most recent of ``filings``."""
+    marks: list[tuple[str, str]] = [(filing.file_date, filing.adsh or "") for filing in filings if filing.file_date]
+    return max(marks, default=None)
+
+
+class CrawlWatermarks:
+    """Stores the newest ``file_date`` seen per query.
+
+    An incremental crawl narrows the date window of every query to filings filed on
+    or after its mark. The mark day itself is searched again, because filings of the
+    same day can be indexed after the previous run; they are filtered by the duplicate
+    lookup. Marks are only advanced for queries whose result set was fetched completely.
+    """
+
+    def __init__(self, path: Path | None = None):
+        """Initializes the store at ``path`` (default: ``crawl_state.sqlite`` of the active project)."""
+        self.path: Path = Path(path) if path is not None else Config.RAW_JSON_PATH_CRAWLER.parent / "crawl_state.sqlite"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS watermarks "
+                "(query_key TEXT PRIMARY KEY, query_id TEXT, file_date TEXT NOT NULL, "
+                "accession TEXT, updated_at REAL NOT NULL)",
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path)
+
+    def get(self, params: SecSearchParams) -> str | None:
+        """Returns the mark of the query, or None if it was never crawled incrementally."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT file_date FROM watermarks WHERE query_key = ?", (query_key(params),)).fetchone()
+        return row[0] if row else None
+
+    def narrow(self, params: SecSearchParams) -> bool:
+        """Restricts the date window of ``params`` to filings since its mark. Returns True if narrowed."""
+        mark: str | None = self.get(params)
+        if not mark or (params.from_date and params.from_date >= mark):
+            return False
+        if params.to_date and params.to_date < mark:
+            return False
+
+        logger.info(f"Incremental crawl of query {params.id}: searching filings since {mark}.")
+        params.from_date = mark
+        params.to_date = params.to_date or datetime.date.today().isoformat()
+        params.date_range = "custom"
+        return True
+
+    def advance(self, params: SecSearchParams, filings: list[Filing]) -> str | None:
+        """Moves the mark of the query to the newest of its ``filings``. Returns the new mark."""
+        latest: tuple[str, str] | None = latest_filing(filings)
+        if latest is None:
+            return self.get(params)
+
+        file_date, accession = latest
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO watermarks (query_key, query_id, file_date, accession, updated_at) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(query_key) DO UPDATE SET "
+                "query_id = excluded.query_id, accession = excluded.accession, "
+                "updated_at = excluded.updated_at, file_date = excluded.file_date "
+                "WHERE excluded.file_date >= watermarks.file_date",
+                (query_key(params), params.id, file_date, accession, time.time()),
+            )
+        return self.get(params)
@@ -0,0 +1,231 @@
+"""Streaming readers of locally downloaded EDGAR bulk data.
+
+Two sources are supported:
+
+- ``full-index`` quarterly ``master.idx`` files (plain or gzip compressed), e.g. from
+  ``https://www.sec.gov/Archives/edgar/full-index/2024/QTR1/master.idx``. Every line is
+  ``CIK|Company Name|Form Type|Date Filed|Filename``, the filing points to the complete
+  submission text file.
+- The ``submissions.zip`` bulk archive of ``https://www.sec.gov/Archives/edgar/daily-index/bulkdata/``
+  with one JSON document of company data and filings per CIK. Filings point to their primary document.
+
+Both are read line by line (respectively member by member), so archives of any size are
+filtered without loading them into memory. Bulk filings are not matched against a search
+keyword, their ``keywords`` are empty.
+"""
+from __future__ import annotations
+
+import datetime
+import functools
+import gzip
+import json
+import logging
+import os
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+from nps_crawling.crawler.pre_fetch_utils.filings import Filing, FilingsCategoryCollectionCoarse
+from nps_crawling.crawler.pre_fetch_utils.sec_params import SecSearchParams
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class BulkFilter:
+    """Forms, CIKs and filing dates of one query. Empty criteria match everything."""
+
+    forms: frozenset[str] = frozenset()
+    ciks: frozenset[str] = frozenset()
+    from_date: str = ""
+    to_date: str = ""
+
+    @classmethod
+    def from_params(cls, params: SecSearchParams) -> BulkFilter:
+        """Returns the filter of the forms, CIK and date range of the search ``params``."""
+        forms: list[str] = []
+        if params.filing_category not in (None, FilingsCategoryCollectionCoarse.ALL):
+            forms = [form.strip().upper() for form in params.filing_categories or []]
+        individual = params.individual_search
+        ciks: list[str] = [str(individual.cik).zfill(10)] if individual and individual.cik else []
+        return cls(forms=frozenset(forms),
+                   ciks=frozenset(ciks),
+                   from_date=params.from_date or "",
+                   to_date=params.to_date or "")
+
+    def matches(self, cik: str, form: str, file_date: str) -> bool:
+        """Returns True if a filing of ``cik`` with ``form`` filed on ``file_date`` matches."""
+        return ((not self.forms or form.upper() in self.forms)
+                and (not self.ciks or cik in self.ciks)
+                and (not self.from_date or file_date >= self.from_date)
+                and (not self.to_date or file_date <= self.to_date))
+
+
+def _matches(filters: list[BulkFilter], cik: str, form: str, file_date: str) -> bool:
+    return not filters or any(f.matches(cik, form, file_date) for f in filters)
+
+
+def _display_name(name: str, tickers: list[str], cik: str) -> str:
+    """Returns the display name in the format of the full-text search."""
+    ticker_part: str = f"  ({', '.join(tickers)})" if tickers else ""
+    return f"{name}{ticker_part}  (CIK {cik})"
+
+
+def _filing(cik: str, adsh: str, document: str, form: str, file_date: str, **fields) -> Filing:
+    return Filing(_id=f"{adsh}:{document}",
+                  _index="edgar_bulk",
+                  ciks=[cik],
+                  ticker=fields.get("ticker", []),
+                  period_ending=fields.get("period_ending") or None,
+                  file_num=fields.get("file_num", []),
+                  display_names=fields.get("display_names", []),
+                  xsl=None,
+                  sequence=None,
+                  root_forms=[form],
+                  file_date=file_date,
+                  biz_states=fields.get("biz_states", []),
+                  sics=fields.get("sics", []),
+                  form=form,
+                  adsh=adsh,
+                  film_num=fields.get("film_num", []),
+                  biz_locations=fields.get("biz_locations", []),
+                  file_type=form,
+                  file_description=fields.get("file_description", ""),
+                  inc_states=fields.get("inc_states", []),
+                  file_path_name=document,
+                  keyword="")
+
+
+def _open_text(path: Path):
+    if path.suffix == ".gz":
+        return gzip.open(path, "rt", encoding="latin-1")
+    return open(path, encoding="latin-1")  # noqa: SIM115
+
+
+def iter_full_index(path: Path, filters: list[BulkFilter] | None = None) -> Iterator[Filing]:
+    """Yields the filings of a ``master.idx`` file that match any of ``filters``."""
+    filters = filters or []
+    with _open_text(Path(path)) as f:
+        # Skip the header up to the dashed separator line
+        for line in f:
+            if line.startswith("-----"):
+                break
+        for line in f:
+            parts: list[str] = line.rstrip("\n").split("|")
+            if len(parts) != 5:
+                continue
+            cik, name, form, file_date, filename = parts
+            cik = cik.zfill(10)
+            if not _matches(filters, cik, form, file_date):
+                continue
+            adsh: str = os.path.splitext(os.path.basename(filename))[0]
+            yield _filing(cik, adsh, f"{adsh}.txt", form, file_date,
+                          display_names=[_display_name(name, [], cik)])
+
+
+def _recent_filings(data: dict) -> dict:
+    """Returns the columnar filings of a submissions document or of one of its overflow files."""
+    return data.get("filings", {}).get("recent", {}) if "filings" in data else data
+
+
+def iter_submissions(path: Path, filters: list[BulkFilter] | None = None) -> Iterator[Filing]:
+    """Yields the filings of a ``submissions.zip`` archive that match any of ``filters``."""
+    filters = filters or []
+    ciks: frozenset[str] = frozenset().union(*(f.ciks for f in filters)) \
+        if filters and all(f.ciks for f in filters) else frozenset()
+
+    with zipfile.ZipFile(path) as archive:
+        names: set[str] = set(archive.namelist())
+
+        @functools.lru_cache(maxsize=64)
+        def company(cik: str) -> dict:
+            # Overflow files (CIK##########-submissions-001.json) only hold filings
+            member: str = f"CIK{cik}.json"
+            return json.loads(archive.read(member)) if member in names else {}
+
+        for member in sorted(names):
+            if not member.startswith("CIK") or not member.endswith(".json"):
+                continue
+            cik: str = member[3:13]
+            if ciks and cik not in ciks:
+                continue
+
+            data: dict = json.loads(archive.read(member))
+            info: dict = data if "filings" in data else company(cik)
+            yield from _submission_filings(cik, info, _recent_filings(data), filters)
+
+
+def _submission_filings(cik: str, info: dict, recent: dict, filters: list[BulkFilter]) -> Iterator[Filing]:
+    name: str = info.get("name", "")
+    tickers: list[str] = info.get("tickers") or []
+    address: dict = (info.get("addresses") or {}).get("business") or {}
+    state: str = address.get("stateOrCountry") or ""
+    fields: dict = {
+        "ticker": tickers,
+        "display_names": [_display_name(name, tickers, cik)] if name else [],
+        "sics": [str(info["sic"])] if info.get("sic") else [],
+        "biz_states": [state] if state else [],
+        "biz_locations": [f"{address['city']}, {state}"] if address.get("city") else [],
+        "inc_states": [info["stateOfIncorporation"]] if info.get("stateOfIncorporation") else [],
+    }
+
+    accessions: list[str] = recent.get("accessionNumber", [])
+    columns: dict[str, list] = {key: recent.get(key) or [""] * len(accessions) for key in (
+        "filingDate", "reportDate", "form", "primaryDocument", "primaryDocDescription", "fileNumber", "filmNumber",
+    )}
+    for i, adsh in enumerate(accessions):
+        form: str = columns["form"][i]
+        file_date: str = columns["filingDate"][i]
+        if not _matches(filters, cik, form, file_date):
+            continue
+        document: str = columns["primaryDocument"][i] or f"{adsh}.txt"
+        yield _filing(cik, adsh, document, form, file_date,
+                      period_ending=columns["reportDate"][i],
+                      file_num=[columns["fileNumber"][i]] if columns["fileNumber"][i] else [],
+                      film_num=[columns["filmNumber"][i]] if columns["filmNumber"][i] else [],
+                      file_description=columns["primaryDocDescription"][i],
+                      **fields)
+
+
+def iter_bulk_filings(path: str | Path, filters: list[BulkFilter] | None = None) -> Iterator[Filing]:
+    """Yields the matching filings of EDGAR bulk data.
+
+    ``path`` is a ``submissions.zip`` archive, a ``master.idx`` file or a directory of such
+    files (e.g. a mirror of ``full-index``).
+    """
+    path = Path(path)
+    if path.is_dir():
+        files: list[Path] = sorted(p for p in path.rglob("*")
+                                   if p.name in ("master.idx", "master.idx.gz") or p.suffix == ".zip")
+    else:
+        files = [path]
+
+    started: datetime.datetime = datetime.datetime.now()
+    for file in files:
+        logger.info(f"Reading EDGAR bulk data from {file}")
+        if file.suffix == ".zip":
+            yield from iter_submissions(file, filters)
+        else:
+            yield from iter_full_index(file, filters)
+    logger.info(f"Read {len(files)} EDGAR bulk files in {datetime.datetime.now() - started}.")
+
+
+def filing_row(filing: Filing) -> dict:
+    """Returns the row of the filings table that holds the metadata of ``filing``."""
+    return {
+        "id": filing.id,
+        "ciks": filing.ciks,
+        "ticker": filing.ticker,
+        "period_ending": filing.period_ending,
+        "display_names": filing.display_names,
+        "root_forms": filing.root_forms,
+        "file_date": filing.file_date,
+        "form": filing.form,
+        "adsh": filing.adsh,
+        "file_type": filing.file_type,
+        "file_description": filing.file_description,
+        "film_num": filing.film_num,
+        "keywords": filing.keywords,
+        "url": filing.get_url()[0],
+    }
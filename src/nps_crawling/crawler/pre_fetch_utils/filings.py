@@ -1,11 +1,34 @@
 """Filings and type abstraction module with utility functions."""
 import os
+import sys
 from enum import Enum
 from typing import Optional
 
+from nps_crawling.config import Config
+
+
+def _intern(value):
+    """Interns strings so that values repeated across filings are stored once."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _intern_all(values: list | None) -> list:
+    return [sys.intern(value) if isinstance(value, str) else value for value in values or []]
+
 
 class Filing:
-    """Class abstraction for Filing elements."""
+    """Immutable record of a single filing document found by the full text search.
+
+    Filings are slotted and their repeated values (forms, states, SIC codes, ...) are
+    interned, since large prefetches keep tens of thousands of them in memory.
+    """
+
+    __slots__ = (
+        'id', '_index', 'ciks', 'ticker', 'period_ending', 'file_num', 'display_names', 'xsl',
+        'sequence', 'root_forms', 'file_date', 'biz_states', 'sics', 'form', 'adsh', 'film_num',
+        'biz_locations', 'file_type', 'file_description', 'inc_states', 'file_path_name',
+        'keyword', 'keywords', 'file_container_type',
+    )
 
     def __init__(self,
                  _id: str,
@@ -29,51 +52,96 @@ class Filing:
                  file_description: str,
                  inc_states: list[str],
                  file_path_name: str,
-                 keyword: str):
-        """Initialize the filing."""
-        self.id: str = _id
-        self._index: str = _index
-
-        self.ciks: list[str] = ciks
-        self.ticker: list[str] = ticker
-        self.period_ending: str = period_ending
-        self.file_num: list[str] = file_num
-        self.display_names: list[str] = display_names
-        self.xsl: str = xsl
-        self.sequence: str = sequence
-        self.root_forms: list[str] = root_forms
-        self.file_date: str = file_date
-        self.biz_states: list[str] = biz_states
-        self.sics: list[str] = sics
-        self.form: str = form
-        self.adsh: str = adsh
-        self.film_num: list[str] = film_num
-        self.biz_locations: list[str] = biz_locations
-        self.file_type: str = file_type
-        self.file_description: str = file_description
-        self.inc_states: list[str] = inc_states
-        self.file_path_name: str = file_path_name
-        self.keyword: str = keyword
+                 keyword: str,
+                 keywords: list[str] | None = None):
+        """Initialize the filing.
+
+        ``keyword`` is the search keyword that found the filing, ``keywords`` all search
+        keywords that found it (defaults to ``[keyword]``).
+        """
+        _set = object.__setattr__
+        _set(self, 'id', _id)
+        _set(self, '_index', _intern(_index))
+
+        _set(self, 'ciks', list(ciks or []))
+        _set(self, 'ticker', _intern_all(ticker))
+        _set(self, 'period_ending', _intern(period_ending))
+        _set(self, 'file_num', list(file_num or []))
+        _set(self, 'display_names', list(display_names or []))
+        _set(self, 'xsl', _intern(xsl))
+        _set(self, 'sequence', sequence)
+        _set(self, 'root_forms', _intern_all(root_forms))
+        _set(self, 'file_date', _intern(file_date))
+        _set(self, 'biz_states', _intern_all(biz_states))
+        _set(self, 'sics', _intern_all(sics))
+        _set(self, 'form', _intern(form))
+        _set(self, 'adsh', adsh)
+        _set(self, 'film_num', list(film_num or []))
+        _set(self, 'biz_locations', _intern_all(biz_locations))
+        _set(self, 'file_type', _intern(file_type))
+        _set(self, 'file_description', _intern(file_description))
+        _set(self, 'inc_states', _intern_all(inc_states))
+        _set(self, 'file_path_name', file_path_name)
+        _set(self, 'keyword', _intern(keyword))
+        _set(self, 'keywords', _intern_all(keywords) if keywords else ([_intern(keyword)] if keyword else []))
 
         # Store file type of the document (htm, pdf, ...)
-        self.file_container_type: str = os.path.splitext(self.file_path_name)[1].lstrip('.')
+        _set(self, 'file_container_type', sys.intern(os.path.splitext(file_path_name)[1].lstrip('.')))
+
+    def __setattr__(self, name, value):
+        """Rejects changes, filings are immutable."""
+        raise AttributeError(f"{type(self).__name__} is immutable, cannot set '{name}'")
+
+    def __delattr__(self, name):
+        """Rejects deletions, filings are immutable."""
+        raise AttributeError(f"{type(self).__name__} is immutable, cannot delete '{name}'")
+
+    def __reduce__(self):
+        """Pickles the filing as its constructor arguments."""
+        return Filing.from_state, (self.to_state(),)
 
     def get_url(self) -> list:
         """Returns a query list of the filing with all CIKS."""
         urls: list = []
+        # A local stand-in of EDGAR can replace sec.gov, e.g. for benchmarks
+        base: str = Config.CRAWL_SEC_BASE_URL or 'https://sec.gov'
         for cik in self.ciks:
-            urls.append(f'https://sec.gov/Archives/edgar/data/{cik}/{self.adsh.replace("-", "")}/{self.file_path_name}')
+            urls.append(f'{base}/Archives/edgar/data/{cik}/{self.adsh.replace("-", "")}/{self.file_path_name}')
 
         return urls
 
     def get_id(self) -> str:
+        """Returns the ID of the filing."""
         return self.id
 
     def __str__(self) -> str:
+        """Returns the ID, display names and search keyword of the filing."""
         return f"{self.id} - {self.display_names} - {self.keyword}"
 
-    def to_json(self) -> dict:
+    def to_dict(self) -> dict:
+        """Returns all attributes of the filing by name."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def to_state(self) -> dict:
+        """Returns all constructor arguments, so the filing can be restored with :meth:`from_state`."""
+        state: dict = {k: v for k, v in self.to_dict().items() if k not in ('id', 'file_container_type')}
+        state['_id'] = self.id
+        return state
+
+    @classmethod
+    def from_state(cls, state: dict) -> "Filing":
+        """Restores a filing from the output of :meth:`to_state`."""
+        return cls(**state)
 
+    def with_keywords(self, keywords: list[str]) -> "Filing":
+        """Returns a copy of the filing that was also found by the search ``keywords``."""
+        added: list[str] = [keyword for keyword in keywords if keyword not in self.keywords]
+        if not added:
+            return self
+        return Filing.from_state({**self.to_state(), 'keywords': self.keywords + added})
+
+    def to_json(self) -> dict:
+        """Returns the JSON-serializable metadata of the filing stored with its crawled records."""
         return {
             'id': str(self.id),              # ensure string
             'ciks': list(self.ciks),           # ensure list not set
@@ -88,10 +156,22 @@ class Filing:
             'file_date': str(self.file_date),
             'biz_locations': list(self.biz_locations),
             'sics': list(self.sics),
-            'keyword': str(self.keyword)
+            'keyword': str(self.keyword),
+            'keywords': list(self.keywords),
         }
 
 
+def merge_filings(filings: list[Filing]) -> list[Filing]:
+    """Drops duplicate filings by id, keeping the first one with the keywords of all duplicates."""
+    merged: dict[str, Filing] = {}
+    for filing in filings:
+        if filing.id in merged:
+            merged[filing.id] = merged[filing.id].with_keywords(filing.keywords)
+        else:
+            merged[filing.id] = filing
+    return list(merged.values())
+
+
 class FilingDateRange(Enum):
     """Enum class to abstract the filing date range."""
     CUSTOM = 'custom'
@@ -0,0 +1,135 @@
+"""Persistent cache of prefetched search results, one Parquet file per query."""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from nps_crawling.config import Config
+from nps_crawling.crawler.pre_fetch_utils.filings import Filing
+from nps_crawling.crawler.pre_fetch_utils.sec_params import SecSearchParams
+
+logger = logging.getLogger(__name__)
+
+# Filing fields stored as lists of strings, all other fields are stored as strings.
+_LIST_FIELDS: tuple[str, ...] = (
+    "ciks", "ticker", "file_num", "display_names", "root_forms", "biz_states",
+    "sics", "film_num", "biz_locations", "inc_states", "keywords",
+)
+_STRING_FIELDS: tuple[str, ...] = (
+    "_id", "_index", "period_ending", "xsl", "sequence", "file_date", "form", "adsh",
+    "file_type", "file_description", "file_path_name", "keyword",
+)
+
+
+def cache_key(params: SecSearchParams) -> str:
+    """Returns a stable key of everything that determines the search results of ``params``.
+
+    ``SecSearchParams.__hash__`` is salted per process, so it cannot key a persistent cache.
+    """
+    data: dict = dict(next(iter(params.create_dict().values())))
+    data["filing_limit"] = params.filing_limit
+    return hashlib.sha1(json.dumps(data, sort_keys=True, default=str).encode("utf-8")).hexdigest()  # noqa: S324
+
+
+@dataclass
+class CachedQuery:
+    """Filings of one query as they were returned by the search, before the duplicate lookup."""
+
+    filings: list[Filing]
+    results: int
+    complete: bool
+    created_at: float
+    truncated: bool = False
+
+
+class PrefetchCache:
+    """Stores the filings of every query as a Parquet file with a time to live."""
+
+    def __init__(self, root: Path | None = None, ttl_hours: float | None = None):
+        """Initializes the cache in ``root`` (default: ``prefetch_cache`` of the active project)."""
+        self.root: Path = Path(root) if root is not None else Config.RAW_JSON_PATH_CRAWLER.parent / "prefetch_cache"
+        self.ttl_seconds: float = 3600 * (Config.CRAWL_PREFETCH_CACHE_TTL_HOURS if ttl_hours is None else ttl_hours)
+
+    def _path(self, params: SecSearchParams) -> Path:
+        return self.root / f"{cache_key(params)}.parquet"
+
+    @staticmethod
+    def _schema():
+        import pyarrow as pa
+
+        return pa.schema(
+            [(name, pa.string()) for name in _STRING_FIELDS]
+            + [(name, pa.list_(pa.string())) for name in _LIST_FIELDS],
+        )
+
+    def get(self, params: SecSearchParams) -> CachedQuery | None:
+        """Returns the cached filings of ``params``, or None if missing, expired or not fully fetched."""
+        path: Path = self._path(params)
+        if self.ttl_seconds <= 0 or not path.exists():
+            return None
+
+        import pyarrow.parquet as pq
+
+        try:
+            table = pq.read_table(path)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable prefetch cache {path}: {e}")
+            return None
+
+        meta: dict = {k.decode(): v.decode() for k, v in (table.schema.metadata or {}).items()}
+        created_at: float = float(meta.get("created_at", 0))
+        if time.time() - created_at > self.ttl_seconds:
+            return None
+        complete: bool = meta.get("complete") == "1"
+        truncated: bool = meta.get("truncated") == "1"
+        # A failed page or shard would hide filings for the whole time to live
+        if not (complete or truncated):
+            return None
+
+        filings: list[Filing] = [Filing.from_state(row) for row in table.to_pylist()]
+        return CachedQuery(filings=filings,
+                           results=int(meta.get("results", len(filings))),
+                           complete=complete,
+                           created_at=created_at,
+                           truncated=truncated)
+
+    def put(self,
+            params: SecSearchParams,
+            filings: list[Filing],
+            results: int,
+            complete: bool,
+            truncated: bool = False) -> None:
+        """Stores the filings of ``params``.
+
+        Only fully fetched results are stored: ``complete`` ones and ones ``truncated`` at the
+        filing limit, which is part of the cache key. Failed or partial results are not stored.
+        """
+        if self.ttl_seconds <= 0 or not (complete or truncated):
+            return
+
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        rows: list[dict] = []
+        for filing in filings:
+            state: dict = filing.to_state()
+            row: dict = {name: None if state.get(name) is None else str(state[name]) for name in _STRING_FIELDS}
+            row.update({name: [str(value) for value in state.get(name) or []] for name in _LIST_FIELDS})
+            rows.append(row)
+
+        schema = self._schema().with_metadata({
+            "query_id": str(params.id),
+            "created_at": str(time.time()),
+            "results": str(results),
+            "complete": "1" if complete else "0",
+            "truncated": "1" if truncated else "0",
+        })
+        self.root.mkdir(parents=True, exist_ok=True)
+        path: Path = self._path(params)
+        tmp: Path = path.with_suffix(".tmp")
+        pq.write_table(pa.Table.from_pylist(rows, schema=schema), tmp, compression="zstd")
+        tmp.replace(path)
@@ -0,0 +1,146 @@
+"""Token bucket rate limiters shared by all requests to the SEC hosts."""
+from __future__ import annotations
+
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from nps_crawling.config import Config
+
+# Hosts covered by SEC's fair access budget of 10 requests per second.
+SEC_HOSTS: tuple[str, ...] = ("www.sec.gov", "efts.sec.gov", "data.sec.gov")
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting the number of requests per second."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        """Initializes the bucket with ``rate`` tokens per second and ``burst`` capacity."""
+        if rate <= 0:
+            raise ValueError(f"Rate must be positive, got {rate}")
+        self.rate: float = float(rate)
+        self.capacity: float = float(max(1, burst))
+        self._tokens: float = self.capacity
+        self._updated: float = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed: float = now - self._updated
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def reserve(self) -> float:
+        """Reserves one token and returns the seconds to wait before using it."""
+        with self._lock:
+            now: float = time.monotonic()
+            self._refill(now)
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self) -> None:
+        """Blocks until a token is available."""
+        delay: float = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class AdaptiveTokenBucket(TokenBucket):
+    """Token bucket that shrinks its rate when the server throttles and probes upward while healthy.
+
+    The rate is halved on every throttled response (multiplicative decrease) and grows by
+    about ``increase_step`` requests per second for every second of healthy responses
+    (additive increase), bounded by ``min_rate`` and ``max_rate``.
+    """
+
+    def __init__(self,
+                 rate: float,
+                 burst: int = 1,
+                 min_rate: float = 0.5,
+                 max_rate: float | None = None,
+                 decrease_factor: float = 0.5,
+                 increase_step: float = 0.5,
+                 cooldown: float = 5.0):
+        """Initializes the bucket with a start ``rate`` bounded by ``min_rate`` and ``max_rate``."""
+        super().__init__(rate=rate, burst=burst)
+        self.min_rate: float = min(float(min_rate), self.rate)
+        self.max_rate: float = float(max_rate) if max_rate is not None else self.rate
+        self.decrease_factor: float = decrease_factor
+        self.increase_step: float = increase_step
+        self.cooldown: float = cooldown
+        self._hold_until: float = 0.0
+
+    def throttle(self, retry_after: float | None = None) -> float:
+        """Shrinks the rate after a throttled response and returns the new rate.
+
+        When the server sent ``retry_after`` seconds, no token is handed out before then.
+        """
+        with self._lock:
+            now: float = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate * self.decrease_factor)
+            pause: float = max(0.0, retry_after or 0.0)
+            if pause > 0:
+                self._tokens = min(self._tokens, -pause * self.rate)
+            self._hold_until = now + max(self.cooldown, pause)
+            return self.rate
+
+    def set_max_rate(self, max_rate: float) -> None:
+        """Sets the upper bound of the rate, e.g. to this process's share of a budget.
+
+        The current rate, the lower bound and the burst capacity are limited to it.
+        """
+        if max_rate <= 0:
+            raise ValueError(f"Rate must be positive, got {max_rate}")
+        with self._lock:
+            self._refill(time.monotonic())
+            self.max_rate = float(max_rate)
+            self.rate = min(self.rate, self.max_rate)
+            self.min_rate = min(self.min_rate, self.max_rate)
+            self.capacity = float(max(1, int(self.max_rate)))
+            self._tokens = min(self._tokens, self.capacity)
+
+    def recover(self) -> float:
+        """Raises the rate a little after a healthy response and returns the new rate."""
+        with self._lock:
+            now: float = time.monotonic()
+            if now < self._hold_until or self.rate >= self.max_rate:
+                return self.rate
+            self._refill(now)
+            self.rate = min(self.max_rate, self.rate + self.increase_step / self.rate)
+            return self.rate
+
+
+def parse_retry_after(value: str | bytes | None) -> float | None:
+    """Returns the seconds to wait from a ``Retry-After`` header (seconds or HTTP date)."""
+    if not value:
+        return None
+    if isinstance(value, bytes):
+        value = value.decode("latin-1")
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+_sec_bucket: AdaptiveTokenBucket | None = None
+_sec_bucket_lock = threading.Lock()
+
+
+def sec_rate_limiter() -> AdaptiveTokenBucket:
+    """Returns the process-wide bucket shared by all requests to :data:`SEC_HOSTS`."""
+    global _sec_bucket
+    with _sec_bucket_lock:
+        if _sec_bucket is None:
+            max_rate: float = Config.CRAWL_SEC_REQUESTS_PER_SECOND
+            _sec_bucket = AdaptiveTokenBucket(rate=max_rate,
+                                              burst=max(1, int(max_rate)),
+                                              min_rate=Config.CRAWL_SEC_MIN_REQUESTS_PER_SECOND,
+                                              max_rate=max_rate)
+        return _sec_bucket
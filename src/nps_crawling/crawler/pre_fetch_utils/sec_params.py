@@ -179,7 +179,7 @@ class SecSearchParams:
         if self.from_date:
             query_url = f'{query_url}&startdt={self.from_date}'
 
-        if self.from_date:
+        if self.to_date:
             query_url = f'{query_url}&enddt={self.to_date}'
 
         if self.date_range:
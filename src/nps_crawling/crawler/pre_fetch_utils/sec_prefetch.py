@@ -0,0 +1,290 @@
+"""Asynchronous prefetch engine for the EDGAR full-text search."""
+from __future__ import annotations
+
+import asyncio
+import copy
+import datetime
+import logging
+import math
+import random
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+import requests
+
+from nps_crawling.config import Config
+from nps_crawling.crawler.pre_fetch_utils.rate_limiter import (
+    AdaptiveTokenBucket,
+    parse_retry_after,
+    sec_rate_limiter,
+)
+from nps_crawling.utils.event_bus import bus
+
+if TYPE_CHECKING:
+    from nps_crawling.crawler.pre_fetch_utils.sec_params import SecSearchParams
+    from nps_crawling.crawler.pre_fetch_utils.sec_query import SecQuery
+
+logger = logging.getLogger(__name__)
+
+# Number of hits EDGAR returns per search page.
+EDGAR_PAGE_SIZE: int = 100
+# EDGAR full-text search does not return hits beyond this offset.
+EDGAR_MAX_HITS: int = 10_000
+# First filing date covered by EDGAR full-text search.
+EDGAR_FIRST_DATE: datetime.date = datetime.date(2001, 1, 1)
+
+SEC_HEADERS: dict = {
+    'User-Agent': 'YourName your.email@example.com',
+}
+
+
+def hit_count(page: dict) -> int:
+    """Returns the total number of hits reported on a search page."""
+    return int(page['hits']['total']['value'])
+
+
+def is_over_ceiling(page: dict) -> bool:
+    """Returns True if the query of ``page`` matches more hits than EDGAR can page through."""
+    total: dict = page['hits']['total']
+    return total.get('relation', 'eq') != 'eq' or int(total['value']) > EDGAR_MAX_HITS
+
+
+def date_window(params: SecSearchParams) -> tuple[datetime.date, datetime.date]:
+    """Returns the date window searched by ``params``, open ends replaced by EDGAR's coverage."""
+    start: datetime.date = datetime.date.fromisoformat(params.from_date) if params.from_date else EDGAR_FIRST_DATE
+    end: datetime.date = datetime.date.fromisoformat(params.to_date) if params.to_date else datetime.date.today()
+    return start, end
+
+
+def shard_params(params: SecSearchParams, start: datetime.date, end: datetime.date) -> SecSearchParams:
+    """Returns a copy of ``params`` restricted to the dates from ``start`` to ``end``."""
+    shard: SecSearchParams = copy.copy(params)
+    shard.from_date = start.isoformat()
+    shard.to_date = end.isoformat()
+    shard.date_range = 'custom'
+    return shard
+
+
+def run_coroutine(coro):
+    """Runs ``coro`` to completion, also when called from a thread with a running event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    # The Twisted asyncio reactor already owns this thread's loop, so run in a fresh one.
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
+
+
+class SecPrefetcher:
+    """Fetches the search result pages of many queries concurrently.
+
+    Page 1 of every query is requested first to read the total hit count, the
+    remaining pages are then requested concurrently. Queries beyond the EDGAR hit
+    ceiling are split into date shards by bisecting their date window. All requests draw from one
+    token bucket, so the requests per second budget holds across all queries.
+    Throttled responses (429/503) shrink the rate of the bucket.
+    """
+
+    def __init__(self,
+                 requests_per_second: float = 5.0,
+                 max_concurrency: int = 8,
+                 max_retries: int = 5,
+                 backoff_base: float = 1.0,
+                 backoff_max: float = 30.0,
+                 request_timeout: float = 30.0,
+                 bucket: AdaptiveTokenBucket | None = None):
+        """Initializes the prefetcher."""
+        self.max_concurrency: int = max(1, max_concurrency)
+        self.max_retries: int = max_retries
+        self.backoff_base: float = backoff_base
+        self.backoff_max: float = backoff_max
+        self.request_timeout: float = request_timeout
+        self.bucket: AdaptiveTokenBucket = bucket or AdaptiveTokenBucket(rate=requests_per_second,
+                                                                         burst=max(1, int(requests_per_second)))
+
+    @classmethod
+    def from_config(cls) -> SecPrefetcher:
+        """Creates a prefetcher with the settings of the active project, sharing the SEC budget."""
+        return cls(bucket=sec_rate_limiter(),
+                   max_concurrency=Config.CRAWL_PREFETCH_MAX_CONCURRENCY,
+                   max_retries=Config.CRAWL_PREFETCH_MAX_RETRIES)
+
+    def prefetch(self, queries: list[SecQuery]) -> list[list[dict]]:
+        """Fetches all pages of all ``queries`` and returns the pages per query."""
+        return run_coroutine(self.prefetch_async(queries))
+
+    async def prefetch_async(self, queries: list[SecQuery]) -> list[list[dict]]:
+        """Asynchronous variant of :meth:`prefetch`."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        try:
+            return list(await asyncio.gather(
+                *(self._fetch_query(query, semaphore, executor) for query in queries),
+            ))
+        finally:
+            executor.shutdown(wait=False)
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Returns the exponential backoff delay with full jitter for ``attempt``."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))  # noqa: S311
+
+    def _request(self, url: str) -> dict:
+        response = requests.get(url, headers=SEC_HEADERS, timeout=self.request_timeout)
+        if response.status_code in (429, 503):
+            self.bucket.throttle(parse_retry_after(response.headers.get("Retry-After")))
+        response.raise_for_status()
+        self.bucket.recover()
+        data: dict = response.json()
+        # Reject payloads without hits, e.g. error messages from the server.
+        if 'hits' not in data.get('hits', {}):
+            raise ValueError(f"Received faulty response: {data}")
+        return data
+
+    async def _fetch_page(self,
+                          query: SecQuery,
+                          page: int,
+                          semaphore: asyncio.Semaphore,
+                          executor: ThreadPoolExecutor,
+                          params: SecSearchParams | None = None) -> dict | None:
+        """Fetches a single page, retrying with backoff. Returns None when giving up.
+
+        ``params`` replaces the parameters of ``query``, e.g. for a date shard.
+        """
+        loop = asyncio.get_running_loop()
+        url: str = (params or query.sec_params).create_query(page=page)
+
+        for attempt in range(self.max_retries + 1):
+            if query.stop_querying:
+                return None
+
+            async with semaphore:
+                await asyncio.sleep(self.bucket.reserve())
+                try:
+                    data: dict = await loop.run_in_executor(executor, self._request, url)
+                    if attempt > 0:
+                        logger.info(f"Page {page} took {attempt} retries to get processed.")
+                    return data
+                except Exception as e:
+                    logger.error(f"Failed to fetch page {page} of query {query.sec_params.id}: {e}")
+
+            if attempt < self.max_retries:
+                delay: float = self.backoff_delay(attempt)
+                logger.info(f"Restarting fetch of page {page} in {delay:.1f} seconds.")
+                await asyncio.sleep(delay)
+
+        logger.error(f"Unable to fetch page {page} after {self.max_retries} retries, continuing without it.")
+        return None
+
+    async def _shard(self,
+                     query: SecQuery,
+                     params: SecSearchParams,
+                     first: dict,
+                     semaphore: asyncio.Semaphore,
+                     executor: ThreadPoolExecutor) -> list[tuple[SecSearchParams, dict | None]]:
+        """Bisects the date window of ``params`` until every shard is below the EDGAR hit ceiling.
+
+        Returns the shards with their first page, oldest first. The first page is None if
+        the shard could not be probed. Shards that cannot be split further (a single day)
+        are returned as they are.
+        """
+        if first is None or not is_over_ceiling(first):
+            return [(params, first)]
+
+        start, end = date_window(params)
+        if start >= end:
+            logger.warning(f"Query {query.sec_params.id} has more than {EDGAR_MAX_HITS} hits on {start}, "
+                           f"only the first {EDGAR_MAX_HITS} are fetched.")
+            return [(params, first)]
+
+        middle: datetime.date = start + (end - start) // 2
+        halves: list[SecSearchParams] = [
+            shard_params(params, start, middle),
+            shard_params(params, middle + datetime.timedelta(days=1), end),
+        ]
+        probes: list[dict | None] = list(await asyncio.gather(
+            *(self._fetch_page(query, 1, semaphore, executor, params=half) for half in halves),
+        ))
+
+        shards: list[list[tuple[SecSearchParams, dict | None]]] = list(await asyncio.gather(
+            *(self._shard(query, half, probe, semaphore, executor) for half, probe in zip(halves, probes)),
+        ))
+        return [shard for part in shards for shard in part]
+
+    async def _fetch_query(self,
+                           query: SecQuery,
+                           semaphore: asyncio.Semaphore,
+                           executor: ThreadPoolExecutor) -> list[dict]:
+        """Fetches all pages of one query, split into date shards if it exceeds the EDGAR hit ceiling."""
+        limit: int = query.sec_params.filing_limit if query.sec_params.filing_limit >= 0 else sys.maxsize
+
+        first: dict | None = await self._fetch_page(query, 1, semaphore, executor)
+        if first is None:
+            return []
+
+        shards: list[tuple[SecSearchParams, dict]] = [(query.sec_params, first)]
+        shard_failed: bool = False
+        if is_over_ceiling(first):
+            if limit > EDGAR_MAX_HITS:
+                probed = await self._shard(query, query.sec_params, first, semaphore, executor)
+                shards = [(params, shard_first) for params, shard_first in probed if shard_first is not None]
+                shard_failed = len(shards) < len(probed)
+                logger.info(f"Split query {query.sec_params.id} into {len(shards)} date shards.")
+            else:
+                logger.warning(f"Query {query.sec_params.id} has more than {EDGAR_MAX_HITS} hits. "
+                               f"Raise sec_query_limit_count to fetch all of them in date shards.")
+
+        # Newest shards first, so a limit keeps the most recent filings.
+        shards.reverse()
+        query.results = sum(hit_count(shard_first) for _, shard_first in shards)
+
+        # Pages to fetch per shard
+        plan: list[tuple[SecSearchParams, dict, int]] = []
+        remaining: int = limit
+        for params, shard_first in shards:
+            if remaining <= 0:
+                break
+            wanted: int = min(hit_count(shard_first), remaining, EDGAR_MAX_HITS)
+            plan.append((params, shard_first, max(1, math.ceil(wanted / EDGAR_PAGE_SIZE))))
+            remaining -= wanted
+
+        page_count: int = sum(count for _, _, count in plan)
+        logger.info(f"Total Results for {query.sec_params.keyword}: {query.results} in {page_count} pages")
+
+        done: int = len(plan)
+        bus.publish('paging.info', done, page_count)
+
+        async def fetch_and_report(params: SecSearchParams, page: int) -> dict | None:
+            nonlocal done
+            data = await self._fetch_page(query, page, semaphore, executor, params=params)
+            done += 1
+            bus.publish('paging.info', done, page_count)
+            return data
+
+        rest: list[dict | None] = list(await asyncio.gather(
+            *(fetch_and_report(params, page) for params, _, count in plan for page in range(2, count + 1)),
+        ))
+
+        fetched: list[dict | None] = [shard_first for _, shard_first, _ in plan] + rest
+        pages: list[dict] = [page for page in fetched if page is not None]
+        # EDGAR reports "gte" once a query (or shard) matches more hits than it can page through.
+        truncated: bool = any(is_over_ceiling(shard_first) for _, shard_first in shards) or query.results > limit
+        fetched: bool = len(pages) == page_count and not shard_failed and not query.stop_querying
+        query.complete = fetched and not truncated
+        query.truncated = fetched and truncated
+        if len(pages) < page_count:
+            logger.warning(f"Query {query.sec_params.id} returned partial results: "
+                           f"{len(pages)} of {page_count} pages.")
+
+        # Drop hits returned by more than one shard and trim hits beyond the configured limit.
+        seen: set[str] = set()
+        remaining = limit
+        for page in pages:
+            hits: list = [hit for hit in page['hits']['hits'] if hit.get('_id') not in seen]
+            seen.update(hit.get('_id') for hit in hits)
+            page['hits']['hits'] = hits[:max(0, remaining)]
+            remaining -= len(page['hits']['hits'])
+
+        return pages
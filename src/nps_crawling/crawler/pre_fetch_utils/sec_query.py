@@ -1,14 +1,13 @@
 """SEC Query abstraction module with utility functions."""
 import logging
-import sys
-import time
-import math
 import requests
 
 from nps_crawling.db.db_adapter import DbAdapter
 from nps_crawling.crawler.pre_fetch_utils.filings import Filing
+from nps_crawling.crawler.pre_fetch_utils.rate_limiter import sec_rate_limiter
 from nps_crawling.crawler.pre_fetch_utils.sec_params import SecSearchParams
-from nps_crawling.crawler.pre_fetch_utils.sec_ticker_map import SecTickerMap
+from nps_crawling.crawler.pre_fetch_utils.sec_prefetch import SEC_HEADERS, SecPrefetcher
+from nps_crawling.crawler.pre_fetch_utils.sec_ticker_map import tickers_from_display_names
 from nps_crawling.utils.event_bus import bus
 
 logger = logging.getLogger(__name__)
@@ -25,11 +24,22 @@ def get_fetched_filings_count(data: dict) -> int:
 
 class SecQuery:
     """Class to create SecQuery object."""
-    def __init__(self, sec_params: SecSearchParams):
-        """Initializes SecQuery object."""
+    def __init__(self, sec_params: SecSearchParams, db: DbAdapter | None = None):
+        """Initializes SecQuery object.
+
+        Args:
+            sec_params: Search parameters of the query.
+            db: Database adapter used for the duplicate lookup. Created on first use when not given.
+        """
         self.sec_params = sec_params
+        self.db: DbAdapter | None = db
         self.results = -1
         self.keyword_filings = []
+        # Set by the prefetch when every hit of the query was fetched
+        self.complete: bool = False
+        # Set by the prefetch when every page up to the filing limit was fetched, but the
+        # search matched more filings than the limit or EDGAR's hit ceiling
+        self.truncated: bool = False
 
         self.stop_querying: bool = False
 
@@ -40,49 +50,61 @@ class SecQuery:
 
     def query_request(self, page: int) -> dict:
         """Queries the requested filings page."""
-        headers = {
-            'User-Agent': 'YourName your.email@example.com',
-        }
-
         query = self.sec_params.create_query(page=page)
-        response = requests.get(query, headers=headers)
+        sec_rate_limiter().acquire()
+        response = requests.get(query, headers=SEC_HEADERS)
 
         return response.json()
 
-    def fetch_filings(self) -> list[Filing]:
-        """Starts the fetching process."""
-        queries: list = self.query_multi_request()
-        self.keyword_filings: list[Filing] = self.create_filings(queries)
+    def fetch_filings(self, pages: list[dict] | None = None, filings: list[Filing] | None = None) -> list[Filing]:
+        """Starts the fetching process.
+
+        Args:
+            pages: Already prefetched search result pages. Queried when not given.
+            filings: Filings already created from the search results, e.g. from the prefetch cache.
+        """
+        if filings is None:
+            queries: list = self.query_multi_request() if pages is None else pages
+            filings = self.create_filings(queries)
+        self.keyword_filings: list[Filing] = filings
 
         self.keyword_filings = self.are_filings_present_in_db(filings=self.keyword_filings,
                                                               bypass_filter=self.sec_params.force_crawl)
 
         return self.keyword_filings
 
+    def _get_db(self) -> DbAdapter:
+        if self.db is None:
+            self.db = DbAdapter()
+        return self.db
+
     def are_filings_present_in_db(self, filings: list[Filing], bypass_filter: bool = False) -> list[Filing]:
         temp: list[Filing] = []
         duplicates: list[Filing] = []
         try:
-            db: DbAdapter = DbAdapter()
+            db: DbAdapter = self._get_db()
+
+            # Keywords are only recorded for filings that are filtered out as duplicates.
+            keywords: dict[str, str] | None = None
+            if not bypass_filter:
+                keywords = {filing.get_id(): filing.keyword for filing in filings}
+            existing: set[str] = db.get_existing_filing_ids([filing.get_id() for filing in filings],
+                                                            keywords=keywords)
 
             for filing in filings:
-                if not db.filing_exists(filing.get_id()):
+                if filing.get_id() not in existing:
                     temp.append(filing)
                     logger.debug(f"Filing with ID {filing.get_id()} does not exists in DB")
                 elif bypass_filter:
                     temp.append(filing)
                 else:
-                    db.add_keyword(filing.id, filing.keyword)
                     logger.debug(f"Filing with ID {filing.get_id()} does exists in DB")
                     duplicates.append(filing)
-                    pass
 
             bus.publish("crawler.duplicates", duplicates)
 
             old_length: int = len(filings)
-            filings.clear()
-            filings = temp
-            new_length: int = len(filings)
+            new_length: int = len(temp)
             logger.info(f"\n\tNew size: {new_length} {'-' * 3} Old size: {old_length}")
             return temp
 
@@ -95,77 +117,14 @@ class SecQuery:
 
     def query_multi_request(self) -> list:
         """Queries the requested filings across all pages."""
-        total: int = -1
-        limit: int = self.sec_params.filing_limit if self.sec_params.filing_limit >= 0 else sys.maxsize
-        page: int = 1
-        queries: list = []
-
-        timeout: int = 5
-        maximum_retries: int = 10
-        retries: int = 0
-
-        while True:
-            if self.stop_querying:
-                return []
-
-            if retries > maximum_retries:
-                logger.error(f"Unable to fetch filings after {retries} retries!")
-                exit(-1)
-
-            response: dict = {}
-            # Catch any bad response from server and retry again for 10 times until it either works.
-            # If after 10 tries it does not work, maybe your internet is the issue.
-            try:
-                response = self.query_request(page=page)
-                # Set total results of the query on first query
-                if self.results == -1:
-                    self.results = get_total_filings_count(response)
-                    total = self.results
-                    print(f'Total Results: {total}')
-
-                hits: list[str] = response['hits']['hits']
-            except Exception as e:
-                logger.error(e)
-                logger.error(f"Received faulty response: {response}.")
-                logger.info(f"Restarting fetch in {timeout} seconds.")
-                retries += 1
-                time.sleep(timeout)
-                continue
-
-            # Give info about retries
-            if retries > 0:
-                logger.info(f"Filings took {retries} to get processed.")
-
-            retries = 0
-            query = len(hits)
-
-            logger.info(f'Iterating through page: {page}')
-            bus.publish('paging.info', page, math.ceil(total / 100))
-
-            if limit < query:
-                response['hits']['hits'] = hits[:limit]
-                queries.append(response)
-                break
-            else:
-                queries.append(response)
-
-            limit -= query
-            total -= query
-
-            if total <= 0 or limit <= 0:
-                break
-            page += 1
-
-        return queries
-
-    def create_filing(self, data: dict) -> Filing:
+        if self.stop_querying:
+            return []
+        return SecPrefetcher.from_config().prefetch([self])[0]
+
+    def create_filing(self, data: dict, keyword: str | None = None) -> Filing:
         """Helper function to create Filing object based on JSON payload."""
         # Main data payload containing filing details
         _source = data['_source']
-        # Unique filing identifier from source
-        _id = data['_id']
-        # Elasticsearch index name, same for all entries
-        _index = data['_index']
 
         # Unique ID given by website
         _id: str = data['_id']
@@ -209,9 +168,8 @@ class SecQuery:
         # Get file name from path
         file_name_path = _id.split(':', 1)[1]
 
-        # Get ticker
-        mapper = SecTickerMap()
-        ticker: list[str] = mapper.get_tickers_from_strings(display_names)
+        # Get ticker, display names repeat across filings so the lookup is cached
+        ticker: list[str] = tickers_from_display_names(display_names)
 
         filing = Filing(_id=_id,
                         _index=_index,
@@ -234,7 +192,7 @@ class SecQuery:
                         file_description=file_description,
                         inc_states=inc_states,
                         file_path_name=file_name_path,
-                        keyword=self.sec_params.keyword,
+                        keyword=self.sec_params.keyword if keyword is None else keyword,
         )
 
         return filing
@@ -250,9 +208,11 @@ class SecQuery:
     def create_filings(self, data: list) -> list[Filing]:
         """Create list of filings based on JSON payload."""
         filings: list = []
+        keyword: str = self.sec_params.keyword
 
+        # Build the filings of a page in one pass, sharing the lookups between its hits
+        create_filing = self.create_filing
         for page in data:
-            for entry in page['hits']['hits']:
-                filings.append(self.create_filing(entry))
+            filings.extend([create_filing(entry, keyword) for entry in page['hits']['hits']])
 
         return filings
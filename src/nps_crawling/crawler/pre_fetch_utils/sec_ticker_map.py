@@ -1,54 +1,140 @@
+import functools
+import logging
 import re
+import sqlite3
+import sys
+import time
+from pathlib import Path
 
 import requests
 from nps_crawling.config import Config
+from nps_crawling.crawler.pre_fetch_utils.rate_limiter import sec_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+COMPANY_TICKERS_URL: str = "https://www.sec.gov/files/company_tickers.json"
+
+# Display names look like "Apple Inc. (AAPL) (CIK 0000320193)"
+_DISPLAY_NAME_TICKERS = re.compile(r'\(([A-Z,\s-]+)\)\s+\(CIK')
+
+
+@functools.lru_cache(maxsize=65536)
+def tickers_from_display_name(text: str) -> tuple[str, ...]:
+    """Extract all tickers from a display name, cached since companies file many documents."""
+    match = _DISPLAY_NAME_TICKERS.search(text)
+    if not match:
+        return ()
+    return tuple(sys.intern(t.strip()) for t in match.group(1).split(","))
+
+
+def tickers_from_display_names(texts: list[str]) -> list[str]:
+    """Extract all tickers from multiple display names."""
+    return [ticker for text in texts for ticker in tickers_from_display_name(text)]
 
 
 class SecTickerMap:
+    """CIK to ticker mapping backed by a local SQLite copy of ``company_tickers.json``.
+
+    The mapping is loaded on first access. The cached copy is used as long as it is
+    younger than ``Config.CRAWL_TICKER_CACHE_TTL_HOURS``, afterwards it is refreshed
+    with a conditional request. In offline mode the network is never touched.
+    """
     _instance = None
-    _data: dict = {}
-    _fuzzy_data: list[tuple[str, str, str]] = []
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
-            cls._instance._load() # TODO: Replace somehow, may slow down startup time
+            cls._instance._data = None
+            cls._instance._fuzzy_data = None
         return cls._instance
 
+    @staticmethod
+    def cache_path() -> Path:
+        """Returns the path of the SQLite ticker cache."""
+        return Config.DATA_PATH / "cache" / "company_tickers.sqlite"
+
+    def _connect(self) -> sqlite3.Connection:
+        path = self.cache_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE IF NOT EXISTS tickers (cik TEXT NOT NULL, ticker TEXT NOT NULL, title TEXT)")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        return conn
+
+    def _ensure_loaded(self) -> None:
+        if self._data is None:
+            self._load()
+
     def _load(self):
+        with self._connect() as conn:
+            meta: dict[str, str] = dict(conn.execute("SELECT key, value FROM meta").fetchall())
+            fetched_at: float = float(meta.get("fetched_at", 0))
+            age_hours: float = (time.time() - fetched_at) / 3600
+
+            if not Config.CRAWL_OFFLINE and age_hours >= Config.CRAWL_TICKER_CACHE_TTL_HOURS:
+                try:
+                    self._refresh(conn, meta)
+                except requests.RequestException as e:
+                    logger.warning(f"Unable to refresh ticker cache, using cached copy: {e}")
+
+            rows: list[tuple[str, str, str]] = conn.execute(
+                "SELECT cik, ticker, title FROM tickers ORDER BY rowid",
+            ).fetchall()
+        conn.close()
+
+        if not rows:
+            logger.warning("Ticker cache is empty, ticker lookups will not return results.")
+        self._fuzzy_data = rows
+        self._data = {cik: ticker for cik, ticker, _ in rows}
+
+    def _refresh(self, conn: sqlite3.Connection, meta: dict[str, str]) -> None:
+        """Downloads ``company_tickers.json`` unless the server reports it as unchanged."""
         headers = {
             "User-Agent": "your-app-name contact@youremail.com",
         }
-        response = requests.get(
-            "https://www.sec.gov/files/company_tickers.json",
-            headers=headers,
-        )
-        response.raise_for_status()
-        self._data = {
-            str(v["cik_str"]).zfill(10): v["ticker"]
-            for v in response.json().values()
-        }
-        for v in response.json().values():
-            self._fuzzy_data.append((str(v["cik_str"]).zfill(10), v["ticker"], v["title"]))
-            
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+        sec_rate_limiter().acquire()
+        url: str = f"{Config.CRAWL_SEC_BASE_URL}/files/company_tickers.json" if Config.CRAWL_SEC_BASE_URL \
+            else COMPANY_TICKERS_URL
+        response = requests.get(url, headers=headers, timeout=30)
+        if response.status_code == 304:
+            logger.info("Ticker cache is up to date.")
+        else:
+            response.raise_for_status()
+            rows = [
+                (str(v["cik_str"]).zfill(10), v["ticker"], v["title"])
+                for v in response.json().values()
+            ]
+            conn.execute("DELETE FROM tickers")
+            conn.executemany("INSERT INTO tickers (cik, ticker, title) VALUES (?, ?, ?)", rows)
+            conn.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                [
+                    ("etag", response.headers.get("ETag", "")),
+                    ("last_modified", response.headers.get("Last-Modified", "")),
+                ],
+            )
+            logger.info(f"Ticker cache refreshed with {len(rows)} entries.")
+
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('fetched_at', ?)", (str(time.time()),))
 
     def get_ticker(self, cik: str) -> str | None:
+        self._ensure_loaded()
         cik = cik.zfill(10)
         return self._data.get(cik)
 
     def get_tickers_from_string(self, text: str) -> list[str]:
         """Extract all tickers from the display string."""
-        match = re.search(r'\(([A-Z,\s-]+)\)\s+\(CIK', text)
-        if not match:
-            return []
-        return [t.strip() for t in match.group(1).split(",")]
+        return list(tickers_from_display_name(text))
 
     def get_tickers_from_strings(self, text: list[str]) -> list[str]:
         """Extract all tickers from multiple display string."""
-        ticker: list[str] = []
-        for t in text:
-            ticker.extend(self.get_tickers_from_string(t))
-        return ticker
+        return tickers_from_display_names(text)
 
     def get_fuzzy_data(self) -> list[tuple[str, str, str]]:
-        return self._fuzzy_data
\ No newline at end of file
+        self._ensure_loaded()
+        return self._fuzzy_data
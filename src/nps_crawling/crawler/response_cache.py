@@ -0,0 +1,107 @@
+"""Content-addressed local cache of downloaded SEC archive documents.
+
+Documents below ``Archives/edgar/data`` never change once published, so a downloaded
+body can be replayed by every later crawl, also by crawls of other projects. Bodies are
+stored once per content hash as zlib-compressed blobs, and a SQLite index maps every
+URL to the hash, status and headers of its response.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import urlparse
+
+from nps_crawling.config import Config
+
+
+def normalize_url(url: str) -> str:
+    """Returns ``url`` without scheme and fragment, so http/https and sec.gov/www.sec.gov share entries."""
+    parsed = urlparse(url)
+    host: str = (parsed.hostname or "").removeprefix("www.")
+    return f"{host}{parsed.path}" + (f"?{parsed.query}" if parsed.query else "")
+
+
+def is_archive_url(url: str) -> bool:
+    """Returns True for immutable documents of the EDGAR archive."""
+    parsed = urlparse(url)
+    return (parsed.hostname or "").removeprefix("www.") == "sec.gov" \
+        and parsed.path.startswith("/Archives/edgar/data/")
+
+
+@dataclass
+class CachedResponse:
+    """Response of a cached URL."""
+
+    url: str
+    status: int
+    headers: dict[str, list[str]]
+    body: bytes
+
+
+class ResponseCache:
+    """Stores response bodies by content hash and indexes them by URL."""
+
+    def __init__(self, root: Path | None = None, compression_level: int = 6):
+        """Initializes the cache below ``root`` (default: ``cache/responses`` of the data directory)."""
+        self.root: Path = Path(root) if root is not None else Config.DATA_PATH / "cache" / "responses"
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.compression_level: int = compression_level
+
+        self._index = sqlite3.connect(self.root / "index.sqlite")
+        self._index.execute("PRAGMA journal_mode=WAL")
+        self._index.execute("PRAGMA synchronous=NORMAL")
+        self._index.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(url TEXT PRIMARY KEY, digest TEXT NOT NULL, status INTEGER NOT NULL, "
+            "headers TEXT NOT NULL, size INTEGER NOT NULL, stored_at REAL NOT NULL)",
+        )
+        self._index.commit()
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.root / "blobs" / digest[:2] / f"{digest}.z"
+
+    def get(self, url: str) -> CachedResponse | None:
+        """Returns the cached response of ``url``, or None if it was never stored."""
+        row = self._index.execute(
+            "SELECT digest, status, headers FROM responses WHERE url = ?", (normalize_url(url),),
+        ).fetchone()
+        if row is None:
+            return None
+
+        digest, status, headers = row
+        try:
+            body: bytes = zlib.decompress(self._blob_path(digest).read_bytes())
+        except (OSError, zlib.error):
+            return None
+        return CachedResponse(url=url, status=status, headers=json.loads(headers), body=body)
+
+    def put(self, url: str, status: int, headers: dict[str, list[str]], body: bytes) -> str:
+        """Stores a response and returns the content hash of its body."""
+        digest: str = hashlib.sha256(body).hexdigest()
+        path: Path = self._blob_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp: Path = path.with_suffix(".tmp")
+            tmp.write_bytes(zlib.compress(body, self.compression_level))
+            tmp.replace(path)
+
+        self._index.execute(
+            "INSERT OR REPLACE INTO responses (url, digest, status, headers, size, stored_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (normalize_url(url), digest, status, json.dumps(headers), len(body), time.time()),
+        )
+        self._index.commit()
+        return digest
+
+    def __len__(self) -> int:
+        """Returns the number of cached responses."""
+        return self._index.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self) -> None:
+        """Releases the index."""
+        self._index.close()
@@ -7,6 +7,7 @@ NPS-Crawling project.
 import os
 
 from nps_crawling.config import Config
+from nps_crawling.crawler.pre_fetch_utils.rate_limiter import SEC_HOSTS
 
 BOT_NAME = "crawler"
 SPIDER_MODULES = ["nps_crawling.crawler.spiders"]
@@ -24,12 +25,39 @@ ITEM_PIPELINES = {
     'nps_crawling.crawler.pipelines.storage.SaveToJSONPipeline': 500,
 }
 
-DOWNLOAD_DELAY = .2  # Limit so SEC doesn't explode and API bans
+DOWNLOAD_DELAY = 0  # Pacing of the SEC hosts is done by SecRateLimitMiddleware
+
+DOWNLOADER_MIDDLEWARES = {
+    'nps_crawling.crawler.middlewares.ArchiveResponseCacheMiddleware': 555,  # Cache hits skip the rate limit
+    'nps_crawling.crawler.middlewares.SecRateLimitMiddleware': 560,  # Before RetryMiddleware sees throttled responses
+}
+
+# Shared token bucket for SEC's fair access budget, see pre_fetch_utils/rate_limiter.py
+SEC_RATE_LIMIT_ENABLED = True
+SEC_RATE_LIMIT_HOSTS = list(SEC_HOSTS)
+SEC_RATE_LIMIT_THROTTLE_CODES = [429, 503]
+SEC_RATE_LIMIT_MAX_RATE = 0  # Requests per second of this process, 0: CRAWL_SEC_REQUESTS_PER_SECOND
+
+# Local cache of SEC archive documents, replay-only never downloads documents
+RESPONSE_CACHE_ENABLED = Config.CRAWL_RESPONSE_CACHE
+RESPONSE_CACHE_DIR = None  # Default: cache/responses of the data directory
+RESPONSE_CACHE_REPLAY_ONLY = Config.CRAWL_OFFLINE
 
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SEC_QUERY_FILE_PATH = os.path.join(PROJECT_ROOT, 'queries', 'query.json')
 
 SEC_QUERY_LIMIT_COUNT = Config.CRAWL_SEC_QUERY_LIMIT_COUNT
 
+# Write-behind buffer of the storage pipeline: flush after N items or T seconds
+CRAWL_DB_FLUSH_ITEMS = Config.CRAWL_DB_FLUSH_ITEMS
+CRAWL_DB_FLUSH_SECONDS = Config.CRAWL_DB_FLUSH_SECONDS
+
+# Record dispatched/completed filings so an interrupted crawl can be resumed
+CRAWL_CHECKPOINT_ENABLED = True
+CRAWL_QUEUE_POLL_SECONDS = 5.0  # Wait between claims while other workers hold all queued filings
+
+# Larger documents are logged, per container type budgets are set per request by the spider
+DOWNLOAD_WARNSIZE = Config.CRAWL_DOWNLOAD_WARN_BYTES
+
 STATS_DUMP = True
 JOB_DIR = 'crawls/sec_filings_spider'
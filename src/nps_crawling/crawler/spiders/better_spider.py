@@ -1,12 +1,22 @@
 """Improved Spider to crawl SEC filings for NPS mentions based on parameters and SEC search function."""
-from typing import Any, AsyncIterator, Iterable
+import time
+import weakref
+from typing import Any, AsyncIterator
 from typing_extensions import Self
 
 import scrapy
 from scrapy.crawler import Crawler
 from scrapy import signals
-from scrapy.exceptions import CloseSpider
+from scrapy.exceptions import CloseSpider, StopDownload
+from scrapy.utils.defer import maybe_deferred_to_future
+from twisted.internet import reactor, task, threads
+from twisted.internet.defer import CancelledError
+from twisted.python.failure import Failure
 
+from nps_crawling.config import Config
+
+from nps_crawling.crawler.crawl_checkpoint import CrawlCheckpoint
+from nps_crawling.crawler.crawl_queue import CrawlQueue
 from nps_crawling.crawler.pattern_factory.processing_factory import ProcessingFactory
 from nps_crawling.crawler.items import FilingItem
 from nps_crawling.crawler.pre_fetch_utils.filings import Filing
@@ -18,16 +28,33 @@ class BetterSpider(scrapy.Spider):
 
     def __init__(self,
                  filings: list[Filing] = [],
+                 checkpoint: CrawlCheckpoint | None = None,
+                 work_queue: CrawlQueue | None = None,
                  *args,
                  **kwargs):
-        """Initializes spider."""
+        """Initializes spider.
+
+        Args:
+            filings: Filings to crawl.
+            checkpoint: Checkpoint of dispatched and completed filings. Created from the
+                ``CRAWL_CHECKPOINT_ENABLED`` setting when not given.
+            work_queue: Shared work queue. When given, the spider runs as a worker that claims
+                its filings from the queue until it is drained, instead of crawling ``filings``.
+            *args: Positional arguments of ``scrapy.Spider``.
+            **kwargs: Keyword arguments of ``scrapy.Spider``.
+        """
 
         super().__init__(*args, **kwargs)
 
         self.logger.info("Initializes spider.")
 
         self.filings: list[Filing] = filings
+        self.checkpoint: CrawlCheckpoint | None = checkpoint
+        self.work_queue: CrawlQueue | None = work_queue
+        self._heartbeat: task.LoopingCall | None = None
         self._stop_requested: bool = False
+        # Bytes received per in-flight request with a truncation budget
+        self._received: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
         bus.subscribe("crawler.stop", self._on_stop_requested)
 
     async def start(self) -> AsyncIterator[Any]:
@@ -35,27 +62,123 @@ class BetterSpider(scrapy.Spider):
         self.logger.info("Starting scrapy spider.")
         bus.publish("crawler.status", "Starting", "")
 
-        for i, filing in enumerate(self.filings):
-            
-            self.logger.info(f"Dispatching filing {filing.file_path_name} - Number: {i}.")
-            url: str = filing.get_url()[0]
-            bus.publish("crawler.status", "Dispatching", url)
+        if self.work_queue is not None:
+            async for request in self._claim_requests():
+                yield request
+            return
+
+        filings: list[Filing] = self._resume(self.filings) if self.checkpoint is not None else self.filings
+
+        for i, filing in enumerate(filings):
+            yield self._request(filing, i)
+
+    def _request(self, filing: Filing, i: int) -> scrapy.Request:
+        self.logger.info(f"Dispatching filing {filing.file_path_name} - Number: {i}.")
+        url: str = filing.get_url()[0]
+        bus.publish("crawler.status", "Dispatching", url)
+
+        return scrapy.Request(
+            url=url,
+            callback=self.parse,
+            errback=self.download_failed,
+            meta={'filing': filing,
+                  'url': url,
+                  **self._download_budget(filing.file_container_type),
+                  },
+            dont_filter=True,
+        )
+
+    @staticmethod
+    def _download_budget(container_type: str) -> dict:
+        """Returns the request meta that limits the download size of a container type.
+
+        Truncated PDFs cannot be parsed, so oversized PDFs are cancelled by Scrapy
+        (``download_maxsize``). Text documents are truncated after their budget
+        (``download_truncate_bytes``) and the beginning of the document is extracted.
+        """
+        if container_type == "pdf":
+            return {'download_maxsize': Config.CRAWL_PDF_MAX_BYTES} if Config.CRAWL_PDF_MAX_BYTES > 0 else {}
+        limit: int = Config.CRAWL_DOWNLOAD_TRUNCATE_BYTES.get(container_type, 0)
+        return {'download_truncate_bytes': limit} if limit > 0 else {}
+
+    def bytes_received(self, data: bytes, request: scrapy.Request, spider: scrapy.Spider) -> None:
+        """Stops downloads at their truncation budget, Scrapy then returns the partial body."""
+        limit: int | None = request.meta.get('download_truncate_bytes')
+        if not limit:
+            return
+        received: int = self._received.get(request, 0) + len(data)
+        self._received[request] = received
+        if received >= limit:
+            raise StopDownload(fail=False)
+
+    def download_failed(self, failure: Failure):
+        """Records filings that were skipped because they exceed their download size.
+
+        Other failures release the filing in the work queue, so it is retried or marked failed.
+        """
+        request: scrapy.Request = failure.request
+        if not (failure.check(CancelledError) and request.meta.get('download_maxsize')):
+            self.logger.error(f"Error downloading {request.url}: {failure.value!r}")
+            self._fail_in_work_queue([request.meta['filing'].id])
+            return
+        self.logger.warning(f"Skipped {request.url}: larger than {request.meta['download_maxsize']} bytes.")
+        self._inc_stat("download_budget/skipped")
+        yield self._item(request.meta['filing'], '', request.meta['url'], download_status="skipped")
+
+    async def _claim_requests(self) -> AsyncIterator[scrapy.Request]:
+        """Claims batches from the work queue until no filing is pending or leased anymore.
+
+        Scrapy pulls start requests as the scheduler has room, so batches are only claimed
+        when this worker can crawl them. Filings leased by other workers are waited for,
+        their leases expire if the worker died.
+        """
+        poll_seconds: float = self.settings.getfloat("CRAWL_QUEUE_POLL_SECONDS", 5.0)
+        lease_seconds: float = self.work_queue.lease_seconds
+        self._heartbeat = task.LoopingCall(lambda: threads.deferToThread(self.work_queue.heartbeat))
+        self._heartbeat.start(max(1.0, lease_seconds / 3), now=False)
 
-            yield scrapy.Request(
-                url=url,
-                callback=self.parse,
-                meta={'filing': filing,
-                      'url': url,
-                      },
-                dont_filter=True,
-            )
+        dispatched: int = 0
+        while not self._stop_requested:
+            filings: list[Filing] = await maybe_deferred_to_future(threads.deferToThread(self.work_queue.claim))
+            if not filings:
+                if await maybe_deferred_to_future(threads.deferToThread(self.work_queue.is_drained)):
+                    self.logger.info("Work queue is drained.")
+                    break
+                await maybe_deferred_to_future(task.deferLater(reactor, poll_seconds, lambda: None))
+                continue
 
+            self.logger.info(f"Claimed {len(filings)} filings from the work queue.")
+            for filing in filings:
+                yield self._request(filing, dispatched)
+                dispatched += 1
 
-    def parse(self, response: scrapy.http.Response) -> Iterable[FilingItem]:
+
+    def _fail_in_work_queue(self, filing_ids: list[str]) -> None:
+        if self.work_queue is None:
+            return
+        try:
+            self.work_queue.fail(filing_ids)
+        except Exception as e:
+            # The leases are extended by the heartbeat until the worker closes
+            self.logger.error(f"Failed to release {len(filing_ids)} filings in the work queue: {e}")
+
+    def _resume(self, filings: list[Filing]) -> list[Filing]:
+        """Drops completed filings and adds the in-flight filings of an interrupted crawl."""
+        completed: set[str] = self.checkpoint.completed([filing.id for filing in filings])
+        ids: set[str] = {filing.id for filing in filings}
+        resumed: list[Filing] = [filing for filing in self.checkpoint.in_flight() if filing.id not in ids]
+        pending: list[Filing] = resumed + [filing for filing in filings if filing.id not in completed]
+
+        if completed or resumed:
+            self.logger.info(f"Resuming crawl: skipping {len(completed)} completed filings, "
+                             f"re-dispatching {len(resumed)} in-flight filings.")
+        self.checkpoint.mark_dispatched(pending)
+        return pending
+
+    async def parse(self, response: scrapy.http.Response) -> AsyncIterator[FilingItem]:
         """Parses filing and redirects to specific content extractor."""
         self.logger.info(f"Parsing {response.url}")
         filing: Filing = response.meta['filing']
-        keyword: str = filing.keyword
         url: str = response.meta['url']
 
         if self._stop_requested:
@@ -65,22 +188,52 @@ class BetterSpider(scrapy.Spider):
 
         # bus.publish("crawler.status", "Parsing", url)
 
-        # Extract text from response content
+        download_status: str | None = None
+        limit: int | None = response.meta.get('download_truncate_bytes')
+        if limit and ("download_stopped" in response.flags or len(response.body) > limit):
+            # Cached documents were stored in full, downloads stop just after the budget
+            self.logger.warning(f"Truncated {url} to {limit} bytes.")
+            self._inc_stat("download_budget/truncated")
+            response = response.replace(body=response.body[:limit])
+            download_status = "truncated"
+
+        # Extract text from response content, expensive formats (PDF) off the reactor thread
+        text: str = ''
+        started: float = time.perf_counter()
         try:
-            text: str = ProcessingFactory.create(filing.file_container_type).extract(response=response)
+            text = await ProcessingFactory.create(filing.file_container_type).extract_async(response=response)
         except ValueError as e:
             self.logger.exception(e, exc_info=True)
         except Exception as e:
             self.logger.exception(e, exc_info=True)
+        self._record_extraction_time(filing.file_container_type, time.perf_counter() - started)
+
+        # Dispatch into pipeline
+        yield self._item(filing, text, url, download_status=download_status)
 
+    @staticmethod
+    def _item(filing: Filing, text: str, url: str, download_status: str | None = None) -> FilingItem:
         item: FilingItem = FilingItem()
         item['filing'] = filing
         item['core_text'] = text
-        item['keyword'] = keyword
+        item['keyword'] = filing.keyword
+        item['keywords'] = filing.keywords
         item['url'] = url
+        item['download_status'] = download_status
+        return item
 
-        # Dispatch into pipeline
-        yield item
+    def _inc_stat(self, key: str) -> None:
+        stats = self.crawler.stats if getattr(self, 'crawler', None) else None
+        if stats is not None:
+            stats.inc_value(key)
+
+    def _record_extraction_time(self, container_type: str, seconds: float) -> None:
+        stats = self.crawler.stats if getattr(self, 'crawler', None) else None
+        if stats is None:
+            return
+        stats.inc_value(f"extraction/{container_type}/documents")
+        stats.inc_value(f"extraction/{container_type}/seconds", seconds)
+        stats.max_value(f"extraction/{container_type}/max_seconds", seconds)
 
     def item_scraped(self, item: FilingItem, spider: scrapy.Spider) -> None:
         """Called when an item is scraped."""
@@ -88,11 +241,26 @@ class BetterSpider(scrapy.Spider):
         filing: Filing = item['filing']
         bus.publish("crawl.result", filing)
 
+    def closed(self, reason: str) -> None:
+        """Forgets the checkpoint once the crawl finished, keeps it for a resume otherwise."""
+        if self._heartbeat is not None and self._heartbeat.running:
+            self._heartbeat.stop()
+        if self.checkpoint is None:
+            return
+        if reason == "finished":
+            self.checkpoint.clear()
+        self.checkpoint.close()
+
     @classmethod
     def from_crawler(cls, crawler: Crawler, *args, **kwargs):
         spider = super().from_crawler(crawler, *args, **kwargs)
+        # The work queue keeps track of completed filings itself
+        if (spider.checkpoint is None and spider.work_queue is None
+                and crawler.settings.getbool("CRAWL_CHECKPOINT_ENABLED", False)):
+            spider.checkpoint = CrawlCheckpoint()
         # Connect the spider.item_scraped method to the item_scraped signal
         crawler.signals.connect(spider.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(spider.bytes_received, signal=signals.bytes_received)
         return spider
     
     def _on_stop_requested(self, *args, **kwargs):
@@ -11,6 +11,7 @@ import scrapy
 from scrapy import Request
 
 from nps_crawling.crawler.items import FilingItem
+from nps_crawling.utils.keyword_matcher import KeywordMatcher
 
 
 class SECNpsSpider(scrapy.Spider):
@@ -39,6 +40,7 @@ class SECNpsSpider(scrapy.Spider):
         self.form_types = form_types
         self.base_url = base_url
         self.keywords = keywords
+        self.keyword_matcher = KeywordMatcher(keywords)
         self.max_depth = max_depth
         self.output_format = output_format
         self.output_path = output_path
@@ -286,23 +288,17 @@ class SECNpsSpider(scrapy.Spider):
         :param response:
         """
         text = response.text
-        text_lower = text.lower()
 
         self.state_record['urls_processed'].append(response.url)
 
         # Log for debugging
         self.logger.info(f"Parsing document: {response.url} ({len(text)} chars)")
 
-        # Initialize has_keyword flag
-        has_keyword = False
-        found_keywords = []
-
-        # Search for all configured keywords
-        for keyword in self.keywords:
-            if keyword.lower() in text_lower:
-                has_keyword = True
-                found_keywords.append(keyword)
-                self.logger.info(f"Found keyword: '{keyword}' in {response.url}")
+        # Search for all configured keywords in one pass
+        found_keywords = self.keyword_matcher.find_all(text)
+        has_keyword = bool(found_keywords)
+        for keyword in found_keywords:
+            self.logger.info(f"Found keyword: '{keyword}' in {response.url}")
 
         if has_keyword:
 
@@ -5,13 +5,22 @@ install_reactor('twisted.internet.asyncioreactor.AsyncioSelectorReactor')
 
 import logging
 import os
+from urllib.parse import urlparse
+
 import crochet
 from scrapy.crawler import CrawlerRunner
+from scrapy.settings import Settings
 from scrapy.utils.project import get_project_settings
 from twisted.internet import defer, reactor
 
 from nps_crawling.config import Config
+from nps_crawling.crawler.crawl_queue import CrawlQueue
+from nps_crawling.crawler.pre_fetch_utils.edgar_bulk import BulkFilter, filing_row, iter_bulk_filings
+from nps_crawling.crawler.pre_fetch_utils.filings import Filing
+from nps_crawling.crawler.pre_fetch_utils.sec_params import create_search_params_from_config
 from nps_crawling.crawler.spiders.better_spider import BetterSpider
+from nps_crawling.db.db_adapter import DbAdapter
+from nps_crawling.utils.event_bus import STATUS_TOPICS, bus
 
 from nps_crawling.crawler.pattern_strategy.pre_fetch.fetch_strategy import FetchStrategy
 from nps_crawling.crawler.pattern_strategy.pre_fetch.crawl_strategy import CrawlStrategy
@@ -25,16 +34,58 @@ crochet.setup()
 def _run_crawl_sequentially(runner: CrawlerRunner,
                             search_parameter_files: list[str],
                             fetch_strategy: FetchStrategy,
-                            ignore_lookup: bool):
+                            ignore_lookup: bool,
+                            incremental: bool = False,
+                            refresh_prefetch: bool = False,
+                            dry_run: bool = False):
     try:
         for query_file in search_parameter_files:
-            filings = fetch_strategy.fetch(query_path=query_file, ignore_lookup=ignore_lookup)
+            filings = fetch_strategy.fetch(query_path=query_file,
+                                           ignore_lookup=ignore_lookup,
+                                           incremental=incremental,
+                                           refresh=refresh_prefetch)
             logger.info(f"Running spider for {query_file} with {len(filings)} filings")
             yield runner.crawl(BetterSpider, filings=filings)
+            if not dry_run:
+                fetch_strategy.commit()
             logger.info(f"Finished: {query_file}")
     except Exception as e:
         logger.error(f"Crawl error: {e}", exc_info=True)
-        
+
+
+@crochet.wait_for(timeout=None)
+@defer.inlineCallbacks
+def _run_crawl_worker(runner: CrawlerRunner, work_queue: CrawlQueue):
+    try:
+        logger.info(f"Running crawl worker {work_queue.worker_id}")
+        yield runner.crawl(BetterSpider, work_queue=work_queue)
+        logger.info(f"Worker {work_queue.worker_id} finished: {work_queue.counts()}")
+    except Exception as e:
+        logger.error(f"Crawl error: {e}", exc_info=True)
+
+
+@crochet.wait_for(timeout=None)
+@defer.inlineCallbacks
+def _run_crawl_merged(runner: CrawlerRunner,
+                      search_parameter_files: list[str],
+                      fetch_strategy: FetchStrategy,
+                      ignore_lookup: bool,
+                      incremental: bool = False,
+                      refresh_prefetch: bool = False,
+                      dry_run: bool = False):
+    try:
+        filings = fetch_strategy.fetch_many(query_paths=search_parameter_files,
+                                            ignore_lookup=ignore_lookup,
+                                            incremental=incremental,
+                                            refresh=refresh_prefetch)
+        logger.info(f"Running spider for {len(search_parameter_files)} query files with {len(filings)} filings")
+        yield runner.crawl(BetterSpider, filings=filings)
+        if not dry_run:
+            fetch_strategy.commit()
+        logger.info("Finished merged crawl")
+    except Exception as e:
+        logger.error(f"Crawl error: {e}", exc_info=True)
+
 class CrawlerPipeline(Config):
     """Crawler pipeline to run the NPS Crawling spider."""
     def __init__(self):
@@ -47,49 +98,198 @@ class CrawlerPipeline(Config):
                          db_only: bool = False,
                          prefetch_only: bool = False,
                          ignore_lookup: bool = False,
-                         limit: int = -1) -> None:
-        """Run the NPS Crawling spider with specified settings."""
+                         incremental: bool = False,
+                         refresh_prefetch: bool = False,
+                         merge_queries: bool = False,
+                         offline: bool = False,
+                         enqueue_only: bool = False,
+                         worker: bool = False,
+                         from_bulk: str | None = None,
+                         limit: int = -1,
+                         settings_overrides: dict | None = None) -> None:
+        """Run the NPS Crawling spider with specified settings.
+
+        With ``incremental`` (or ``incremental`` in the crawl config), every query only searches
+        filings since its high-water mark of the previous incremental crawl. Search results are
+        served from the prefetch cache unless ``refresh_prefetch`` is set.
+
+        With ``merge_queries`` (or ``merge_queries`` in the crawl config), the filings of all query
+        files are deduplicated and crawled by a single spider run instead of one run per file.
+
+        Filing documents are served from the local response cache when they were downloaded
+        before. With ``offline`` (or ``offline`` in the crawl config), only cached documents are
+        crawled and the network is never used for downloads.
+
+        A crawl can be distributed over several processes or hosts: ``enqueue_only`` prefetches
+        the filings into the shared work queue of the database, every process started with
+        ``worker`` then crawls batches claimed from the queue until it is drained.
+
+        With ``from_bulk``, the filings table is seeded from locally downloaded EDGAR bulk data
+        (``full-index`` ``master.idx`` files or ``submissions.zip``) instead of the full-text search:
+        filings with the forms, CIKs and dates of the query files are loaded with COPY, and
+        also queued for crawl workers with ``enqueue_only``. Nothing is requested from the SEC.
+
+        ``settings_overrides`` are applied last to the Scrapy settings, e.g. to add extensions.
+
+        With ``event_bus_queued`` in the crawl config, events are delivered to their subscribers on
+        a dispatcher thread. Status and paging events are coalesced to one per ``event_coalesce_seconds``,
+        crawl results are delivered every time.
+        """
+        if Config.CRAWL_EVENT_BUS_QUEUED:
+            for topic in STATUS_TOPICS:
+                bus.coalesce(topic, Config.CRAWL_EVENT_COALESCE_SECONDS)
+            bus.start()
+        incremental = incremental or Config.CRAWL_INCREMENTAL
+        merge_queries = merge_queries or Config.CRAWL_MERGE_QUERIES
+        if offline:
+            Config.CRAWL_OFFLINE = True
         os.environ['SCRAPY_SETTINGS_MODULE'] = 'nps_crawling.crawler.settings'
 
+        settings = self._crawl_settings(dry_run=dry_run,
+                                        db_only=db_only,
+                                        ignore_lookup=ignore_lookup,
+                                        worker=worker,
+                                        limit=limit,
+                                        settings_overrides=settings_overrides)
+
+        print("=== Active Scrapy Settings ===")
+        for name, value in settings.items():
+            print(f"{name}: {value}")
+        print("=== End of Settings ===\n")
+
+        fetch_strategy: FetchStrategy = SearchStrategy()
+        search_parameter_files = search_parameter_files or self._query_files()
+
+        if from_bulk:
+            self._ingest_bulk(from_bulk, search_parameter_files, dry_run=dry_run, enqueue=enqueue_only)
+            return
+
+        fetch_kwargs: dict = {'ignore_lookup': ignore_lookup,
+                              'incremental': incremental,
+                              'refresh': refresh_prefetch}
+        if enqueue_only:
+            self._enqueue(fetch_strategy, search_parameter_files, dry_run=dry_run, **fetch_kwargs)
+            return
+
+        if prefetch_only:
+            self._prefetch_only(fetch_strategy, search_parameter_files, **fetch_kwargs)
+            return
+        runner = CrawlerRunner(settings=settings)
+
+        if worker:
+            _run_crawl_worker(runner=runner, work_queue=CrawlQueue())
+            return
+
+        run_crawl = _run_crawl_merged if merge_queries else _run_crawl_sequentially
+        run_crawl(runner=runner,
+                  search_parameter_files=search_parameter_files,
+                  fetch_strategy=fetch_strategy,
+                  ignore_lookup=ignore_lookup,
+                  incremental=incremental,
+                  refresh_prefetch=refresh_prefetch,
+                  dry_run=dry_run)
+
+    @staticmethod
+    def _crawl_settings(dry_run: bool,
+                        db_only: bool,
+                        ignore_lookup: bool,
+                        worker: bool,
+                        limit: int,
+                        settings_overrides: dict | None) -> Settings:
+        """Returns the Scrapy settings of the crawl, from the project settings and the crawl config."""
         settings = get_project_settings()
         settings.update({'CRAWL_DRY_RUN': dry_run})
         settings.update({'CRAWL_DB_ONLY': db_only})
         settings.update({'CRAWL_IGNORE_LOOKUP': ignore_lookup})
         settings.update({'SEC_QUERY_LIMIT_COUNT': Config.CRAWL_SEC_QUERY_LIMIT_COUNT})
         settings.update({'DOWNLOAD_DELAY': Config.CRAWL_DOWNLOAD_DELAY})
+        settings.update({'CRAWL_DB_FLUSH_ITEMS': Config.CRAWL_DB_FLUSH_ITEMS})
+        settings.update({'CRAWL_DB_FLUSH_SECONDS': Config.CRAWL_DB_FLUSH_SECONDS})
+        settings.update({'RESPONSE_CACHE_ENABLED': Config.CRAWL_RESPONSE_CACHE})
+        settings.update({'RESPONSE_CACHE_REPLAY_ONLY': Config.CRAWL_OFFLINE})
+        settings.update({'DOWNLOAD_WARNSIZE': Config.CRAWL_DOWNLOAD_WARN_BYTES})
+        if worker and Config.CRAWL_QUEUE_WORKERS > 1:
+            # All workers together stay within the SEC request budget
+            worker_rate: float = Config.CRAWL_SEC_REQUESTS_PER_SECOND / Config.CRAWL_QUEUE_WORKERS
+            settings.update({'SEC_RATE_LIMIT_MAX_RATE': worker_rate})
+        if Config.CRAWL_SEC_BASE_URL:
+            # A stand-in of EDGAR is paced like the SEC hosts
+            hosts = settings.getlist('SEC_RATE_LIMIT_HOSTS') + [urlparse(Config.CRAWL_SEC_BASE_URL).hostname]
+            settings.update({'SEC_RATE_LIMIT_HOSTS': hosts})
         if limit is not None and limit >= 0:
             settings.update({'SEC_QUERY_LIMIT_COUNT': limit})
 
         settings.update({'LOG_LEVEL': logger.getEffectiveLevel()})
+        if settings_overrides:
+            settings.update(settings_overrides)
+        return settings
 
-        print("=== Active Scrapy Settings ===")
-        for name, value in settings.items():
-            print(f"{name}: {value}")
-        print("=== End of Settings ===\n")
-
+    @staticmethod
+    def _query_files() -> list[str]:
+        """Returns all query files of the project."""
         SEC_QUERY_DIR_PATH = Config.QUERY_PATH
-        fetch_strategy: FetchStrategy = SearchStrategy()
+        return [
+            os.path.join(SEC_QUERY_DIR_PATH, f)
+            for f in os.listdir(SEC_QUERY_DIR_PATH)
+            if os.path.isfile(os.path.join(SEC_QUERY_DIR_PATH, f))
+        ]
 
-        if not search_parameter_files:
-            search_parameter_files = [
-                os.path.join(SEC_QUERY_DIR_PATH, f)
-                for f in os.listdir(SEC_QUERY_DIR_PATH)
-                if os.path.isfile(os.path.join(SEC_QUERY_DIR_PATH, f))
-            ]
+    @staticmethod
+    def _enqueue(fetch_strategy: FetchStrategy,
+                 search_parameter_files: list[str],
+                 dry_run: bool,
+                 **fetch_kwargs) -> None:
+        """Prefetches the filings of all query files into the work queue of the crawl workers."""
+        filings = fetch_strategy.fetch_many(query_paths=search_parameter_files, **fetch_kwargs)
+        work_queue = CrawlQueue()
+        work_queue.enqueue(filings)
+        if not dry_run:
+            fetch_strategy.commit()
+        logger.info(f"Work queue: {work_queue.counts()}")
 
-        if prefetch_only:
-            total_size: int = 0
-            for query_file in search_parameter_files:
-                filings = fetch_strategy.fetch(query_path=query_file, ignore_lookup=ignore_lookup)
-                for filing in filings:
-                    logger.info(filing)
-                total_size += len(filings)
-
-            logger.info(f"Total crawled filings from {len(search_parameter_files)} queries: {total_size}")
-            return 
-        runner = CrawlerRunner(settings=settings)
+    @staticmethod
+    def _prefetch_only(fetch_strategy: FetchStrategy, search_parameter_files: list[str], **fetch_kwargs) -> None:
+        """Prefetches and logs the filings of all query files without crawling them."""
+        filings = fetch_strategy.fetch_many(query_paths=search_parameter_files, **fetch_kwargs)
+        for filing in filings:
+            logger.info(filing)
+        total_size: int = len(filings)
+
+        logger.info(f"Total crawled filings from {len(search_parameter_files)} queries: {total_size}")
+
+    def _ingest_bulk(self, path: str, search_parameter_files: list[str], dry_run: bool, enqueue: bool) -> None:
+        """Loads the filings of EDGAR bulk data that match any query into the filings table.
+
+        The loaded filings are marked as seeded, so the duplicate check of later crawls
+        still crawls them. With ``enqueue``, the filings of every committed chunk that were
+        not crawled yet are queued for the crawl workers.
+        """
+        filters: list[BulkFilter] = [BulkFilter.from_params(params)
+                                     for query_path in search_parameter_files
+                                     for params in create_search_params_from_config(query_path)]
+        filings = iter_bulk_filings(path, filters)
+        if dry_run:
+            logger.info(f"Dry run: {sum(1 for _ in filings)} filings in {path} match the queries.")
+            return
+
+        db = DbAdapter()
+        work_queue: CrawlQueue | None = CrawlQueue(db=db) if enqueue else None
+        # Filings of the chunk being copied, by ID
+        chunk: dict[str, Filing] = {}
+
+        def rows():
+            for filing in filings:
+                if work_queue is not None:
+                    chunk[filing.id] = filing
+                yield filing_row(filing)
+
+        def enqueue_uncrawled(filing_ids: list[str]) -> None:
+            work_queue.enqueue([chunk[filing_id] for filing_id in filing_ids if filing_id in chunk])
+            chunk.clear()
 
-        _run_crawl_sequentially(runner=runner, 
-                                search_parameter_files=search_parameter_files, 
-                                fetch_strategy=fetch_strategy, 
-                                ignore_lookup=ignore_lookup)
+        inserted: int = db.copy_filings_bulk(rows(),
+                                             chunk_size=Config.CRAWL_BULK_CHUNK_SIZE,
+                                             on_commit=enqueue_uncrawled if work_queue is not None else None)
+        if work_queue is not None:
+            logger.info(f"Work queue: {work_queue.counts()}")
+        logger.info(f"Loaded {inserted} new filings from {path}.")
@@ -0,0 +1,175 @@
+"""Database access layer for the crawl work queue."""
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from sqlalchemy import Engine, text
+
+from nps_crawling.config import Config
+
+
+class CrawlQueueDB:
+    """Database access layer for the crawl work queue.
+
+    The queue table lives next to the filings table. Every row is one filing to crawl,
+    leased by one worker at a time: workers claim batches with ``FOR UPDATE SKIP LOCKED``
+    so concurrent claims never block each other or return the same filing. A lease that
+    is not completed before ``leased_until`` (e.g. because the worker died) is claimed again.
+    """
+    # Name of the queue table, derived from the filings table.
+    TABLE = f"{Config.DATABASE_TABLE_NAME}_crawl_queue"
+
+    PENDING = "pending"
+    LEASED = "leased"
+    DONE = "done"
+    FAILED = "failed"
+
+    def __init__(self, engine: Engine) -> None:
+        """Initialize CrawlQueueDB with a SQLAlchemy Engine."""
+        self.engine = engine
+
+    def ensure_table(self) -> None:
+        """Creates the queue table and its claim index if they do not exist."""
+        with self.engine.begin() as conn:
+            conn.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {self.TABLE} (
+                id VARCHAR PRIMARY KEY,
+                filing JSONB NOT NULL,
+                status VARCHAR NOT NULL DEFAULT '{self.PENDING}',
+                worker VARCHAR,
+                leased_until TIMESTAMPTZ,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                enqueued_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            );
+            """))
+            conn.execute(text(
+                f"CREATE INDEX IF NOT EXISTS {self.TABLE}_claim_idx ON {self.TABLE} (status, enqueued_at);",
+            ))
+
+    def enqueue(self, rows: list[dict[str, Any]]) -> int:
+        """Adds filings (``id`` and ``filing`` state) to the queue, skipping queued IDs.
+
+        Pending filings that are enqueued again get the keywords of both queries.
+
+        Returns:
+            int: Number of newly queued filings.
+        """
+        if not rows:
+            return 0
+
+        stmt = text(f"""
+        INSERT INTO {self.TABLE} (id, filing)
+        SELECT r.id, r.filing
+        FROM jsonb_to_recordset(CAST(:rows AS jsonb)) AS r(id text, filing jsonb)
+        ON CONFLICT (id) DO UPDATE
+        SET
+          filing = jsonb_set({self.TABLE}.filing, '{{keywords}}', (
+            SELECT COALESCE(jsonb_agg(DISTINCT kw), '[]'::jsonb)
+            FROM jsonb_array_elements(
+              COALESCE({self.TABLE}.filing -> 'keywords', '[]'::jsonb)
+              || COALESCE(EXCLUDED.filing -> 'keywords', '[]'::jsonb)
+            ) AS kw
+          )),
+          updated_at = now()
+        WHERE {self.TABLE}.status = '{self.PENDING}'
+        RETURNING (xmax = 0) AS inserted;
+        """)
+
+        with self.engine.begin() as conn:
+            inserted = conn.execute(stmt, {"rows": json.dumps(rows, default=str)}).scalars().all()
+            return sum(1 for row in inserted if row)
+
+    def claim(self, worker: str, limit: int, lease_seconds: float, max_attempts: int) -> list[dict[str, Any]]:
+        """Leases up to ``limit`` pending or expired filings to ``worker``.
+
+        Filings that were leased ``max_attempts`` times without being completed are marked failed.
+
+        Returns:
+            list[dict]: The ``id`` and ``filing`` state of every claimed filing.
+        """
+        fail_stmt = text(f"""
+        UPDATE {self.TABLE}
+        SET status = '{self.FAILED}', updated_at = now()
+        WHERE status = '{self.LEASED}' AND leased_until < now() AND attempts >= :max_attempts;
+        """)
+        claim_stmt = text(f"""
+        WITH batch AS (
+          SELECT id FROM {self.TABLE}
+          WHERE status = '{self.PENDING}'
+             OR (status = '{self.LEASED}' AND leased_until < now() AND attempts < :max_attempts)
+          ORDER BY enqueued_at
+          LIMIT :limit
+          FOR UPDATE SKIP LOCKED
+        )
+        UPDATE {self.TABLE} AS q
+        SET status = '{self.LEASED}',
+            worker = :worker,
+            leased_until = now() + make_interval(secs => :lease_seconds),
+            attempts = q.attempts + 1,
+            updated_at = now()
+        FROM batch
+        WHERE q.id = batch.id
+        RETURNING q.id, q.filing;
+        """)
+
+        params = {"worker": worker, "limit": limit, "lease_seconds": lease_seconds, "max_attempts": max_attempts}
+        with self.engine.begin() as conn:
+            conn.execute(fail_stmt, {"max_attempts": max_attempts})
+            return [{"id": row.id, "filing": row.filing} for row in conn.execute(claim_stmt, params)]
+
+    def complete(self, worker: str, ids: list[str]) -> int:
+        """Marks filings leased by ``worker`` as done. Returns the number of updated rows."""
+        if not ids:
+            return 0
+        stmt = text(f"""
+        UPDATE {self.TABLE}
+        SET status = '{self.DONE}', leased_until = NULL, updated_at = now()
+        WHERE id = ANY(:ids) AND worker = :worker AND status = '{self.LEASED}';
+        """)
+        with self.engine.begin() as conn:
+            return int(conn.execute(stmt, {"ids": list(ids), "worker": worker}).rowcount or 0)
+
+    def fail(self, worker: str, ids: list[str], max_attempts: int) -> int:
+        """Releases the leases of filings ``worker`` could not crawl or store.
+
+        Filings with attempts left are pending again, the others are marked failed.
+        Returns the number of updated rows.
+        """
+        if not ids:
+            return 0
+        stmt = text(f"""
+        UPDATE {self.TABLE}
+        SET status = CASE WHEN attempts >= :max_attempts THEN '{self.FAILED}' ELSE '{self.PENDING}' END,
+            worker = NULL, leased_until = NULL, updated_at = now()
+        WHERE id = ANY(:ids) AND worker = :worker AND status = '{self.LEASED}';
+        """)
+        with self.engine.begin() as conn:
+            params = {"ids": list(ids), "worker": worker, "max_attempts": max_attempts}
+            return int(conn.execute(stmt, params).rowcount or 0)
+
+    def extend_leases(self, worker: str, lease_seconds: float) -> int:
+        """Extends all leases of ``worker``, so its in-flight filings are not claimed by others."""
+        stmt = text(f"""
+        UPDATE {self.TABLE}
+        SET leased_until = now() + make_interval(secs => :lease_seconds), updated_at = now()
+        WHERE worker = :worker AND status = '{self.LEASED}';
+        """)
+        with self.engine.begin() as conn:
+            return int(conn.execute(stmt, {"worker": worker, "lease_seconds": lease_seconds}).rowcount or 0)
+
+    def counts(self) -> dict[str, int]:
+        """Returns the number of queued filings per status."""
+        stmt = text(f"SELECT status, COUNT(*) FROM {self.TABLE} GROUP BY status;")
+        with self.engine.connect() as conn:
+            return {status: int(count) for status, count in conn.execute(stmt)}
+
+    def open_count(self, max_attempts: int) -> int:
+        """Returns the number of filings that are pending or leased with attempts left."""
+        stmt = text(f"""
+        SELECT COUNT(*) FROM {self.TABLE}
+        WHERE status = '{self.PENDING}' OR (status = '{self.LEASED}' AND attempts < :max_attempts);
+        """)
+        with self.engine.connect() as conn:
+            return int(conn.execute(stmt, {"max_attempts": max_attempts}).scalar() or 0)
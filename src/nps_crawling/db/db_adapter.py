@@ -1,9 +1,10 @@
 import os
-from typing import Any
+from typing import Any, Callable, Iterable
 
 from sqlalchemy import create_engine, text
 
 from nps_crawling.config import Config
+from nps_crawling.db.crawl_queue_db import CrawlQueueDB
 from nps_crawling.db.nps_filings_db import NpsFilingsDB
 
 
@@ -35,6 +36,7 @@ class DbAdapter:
 
         self.engine = create_engine(f"postgresql+psycopg2://{connection_string}")
         self._db = NpsFilingsDB(self.engine)
+        self._queue = CrawlQueueDB(self.engine)
         self.table_name = self._db.TABLE
 
     def is_db_available(self) -> bool:
@@ -100,9 +102,14 @@ class DbAdapter:
             url VARCHAR,
 
             -- Crawl Tracking
-            last_crawled TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+            last_crawled TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+            download_status VARCHAR
         );
         """)
+        # Tables created before download budgets existed
+        alter_stmt_download_status = text(
+            f"ALTER TABLE {self.table_name} ADD COLUMN IF NOT EXISTS download_status VARCHAR;",
+        )
         
         type_mapping = {
             "boolean": "BOOLEAN",
@@ -146,6 +153,7 @@ class DbAdapter:
 
         with self.engine.begin() as conn:
             conn.execute(create_stmt)
+            conn.execute(alter_stmt_download_status)
             conn.execute(create_stmt_preprocessing)
             if include_classifications and Config.ACTIVE_PROJECT:
                 conn.execute(create_stmt_classifications)
@@ -194,6 +202,102 @@ class DbAdapter:
         # NpsFilingsDB will handle matching them to columns or using defaults.
         self._db.upsert_filing(id=filing_id, **kwargs)
 
+    def add_filings_bulk(self, rows: list[dict]) -> int:
+        """
+        Adds many crawled filings in one statement, or appends their keywords if they already exist.
+
+        Args:
+            rows (list[dict]): One dictionary per filing with an ``id`` and the crawled metadata
+                               (ciks, ticker, ..., keywords, path_to_raw, url). IDs must be unique.
+
+        Returns:
+            int: The number of filings that were newly inserted.
+        """
+        return self._db.upsert_filings_bulk(rows)
+
+    def copy_filings_bulk(
+        self,
+        rows: Iterable[dict],
+        chunk_size: int = 50_000,
+        on_commit: Callable[[list[str]], None] | None = None,
+    ) -> int:
+        """
+        Loads the metadata of many filings with COPY, skipping filings that already exist.
+        New filings are marked as seeded until a crawl stores them.
+
+        Args:
+            rows (Iterable[dict]): One dictionary per filing with an ``id`` and its metadata
+                                   (ciks, ticker, ..., keywords, url). Consumed lazily in chunks.
+            chunk_size (int): Number of filings copied per transaction.
+            on_commit (Callable[[list[str]], None] | None): Called after every committed chunk with
+                                                            the IDs of its filings that were not crawled yet.
+
+        Returns:
+            int: The number of filings that were newly inserted.
+        """
+        return self._db.copy_filings(rows, chunk_size=chunk_size, on_commit=on_commit)
+
+    def ensure_crawl_queue_exists(self) -> None:
+        """Creates the crawl work queue table next to the filings table if it does not exist."""
+        self._queue.ensure_table()
+
+    def enqueue_crawl_work(self, rows: list[dict]) -> int:
+        """
+        Adds filings to the crawl work queue.
+
+        Args:
+            rows (list[dict]): One dictionary per filing with its ``id`` and its ``filing`` state.
+
+        Returns:
+            int: The number of filings that were newly queued.
+        """
+        return self._queue.enqueue(rows)
+
+    def claim_crawl_work(self, worker: str, limit: int, lease_seconds: float, max_attempts: int) -> list[dict]:
+        """
+        Leases a batch of queued filings to a crawl worker.
+
+        Args:
+            worker (str): Unique name of the claiming worker.
+            limit (int): Maximum number of filings to claim.
+            lease_seconds (float): Seconds until the filings may be claimed by other workers.
+            max_attempts (int): Leases per filing before it is marked failed.
+
+        Returns:
+            list[dict]: The ``id`` and ``filing`` state of every claimed filing.
+        """
+        return self._queue.claim(worker, limit, lease_seconds, max_attempts)
+
+    def complete_crawl_work(self, worker: str, filing_ids: list[str]) -> int:
+        """Marks queued filings of ``worker`` as crawled. Returns the number of updated filings."""
+        return self._queue.complete(worker, filing_ids)
+
+    def fail_crawl_work(self, worker: str, filing_ids: list[str], max_attempts: int) -> int:
+        """
+        Releases the leases of queued filings ``worker`` could not crawl or store.
+
+        Args:
+            worker (str): Unique name of the worker holding the leases.
+            filing_ids (list[str]): IDs of the failed filings.
+            max_attempts (int): Leases per filing before it is marked failed instead of pending.
+
+        Returns:
+            int: The number of released filings.
+        """
+        return self._queue.fail(worker, filing_ids, max_attempts)
+
+    def extend_crawl_leases(self, worker: str, lease_seconds: float) -> int:
+        """Extends the leases of all filings ``worker`` is crawling. Returns the number of leases."""
+        return self._queue.extend_leases(worker, lease_seconds)
+
+    def crawl_queue_counts(self) -> dict[str, int]:
+        """Returns the number of queued filings per status (pending, leased, done, failed)."""
+        return self._queue.counts()
+
+    def crawl_queue_open_count(self, max_attempts: int) -> int:
+        """Returns the number of queued filings that are pending or leased with attempts left."""
+        return self._queue.open_count(max_attempts)
+
     def filing_exists(self, filing_id: str) -> bool:
         """
         Checks if a filing with the given ID already exists in the database.
@@ -208,6 +312,27 @@ class DbAdapter:
         with self.engine.connect() as conn:
             return conn.execute(stmt, {"id": filing_id}).scalar()
 
+    def get_existing_filing_ids(
+        self,
+        filing_ids: list[str],
+        keywords: dict[str, str] | None = None,
+        chunk_size: int = 1000,
+    ) -> set[str]:
+        """
+        Checks which of the given filings already exist in the database using set-based queries.
+        Filings seeded from bulk data that were not crawled yet do not count as existing.
+
+        Args:
+            filing_ids (list[str]): The unique identifiers to look up.
+            keywords (dict[str, str] | None): Optional mapping of filing ID to keyword. The keyword
+                                              is appended to every filing that already exists.
+            chunk_size (int): Number of IDs per lookup query.
+
+        Returns:
+            set[str]: The IDs that exist in the database.
+        """
+        return self._db.find_existing(filing_ids, keywords=keywords, chunk_size=chunk_size)
+
     def add_keyword(self, filing_id: str, keyword: str) -> bool:
         """
         Adds a single keyword to the keywords array for a specific filing.
@@ -1,8 +1,11 @@
 # nps_filings_db.py
 from __future__ import annotations
 
+import csv
+import io
+import itertools
 import json
-from typing import Any, Literal
+from typing import Any, Callable, Iterable, Literal
 
 from sqlalchemy import Engine, text
 
@@ -17,6 +20,9 @@ class NpsFilingsDB:
     # Columns stored as PostgreSQL text arrays (TEXT[]).
     _ARRAY_COLS = {"ciks", "ticker", "display_names", "root_forms", "film_num", "keywords"}
 
+    # download_status of filings seeded by copy_filings() that were not crawled yet.
+    SEEDED_STATUS = "seeded"
+
     # Columns that are allowed to be updated via update_fields().
     _UPDATABLE_COLS = {
         "ciks",
@@ -38,6 +44,7 @@ class NpsFilingsDB:
         "path_to_preprocessed",
         "path_to_classified",
         "url",
+        "download_status",
     }
 
     def __init__(self, engine: Engine) -> None:
@@ -149,6 +156,140 @@ class NpsFilingsDB:
                 },
             )
 
+    def upsert_filings_bulk(self, rows: list[dict[str, Any]]) -> int:
+        """Upserts many crawled filings with a single multi-row INSERT ... ON CONFLICT.
+
+        New filings are inserted with all given metadata. For existing filings only
+        missing keywords are appended, ``path_to_raw`` is set when given,
+        ``download_status`` is replaced and ``last_crawled`` is touched. Every ``id``
+        may only occur once in ``rows``.
+
+        Returns:
+            int: Number of newly inserted filings.
+        """
+        if not rows:
+            return 0
+
+        stmt = text(f"""
+        INSERT INTO {self.TABLE} (
+          id, ciks, ticker, period_ending, display_names, root_forms, file_date, form, adsh,
+          file_type, file_description, film_num, keywords, blacklisted, path_to_raw, url, download_status
+        )
+        SELECT
+          r.id,
+          ARRAY(SELECT jsonb_array_elements_text(COALESCE(r.ciks, '[]'))),
+          ARRAY(SELECT jsonb_array_elements_text(COALESCE(r.ticker, '[]'))),
+          CAST(NULLIF(r.period_ending, '') AS date),
+          ARRAY(SELECT jsonb_array_elements_text(COALESCE(r.display_names, '[]'))),
+          ARRAY(SELECT jsonb_array_elements_text(COALESCE(r.root_forms, '[]'))),
+          CAST(NULLIF(r.file_date, '') AS date),
+          r.form, r.adsh, r.file_type, r.file_description,
+          ARRAY(SELECT jsonb_array_elements_text(COALESCE(r.film_num, '[]'))),
+          ARRAY(SELECT jsonb_array_elements_text(COALESCE(r.keywords, '[]'))),
+          FALSE, r.path_to_raw, r.url, r.download_status
+        FROM jsonb_to_recordset(CAST(:rows AS jsonb)) AS r(
+          id text, ciks jsonb, ticker jsonb, period_ending text, display_names jsonb, root_forms jsonb,
+          file_date text, form text, adsh text, file_type text, file_description text, film_num jsonb,
+          keywords jsonb, path_to_raw text, url text, download_status text
+        )
+        ON CONFLICT (id) DO UPDATE
+        SET
+          -- Append only the keywords the filing does not have yet.
+          keywords = COALESCE({self.TABLE}.keywords, CAST(ARRAY[] AS text[])) || ARRAY(
+            SELECT kw FROM unnest(EXCLUDED.keywords) AS kw
+            WHERE NOT (kw = ANY(COALESCE({self.TABLE}.keywords, CAST(ARRAY[] AS text[]))))
+          ),
+          path_to_raw  = COALESCE(EXCLUDED.path_to_raw, {self.TABLE}.path_to_raw),
+          -- Truncated or skipped by the download budget in the latest crawl, NULL if complete.
+          download_status = EXCLUDED.download_status,
+          last_crawled = now()
+        RETURNING (xmax = 0) AS inserted;
+        """)
+
+        with self.engine.begin() as conn:
+            inserted = conn.execute(stmt, {"rows": json.dumps(rows, default=str)}).scalars().all()
+            return sum(1 for row in inserted if row)
+
+    # Columns written by copy_filings(), in COPY order.
+    _COPY_COLS = (
+        "id", "ciks", "ticker", "period_ending", "display_names", "root_forms", "file_date", "form",
+        "adsh", "file_type", "file_description", "film_num", "keywords", "url",
+    )
+
+    def copy_filings(
+        self,
+        rows: Iterable[dict[str, Any]],
+        chunk_size: int = 50_000,
+        on_commit: Callable[[list[str]], None] | None = None,
+    ) -> int:
+        """Bulk-loads filing metadata with COPY, e.g. to seed the table from EDGAR bulk data.
+
+        ``rows`` is consumed in chunks of ``chunk_size``: every chunk is copied into a
+        temporary staging table and inserted from there, filings that already exist are
+        left untouched. Array columns are passed as JSON lists. New filings get the
+        ``download_status`` :attr:`SEEDED_STATUS` until a crawl stores them.
+
+        ``on_commit`` is called after every committed chunk with the IDs of the chunk that
+        still have to be crawled: the new filings and those seeded before but not crawled yet.
+
+        Returns:
+            int: Number of newly inserted filings.
+        """
+        array_cols = [col for col in self._COPY_COLS if col in self._ARRAY_COLS]
+        staging = f"{self.TABLE}_copy_staging"
+        columns = ", ".join(
+            f"{col} {'jsonb' if col in self._ARRAY_COLS else 'text'}" for col in self._COPY_COLS
+        )
+        select = ", ".join(
+            f"ARRAY(SELECT jsonb_array_elements_text(COALESCE(s.{col}, '[]')))" if col in array_cols
+            else f"CAST(NULLIF(s.{col}, '') AS date)" if col in ("period_ending", "file_date")
+            else f"s.{col}"
+            for col in self._COPY_COLS
+        )
+        insert = f"""
+        INSERT INTO {self.TABLE} ({", ".join(self._COPY_COLS)}, blacklisted, download_status)
+        SELECT DISTINCT ON (s.id) {select}, FALSE, %(seeded)s
+        FROM {staging} AS s
+        ON CONFLICT (id) DO NOTHING;
+        """
+        uncrawled = f"""
+        SELECT DISTINCT t.id FROM {self.TABLE} AS t JOIN {staging} AS s ON s.id = t.id
+        WHERE t.download_status = %(seeded)s;
+        """
+
+        inserted = 0
+        rows = iter(rows)
+        conn = self.engine.raw_connection()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"CREATE TEMP TABLE IF NOT EXISTS {staging} ({columns}) ON COMMIT DELETE ROWS;")
+                while chunk := list(itertools.islice(rows, chunk_size)):
+                    buffer = io.StringIO()
+                    writer = csv.writer(buffer)
+                    for row in chunk:
+                        writer.writerow([
+                            json.dumps(row.get(col) or [], default=str) if col in array_cols
+                            else "" if row.get(col) is None else str(row.get(col))
+                            for col in self._COPY_COLS
+                        ])
+                    buffer.seek(0)
+                    cur.copy_expert(
+                        f"COPY {staging} ({', '.join(self._COPY_COLS)}) FROM STDIN WITH (FORMAT csv)", buffer,
+                    )
+                    cur.execute(insert, {"seeded": self.SEEDED_STATUS})
+                    inserted += cur.rowcount or 0
+                    seeded_ids: list[str] = []
+                    if on_commit is not None:
+                        # The staging table is emptied on commit
+                        cur.execute(uncrawled, {"seeded": self.SEEDED_STATUS})
+                        seeded_ids = [row[0] for row in cur.fetchall()]
+                    conn.commit()
+                    if on_commit is not None:
+                        on_commit(seeded_ids)
+        finally:
+            conn.close()
+        return inserted
+
     def update_fields(
         self,
         id: str,
@@ -292,6 +433,55 @@ class NpsFilingsDB:
             # or None if row doesn't exist or keyword was already in the array.
             return bool(conn.execute(stmt, {"id": id, "kw": kw}).scalar())
 
+    def find_existing(
+        self,
+        ids: list[str],
+        *,
+        keywords: dict[str, str] | None = None,
+        chunk_size: int = 1000,
+    ) -> set[str]:
+        """Returns the subset of ``ids`` present in the table.
+
+        Filings seeded from bulk data (:attr:`SEEDED_STATUS`) are not returned, they still
+        have to be crawled. When ``keywords`` maps IDs to a keyword, the keyword is appended
+        to every existing filing with a single UPDATE per keyword. Lookup and update share
+        one transaction.
+        """
+        select_stmt = text(
+            f"SELECT id FROM {self.TABLE} "
+            f"WHERE id = ANY(:ids) AND download_status IS DISTINCT FROM :seeded;",
+        )
+        update_stmt = text(f"""
+        UPDATE {self.TABLE}
+        SET
+          keywords = CASE
+            WHEN NOT (:kw = ANY(keywords)) THEN array_append(keywords, :kw)
+            ELSE keywords
+          END,
+          last_crawled = now()
+        WHERE id = ANY(:ids);
+        """)
+
+        unique_ids: list[str] = list(dict.fromkeys(ids))
+        existing: set[str] = set()
+
+        with self.engine.begin() as conn:
+            for start in range(0, len(unique_ids), chunk_size):
+                chunk = unique_ids[start:start + chunk_size]
+                existing.update(conn.execute(select_stmt, {"ids": chunk, "seeded": self.SEEDED_STATUS}).scalars())
+
+            if keywords:
+                ids_by_keyword: dict[str, list[str]] = {}
+                for id in existing:
+                    kw = keywords.get(id)
+                    if kw:
+                        ids_by_keyword.setdefault(kw, []).append(id)
+
+                for kw, kw_ids in ids_by_keyword.items():
+                    conn.execute(update_stmt, {"kw": kw, "ids": kw_ids})
+
+        return existing
+
     def get_field(self, id: str, field: str) -> Any:
         """Retrieve a specific field for a given filing."""
         if field not in self._UPDATABLE_COLS and field != "id":
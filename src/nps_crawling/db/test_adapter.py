@@ -140,6 +140,15 @@ def test_adapter() -> None:
     keyword_added_dup = adapter.add_keyword(filing_id=test_id, keyword="NPS")
     print(f"Duplicate Keyword 'NPS' added (Should safely ignore): {keyword_added_dup}")
 
+    # 5b. Set-based duplicate lookup with bulk keyword append
+    print("\n5b. Testing get_existing_filing_ids...")
+    existing = adapter.get_existing_filing_ids(
+        [test_id, "does-not-exist"],
+        keywords={test_id: "nps score", "does-not-exist": "nps score"},
+    )
+    print(f"Existing IDs (Expected only '{test_id}'): {existing}")
+    print(f"Keywords after bulk append: {adapter.return_keywords(test_id)}")
+
     # 6. Retrieve and verify the item
     print("\n6. Testing get_filing...")
     item = adapter.get_filing(filing_id=test_id)
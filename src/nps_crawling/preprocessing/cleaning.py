@@ -4,12 +4,17 @@ import re
 import warnings
 
 from bs4 import BeautifulSoup, NavigableString, XMLParsedAsHTMLWarning
+from lxml import etree
 
 from nps_crawling.config import Config
 
 # Ignore warning about parsing XML documents with an HTML parser
 warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
 
+# Tags whose strings BeautifulSoup's get_text() leaves out (its Script, Stylesheet,
+# TemplateString and ruby annotation string types).
+HIDDEN_TEXT_TAGS = frozenset({"script", "style", "template", "rt", "rp"})
+
 
 class CleanTextPipeline(Config):
     """Text cleaning pipeline class."""
@@ -43,15 +48,7 @@ class CleanTextPipeline(Config):
         """
         if "core_text" in item and isinstance(item["core_text"], str):
             # Parse HTML content into plain text
-            soup = BeautifulSoup(item["core_text"], "lxml")
-
-            # Collapse tables with keyword matches before extracting text.
-            # Matching rows become a single compact sentence; all other rows
-            # are discarded so the surrounding prose serves as context.
-            self._collapse_keyword_tables(soup)
-
-            # Extract visible text while keeping spaces between elements
-            text = soup.get_text(separator=" ", strip=True)
+            text = self.extract_text(item["core_text"])
 
             # Replace non-breaking spaces and newlines with normal spaces
             text = text.replace("\xa0", " ")
@@ -67,6 +64,136 @@ class CleanTextPipeline(Config):
 
         return item
 
+    def extract_text(self, html: str, fast: bool | None = None) -> str:
+        """Return the visible text of ``html`` with keyword tables collapsed.
+
+        ``fast`` selects the lxml extractor (defaults to
+        ``PREPROCESS_FAST_HTML_EXTRACTION``). Both extractors return the same
+        text; the BeautifulSoup one is the reference and the fallback for
+        markup lxml rejects.
+        """
+        if fast is None:
+            fast = Config.PREPROCESS_FAST_HTML_EXTRACTION
+        if fast:
+            text = self._extract_text_fast(html)
+            if text is not None:
+                return text
+
+        soup = BeautifulSoup(html, "lxml")
+
+        # Collapse tables with keyword matches before extracting text.
+        # Matching rows become a single compact sentence; all other rows
+        # are discarded so the surrounding prose serves as context.
+        self._collapse_keyword_tables(soup)
+
+        # Extract visible text while keeping spaces between elements
+        return soup.get_text(separator=" ", strip=True)
+
+    # ------------------------------------------------------------------
+    # Fast extraction on the lxml tree
+    # ------------------------------------------------------------------
+
+    def _extract_text_fast(self, html: str) -> str | None:
+        """Return ``extract_text`` output without building a BeautifulSoup tree.
+
+        lxml's HTML parser is the one BeautifulSoup's "lxml" builder drives,
+        so both see the same tree. The markup is fed in one piece: the 512
+        character chunks BeautifulSoup feeds make libxml2 crawl on deeply
+        nested markup without changing the result. Keyword tables are only
+        recorded with their replacement sentence instead of being rewritten,
+        and the text is then streamed out of the tree in one walk. Returns
+        None when lxml rejects the markup.
+        """
+        if html[:1] == "\ufeff":
+            html = html[1:]
+        parser = etree.HTMLParser()
+        try:
+            parser.feed(html)
+            root = parser.close()
+        except (etree.LxmlError, UnicodeError, LookupError, ValueError):
+            return None
+        if root is None:
+            return None
+
+        replaced = {}
+        for table in root.iter("table"):
+            # Tables inside an already collapsed table are gone from the
+            # output anyway.
+            if any(ancestor in replaced for ancestor in table.iterancestors("table")):
+                continue
+
+            if not self._has_keyword(self._get_text(table, replaced)):
+                continue
+            cell_texts = [
+                [self._get_text(cell, replaced) for cell in row.iter("td", "th")]
+                for row in table.iter("tr")
+            ]
+            sentence = self._table_sentence(
+                cell_texts, lambda: self._extract_caption_fast(table, replaced),
+            )
+            if sentence:
+                replaced[table] = f" {sentence} "
+
+        return " ".join(self._strings(root, replaced))
+
+    def _get_text(self, element, replaced) -> str:
+        """``get_text(" ", strip=True)`` of ``element`` on the lxml tree."""
+        # Every string below a hidden tag is hidden, whatever the element.
+        if any(True for _ in element.iterancestors(*HIDDEN_TEXT_TAGS)):
+            return ""
+        return " ".join(self._strings(element, replaced))
+
+    @staticmethod
+    def _strings(element, replaced) -> list[str]:
+        """Return the stripped strings below ``element`` like ``get_text(strip=True)``.
+
+        Comments, processing instructions and the text inside hidden tags are
+        left out. Tables in ``replaced`` contribute their replacement sentence
+        instead of their content.
+        """
+        strings = []
+        stack = [element]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, str):
+                node = node.strip()
+                if node:
+                    strings.append(node)
+                continue
+
+            tag = node.tag
+            if not isinstance(tag, str) or tag in HIDDEN_TEXT_TAGS:
+                continue
+            if tag == "table" and node in replaced:
+                stack.append(replaced[node])
+                continue
+
+            if node.text:
+                text = node.text.strip()
+                if text:
+                    strings.append(text)
+            for child in reversed(node):
+                if child.tail:
+                    stack.append(child.tail)
+                stack.append(child)
+        return strings
+
+    def _extract_caption_fast(self, table, replaced) -> str:
+        """``_extract_caption`` on the lxml tree."""
+        cap = table.find("caption")
+        if cap is not None:
+            text = self._get_text(cap, replaced)
+            if text:
+                return text[:200]
+        prev = table.getprevious()
+        while prev is not None and (not isinstance(prev.tag, str) or prev in replaced):
+            prev = prev.getprevious()
+        if prev is not None and prev.tag in self._CAPTION_SIBLING_TAGS:
+            text = self._get_text(prev, replaced)
+            if text and 5 < len(text) < 200:
+                return text
+        return ""
+
     # ------------------------------------------------------------------
     # Table handling
     # ------------------------------------------------------------------
@@ -120,61 +247,80 @@ class CleanTextPipeline(Config):
         are left untouched — the surrounding ``get_text`` pass handles them.
         """
         for table in soup.find_all("table"):
-            table_text_lower = self._mask_excluded(table.get_text(" ", strip=True).lower())
-            if not any(kw in table_text_lower for kw in self._keywords):
-                continue
-
-            # SEC filings frequently render bulleted paragraphs as <table>
-            # (bullet glyph in col 1, full sentence in col 2). Wrapping those
-            # in [TABLE] markers turns a readable bullet into table noise and
-            # discards any rows that don't carry the keyword. Skip the
-            # collapse so the outer get_text() pass flattens them as prose.
-            if self._is_layout_table(table):
+            if not self._has_keyword(table.get_text(" ", strip=True)):
                 continue
 
-            parsed_rows = self._parse_table_rows(table)
-            if not parsed_rows:
-                continue
+            cell_texts = [
+                [cell.get_text(" ", strip=True) for cell in row.find_all(["td", "th"])]
+                for row in table.find_all("tr")
+            ]
+            sentence = self._table_sentence(cell_texts, lambda: self._extract_caption(table))
+            if sentence:
+                table.replace_with(NavigableString(f" {sentence} "))
 
-            caption, header, body = self._structure_table(parsed_rows, table)
-            row_segments = self._build_row_segments(body, header)
+    def _has_keyword(self, text: str) -> bool:
+        """True when ``text`` contains a keyword outside the excluded phrases."""
+        text_lower = self._mask_excluded(text.lower())
+        return any(kw in text_lower for kw in self._keywords)
 
-            if not row_segments:
-                continue
+    def _table_sentence(self, cell_texts, extract_caption) -> str | None:
+        """Return the ``[TABLE] ... [/TABLE].`` sentence for a keyword table.
 
-            body_text = " ; ".join(row_segments)
-            if caption:
-                body_text = f"{caption}: {body_text}"
-
-            # One sentence per table: periods inside [TABLE] blocks are
-            # protected by the sentence splitter in filtering.py, so
-            # abbreviations ("Messrs.", "Inc.") and decimals survive
-            # untouched. The trailing "." after [/TABLE] is the real
-            # boundary the splitter will break on.
-            table.replace_with(NavigableString(f" [TABLE] {body_text} [/TABLE]. "))
+        ``cell_texts`` holds the text of every td/th cell per <tr> and
+        ``extract_caption`` returns the table's external caption. Returns
+        None when the table should stay prose.
+        """
+        # SEC filings frequently render bulleted paragraphs as <table>
+        # (bullet glyph in col 1, full sentence in col 2). Wrapping those
+        # in [TABLE] markers turns a readable bullet into table noise and
+        # discards any rows that don't carry the keyword. Skip the
+        # collapse so the outer get_text() pass flattens them as prose.
+        if self._is_layout_table(cell_texts):
+            return None
+
+        parsed_rows = self._parse_table_rows(cell_texts)
+        if not parsed_rows:
+            return None
+
+        caption, header, body = self._structure_table(parsed_rows, extract_caption())
+        row_segments = self._build_row_segments(body, header)
+
+        if not row_segments:
+            return None
+
+        body_text = " ; ".join(row_segments)
+        if caption:
+            body_text = f"{caption}: {body_text}"
+
+        # One sentence per table: periods inside [TABLE] blocks are
+        # protected by the sentence splitter in filtering.py, so
+        # abbreviations ("Messrs.", "Inc.") and decimals survive
+        # untouched. The trailing "." after [/TABLE] is the real
+        # boundary the splitter will break on.
+        return f"[TABLE] {body_text} [/TABLE]."
 
     # ------------------------------------------------------------------
     # Table structure helpers
     # ------------------------------------------------------------------
 
-    def _parse_table_rows(self, table):
+    def _parse_table_rows(self, cell_texts):
         """Return a list of cell-lists with noise cells removed.
 
         Empty rows (after noise filtering) are dropped, and each cell text
         has its whitespace collapsed.
         """
         parsed = []
-        for row in table.find_all("tr"):
+        for row in cell_texts:
             cells = []
-            for cell in row.find_all(["td", "th"]):
-                text = re.sub(r"\s+", " ", cell.get_text(" ", strip=True)).strip()
+            for cell in row:
+                text = re.sub(r"\s+", " ", cell).strip()
                 if not self._is_noise_cell(text):
                     cells.append(text)
             if cells:
                 parsed.append(cells)
         return parsed
 
-    def _structure_table(self, rows, table):
+    def _structure_table(self, rows, external_caption):
         """Classify rows into caption, header, and body (with section prefixes).
 
         Uses the most common *body* (digit-bearing) row width as the
@@ -221,7 +367,6 @@ class CleanTextPipeline(Config):
 
         # Caption: <caption>/preceding heading + any single-cell "title"
         # rows above the header (flattened, deduplicated).
-        external_caption = self._extract_caption(table)
         pre_header_text = " ".join(
             c for row in pre_header_rows for c in row
         ).strip().rstrip(":")
@@ -376,7 +521,7 @@ class CleanTextPipeline(Config):
     _PROSE_CELL_WORD_THRESHOLD = 15
 
     @classmethod
-    def _is_layout_table(cls, table) -> bool:
+    def _is_layout_table(cls, cell_texts) -> bool:
         """True when a <table> is used as a layout container for prose.
 
         Detects the SEC-filing pattern of rendering bulleted lists as
@@ -386,9 +531,8 @@ class CleanTextPipeline(Config):
         row counts as a single prose cell.
         """
         content_cells = []
-        for row in table.find_all("tr"):
-            for cell in row.find_all(["td", "th"]):
-                text = cell.get_text(" ", strip=True)
+        for row in cell_texts:
+            for text in row:
                 if any(ch.isalnum() for ch in text):
                     content_cells.append(text)
         if not content_cells:
@@ -409,8 +553,13 @@ class CleanTextPipeline(Config):
         """True if any cell contains a digit."""
         return any(any(ch.isdigit() for ch in c) for c in cells)
 
-    @staticmethod
-    def _extract_caption(table) -> str:
+    # Preceding sibling tags whose text may serve as a table caption.
+    _CAPTION_SIBLING_TAGS = frozenset({
+        "p", "h1", "h2", "h3", "h4", "h5", "h6", "b", "strong", "div",
+    })
+
+    @classmethod
+    def _extract_caption(cls, table) -> str:
         """Return the table's caption or a short preceding heading, if any."""
         cap = table.find("caption", recursive=False)
         if cap:
@@ -418,9 +567,7 @@ class CleanTextPipeline(Config):
             if text:
                 return text[:200]
         prev = table.find_previous_sibling()
-        if prev is not None and prev.name in {
-            "p", "h1", "h2", "h3", "h4", "h5", "h6", "b", "strong", "div",
-        }:
+        if prev is not None and prev.name in cls._CAPTION_SIBLING_TAGS:
             text = prev.get_text(" ", strip=True)
             if text and 5 < len(text) < 200:
                 return text
@@ -1,8 +1,91 @@
 """Pipeline to filter NPS mentions and extract context."""
 
 import re
+from bisect import bisect_right
 
 from nps_crawling.config import Config
+from nps_crawling.preprocessing.cleaning import HIDDEN_TEXT_TAGS
+from nps_crawling.utils.keyword_matcher import KeywordMatcher
+
+# Raw markup that may vanish from the cleaned text: comments, CDATA, tags
+# (quoted attribute values may contain ">") and elements whose text is dropped
+# (taken as a plain tag when the parser closes them implicitly). The
+# alternatives never match the same text, which keeps failing searches over
+# long runs of markup linear.
+_RAW_TAG_REST = r"""[^>"']*(?:(?:"[^"]*"|'[^']*')[^>"']*)*>"""
+_RAW_MARKUP = "<(?:" + "|".join([
+    r"!--.*?-->",
+    r"(?i:!\[CDATA\[.*?\]\]>)",
+    *(rf"(?i:{tag}\b{_RAW_TAG_REST}(?:.*?</{tag}\s*>)?)" for tag in sorted(HIDDEN_TEXT_TAGS)),
+    rf"(?!!--|(?i:!\[CDATA\[|(?:{'|'.join(sorted(HIDDEN_TEXT_TAGS))})\b)){_RAW_TAG_REST}",
+]) + ")"
+# Raw text between two words of a phrase: whitespace, entities and markup.
+_RAW_WORD_GAP = rf"(?:\s|&[#\w]+;?|{_RAW_MARKUP})+"
+
+# Trie key marking the gap between two words of a phrase
+_GAP = " "
+
+
+def _raw_char_forms(char: str) -> tuple[str, str]:
+    """Return a class of both cases of ``char`` and a pattern for a character reference to it (after the "&")."""
+    forms = sorted({char.lower(), char.upper()})
+    references = [f"#0*{ord(form)}" for form in forms]
+    references += [f"#[xX]0*(?i:{ord(form):x})" for form in forms]
+    if not (char.isascii() and char.isalnum()):
+        references.append(r"\w+")
+    return "[" + "".join(re.escape(form) for form in forms) + "]", "(?:" + "|".join(references) + ");?"
+
+
+def _raw_trie_pattern(node: dict) -> str:
+    """Pattern for the phrase endings below a trie node (None marks the end of a phrase)."""
+    alternatives = []
+    for key, child in sorted(node.items()):
+        rest = "" if child is None else _raw_trie_pattern(child)
+        if key == _GAP:
+            alternatives.append(f"{_RAW_WORD_GAP}{rest}")
+        else:
+            char_class, reference = _raw_char_forms(key)
+            alternatives.append(f"(?:{_RAW_MARKUP})*(?:{char_class}|&{reference}){rest}")
+    return alternatives[0] if len(alternatives) == 1 else f"(?:{'|'.join(alternatives)})"
+
+
+def raw_phrase_pattern(phrases) -> re.Pattern | None:
+    """Compile a case-insensitive search for ``phrases`` in raw, uncleaned HTML.
+
+    The characters of a phrase word may be written as character references
+    and split by markup the parser drops (e.g. a stray ``</b>``), but never by
+    whitespace. Words may be separated by any mix of whitespace, entities and
+    markup. The pattern therefore matches every document whose cleaned text
+    contains a phrase, and a few more. Returns None for an empty phrase list.
+
+    The phrases are merged into a trie, so shared prefixes are matched once,
+    and the pattern starts with a class of the possible first characters, so
+    the regex engine skips to candidate positions on its own.
+    """
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        keys = list(_GAP.join(phrase.lower().split()))
+        for i, key in enumerate(keys):
+            if node.get(key, {}) is None:
+                break  # a prefix of this phrase already matches
+            if i == len(keys) - 1:
+                node[key] = None  # longer phrases starting with this one are redundant
+            else:
+                node = node.setdefault(key, {})
+    if not trie:
+        return None
+
+    alternatives = []
+    first_chars = {"&"}
+    for first, child in sorted(trie.items()):
+        rest = "" if child is None else _raw_trie_pattern(child)
+        char_class, reference = _raw_char_forms(first)
+        first_chars.update({first.lower(), first.upper()})
+        alternatives.append(f"(?<={char_class}){rest}")
+        alternatives.append(f"(?<=&){reference}{rest}")
+    first_class = "[" + "".join(re.escape(char) for char in sorted(first_chars)) + "]"
+    return re.compile(f"{first_class}(?:{'|'.join(alternatives)})", re.DOTALL)
 
 
 class NpsMentionFilterPipeline(Config):
@@ -12,6 +95,9 @@ class NpsMentionFilterPipeline(Config):
         # normalize phrases to lowercase for case-insensitive matching
         self.filter_words = [p.lower() for p in Config.LIST_OF_PHRASES_TO_FILTER_FILINGS_FOR]
         self.exclude_words = [p.lower() for p in Config.LIST_OF_PHRASES_TO_EXCLUDE]
+        self._filter_matcher = KeywordMatcher(self.filter_words)
+        self._exclude_matcher = KeywordMatcher(self.exclude_words)
+        self._raw_screen = raw_phrase_pattern(self.filter_words)
 
         # Sentence splitter: split on ., !, ? followed by whitespace.
         # Cheap and good enough for SEC prose.
@@ -55,22 +141,33 @@ class NpsMentionFilterPipeline(Config):
         """
         for record in records:
             text = record.get("core_text", "")
-            sentences = self._split_into_sentences(text)
-            hits, excluded_count, filing_excluded = (
-                self._extract_context_windows_from_sentences(sentences)
+            text, starts, ends = self._sentence_offsets(text)
+            hits, excluded_count, filing_excluded = self._extract_context_windows(
+                text, starts, ends,
             )
             hits = self._deduplicate_hits(hits)
             record["context"] = hits
             record["all_context_windows"] = self._build_concatenated_context(
-                sentences, hits,
+                text, starts, ends, hits,
             )
             meta = record.setdefault("metadata", {})
             meta["Context Windows Excluded"] = excluded_count
             meta["Filing Excluded By Exclude List"] = filing_excluded
         return records
 
-    def _extract_context_windows_from_sentences(self, sentences):
-        """Extract all context windows from a list of sentences.
+    def may_contain_phrase(self, raw_text) -> bool:
+        """Pre-screen an uncleaned ``core_text`` before paying for cleaning.
+
+        False means the cleaned text cannot contain any phrase of
+        LIST_OF_PHRASES_TO_FILTER_FILINGS_FOR, so the record would get no
+        context windows. Texts that are not strings are never screened out.
+        """
+        if not isinstance(raw_text, str):
+            return True
+        return self._raw_screen is not None and self._raw_screen.search(raw_text) is not None
+
+    def _extract_context_windows(self, text, starts, ends):
+        """Extract all context windows of a text split by ``_sentence_offsets``.
 
         Returns ``(hits, excluded_count, filing_excluded)``.
 
@@ -79,23 +176,22 @@ class NpsMentionFilterPipeline(Config):
         is returned empty and ``filing_excluded`` is True. ``excluded_count``
         counts the windows that triggered exclusion.
         """
-        if not sentences:
+        if not starts:
             return [], 0, False
 
-        n = len(sentences)
+        n = len(starts)
         hits = []
         excluded_count = 0
 
-        for idx, sentence in enumerate(sentences):
-            matched_phrases = self._finding_matching_phrases(sentence)
-            if not matched_phrases:
-                continue
-
+        for idx, matched_phrases in self._matching_phrases_by_sentence(text, starts, ends):
             start, end = self._get_sentence_range(n, idx)
+            # Every phrase of the sentence shares the same window text.
+            full_context = self._WHITESPACE_RE.sub(" ", text[starts[start]:ends[end - 1]])
+            lowered_context = full_context.lower()
 
             for phrase in matched_phrases:
                 context, char_cutoff = self._create_context_window(
-                    sentences, start, end, idx, phrase,
+                    full_context, lowered_context, phrase,
                 )
                 if self._contains_excluded_phrase(context):
                     excluded_count += 1
@@ -138,17 +234,11 @@ class NpsMentionFilterPipeline(Config):
 
     def _contains_excluded_phrase(self, context: str) -> bool:
         """True if any LIST_OF_PHRASES_TO_EXCLUDE entry appears in ``context``."""
-        if not context:
-            return False
-        context_lower = context.lower()
-        return any(
-            excluded and excluded in context_lower
-            for excluded in self.exclude_words
-        )
+        return self._exclude_matcher.search(context)
 
-    def _build_concatenated_context(self, sentences, context_windows):
+    def _build_concatenated_context(self, text, starts, ends, context_windows):
         """Merge all context windows into one string without duplicate sentences."""
-        if not context_windows or not sentences:
+        if not context_windows or not starts:
             return ""
 
         # Collect all (start, end) ranges from context windows
@@ -167,38 +257,66 @@ class NpsMentionFilterPipeline(Config):
                 merged.append((start, end))
 
         # Join sentences from merged ranges, separating disjoint blocks
-        blocks = [" ".join(sentences[s:e]) for s, e in merged]
-        return " ".join(blocks)
+        return " ".join(
+            text[starts[i]:ends[i]] for s, e in merged for i in range(s, e)
+        )
 
     # Null byte stand-in for periods inside [TABLE] blocks. It survives the
-    # sentence splitter and is restored after splitting. Null bytes never
-    # occur in SEC filings, so this round-trip is safe.
+    # sentence splitter, which only sees the protected copy; sentences are
+    # cut from the text itself. Null bytes never occur in SEC filings, so
+    # this round-trip is safe.
     _PERIOD_PLACEHOLDER = "\x00"
 
-    def _split_into_sentences(self, text):
+    def _sentence_offsets(self, text):
+        """Locate the sentences of ``text`` without copying them out.
+
+        Returns ``(text, starts, ends)``: sentence ``i`` is
+        ``text[starts[i]:ends[i]]``, stripped and never empty.
+        """
         # Protect every [TABLE] ... [/TABLE] block so internal periods don't
         # fragment the table across context windows. Without this, a cell
         # like "Messrs. Norcia" or a decimal "1.37" would create a sentence
         # boundary and the table would spill out of the keyword's window.
+        # Placeholders keep every offset of ``protected`` valid in ``text``.
         protected = self._table_block_re.sub(
             lambda m: m.group(0).replace(". ", self._PERIOD_PLACEHOLDER + " "),
             text,
         )
-        sentences = self._sentence_splitter.split(protected)
-        return [
-            s.replace(self._PERIOD_PLACEHOLDER, ".").strip()
-            for s in sentences
-            if s.strip()
-        ]
-
-    def _finding_matching_phrases(self, single_sentence):
-        """Find include phrases (LIST_OF_PHRASES_TO_FILTER_FILINGS_FOR) in a sentence.
-
-        Excluded phrases are no longer masked here — exclusion is enforced
-        on the full context window in ``_extract_context_windows_from_sentences``.
+        if self._PERIOD_PLACEHOLDER in text:
+            text = text.replace(self._PERIOD_PLACEHOLDER, ".")
+
+        spans = [m.span() for m in self._sentence_splitter.finditer(protected)]
+        starts = [0, *(end for _start, end in spans)]
+        ends = [*(start for start, _end in spans), len(text)]
+        # A separator swallows all whitespace after a sentence end, so only
+        # the first and last sentence can carry whitespace to strip, and
+        # only the last one can be empty.
+        while starts[0] < ends[0] and text[starts[0]].isspace():
+            starts[0] += 1
+        while ends[-1] > starts[-1] and text[ends[-1] - 1].isspace():
+            ends[-1] -= 1
+        if starts[-1] == ends[-1]:
+            starts.pop()
+            ends.pop()
+        return text, starts, ends
+
+    def _matching_phrases_by_sentence(self, text, starts, ends):
+        """Yield ``(sentence index, phrases)`` for the sentences containing filter phrases.
+
+        Sentences are yielded in order, phrases are those of LIST_OF_PHRASES_TO_FILTER_FILINGS_FOR.
+        All phrase occurrences are found in one pass over ``text`` and
+        mapped to their sentence by offset. An occurrence running past the
+        end of its sentence does not count. Excluded phrases are not masked
+        here — exclusion is enforced on the full context window in
+        ``_extract_context_windows``.
         """
-        sentence_lower = single_sentence.lower()
-        return [phrase for phrase in self.filter_words if phrase in sentence_lower]
+        found = {}
+        for start, end, phrase in self._filter_matcher.occurrences(text):
+            idx = bisect_right(starts, start) - 1
+            if idx >= 0 and end <= ends[idx]:
+                found.setdefault(idx, set()).add(phrase)
+        for idx in sorted(found):
+            yield idx, self._filter_matcher.in_given_order(found[idx])
 
     def _get_sentence_range(self, n, idx):
         start = max(0, idx - self.sentences_before)
@@ -207,12 +325,16 @@ class NpsMentionFilterPipeline(Config):
 
     _TABLE_TOKEN_RE = re.compile(r"\[/?TABLE\]")
 
-    def _create_context_window(self, sentences, start, end, idx, phrase):
+    _WHITESPACE_RE = re.compile(r"\s+")
+
+    def _create_context_window(self, full_context, lowered_context, phrase):
         """Build a context window capped by character limits around the keyword.
 
-        Joins sentences[start:end] into a single string, locates the matched
-        phrase, then truncates to at most ``max_chars_before`` characters
-        before and ``max_chars_after`` characters after the keyword.
+        ``full_context`` holds the window's sentences with whitespace
+        collapsed, ``lowered_context`` is its lower-cased copy. Locates the
+        matched phrase, then truncates to at most ``max_chars_before``
+        characters before and ``max_chars_after`` characters after the
+        keyword.
 
         When the keyword sits inside a ``[TABLE] ... [/TABLE]`` block, the
         after-cap is stretched as needed to include the ``[/TABLE]``
@@ -224,11 +346,8 @@ class NpsMentionFilterPipeline(Config):
 
         Returns (context_string, char_cutoff_applied).
         """
-        full_context = " ".join(sentences[start:end])
-        full_context = re.sub(r'\s+', ' ', full_context).strip()
-
         # Find the keyword position in the full context (case-insensitive)
-        kw_pos = full_context.lower().find(phrase.lower())
+        kw_pos = lowered_context.find(phrase.lower())
         if kw_pos == -1:
             return full_context, False
 
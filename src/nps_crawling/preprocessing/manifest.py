@@ -0,0 +1,119 @@
+"""Manifest of a preprocessing version: which raw filings were processed with which settings."""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Any
+
+from nps_crawling.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Pipeline stages in order. A filing is processed again from the first stage
+# whose settings changed since it was stored; all later stages follow.
+STAGES: tuple[str, ...] = ("extract", "score", "split")
+
+
+def stage_settings() -> dict[str, dict[str, Any]]:
+    """Returns the settings the output of each stage depends on."""
+    return {
+        "extract": {
+            "filter_phrases": Config.LIST_OF_PHRASES_TO_FILTER_FILINGS_FOR,
+            "phrases_to_exclude": Config.LIST_OF_PHRASES_TO_EXCLUDE,
+            "context_sentences_before": Config.AMOUNT_SENTENCES_INCLUDED_BEFORE,
+            "context_sentences_after": Config.AMOUNT_SENTENCES_INCLUDED_AFTER,
+            "max_context_chars_before_keyword": Config.MAX_CONTEXT_CHARS_BEFORE_KEYWORD,
+            "max_context_chars_after_keyword": Config.MAX_CONTEXT_CHARS_AFTER_KEYWORD,
+        },
+        "score": {
+            "embedding_model": Config.SIMILARITY_EMBEDDING_MODEL,
+            "similarity_reference_text": Config.SIMILARITY_REFERENCE_TEXT,
+        },
+        "split": {
+            "similarity_threshold": Config.SIMILARITY_THRESHOLD_CONTEXT_WINDOW,
+        },
+    }
+
+
+def _settings_hash(settings: dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(settings, sort_keys=True).encode("utf-8")).hexdigest()  # noqa: S324
+
+
+class PreprocessingManifest:
+    """Record of the raw filings stored by the runs of one preprocessing version.
+
+    Per filing (by source name) the manifest keeps the content hash of the raw
+    filing, the settings hash of every stage it went through and whether the
+    similarity threshold applied to it. :meth:`first_stage` compares these with
+    the raw store and the current configuration:
+
+    - ``extract``: new or changed filings, or changed phrases or window sizes.
+      Clean, filter, score and split again.
+    - ``score``: changed embedding model or reference text, or a changed
+      threshold scope. Embed the cached context windows again, then split.
+    - ``split``: changed similarity threshold. Split the cached scores again.
+    - ``None``: the stored output is current.
+
+    The scored records of every filing are cached under ``scored/`` next to the
+    manifest, so a run can start at any stage without the stages before it.
+    """
+
+    FILE_NAME = "manifest.json"
+
+    def __init__(self, root: Path):
+        """Loads the manifest of the preprocessing version stored in ``root``."""
+        self.path: Path = Path(root) / self.FILE_NAME
+        self.cache_dir: Path = Path(root) / "scored"
+        self.settings: dict[str, dict[str, Any]] = stage_settings()
+        self.hashes: dict[str, str] = {stage: _settings_hash(self.settings[stage]) for stage in STAGES}
+        self.files: dict[str, dict[str, Any]] = {}
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.files = json.load(f).get("files", {})
+
+    def first_stage(self, name: str, content_hash: str, threshold_applied: bool) -> str | None:
+        """Returns the stage filing ``name`` has to be processed from, or None if it is current."""
+        entry = self.files.get(name)
+        if entry is None or entry["content_hash"] != content_hash or not self._cache_path(name).exists():
+            return "extract"
+        for stage in STAGES:
+            if entry.get(stage) != self.hashes[stage]:
+                return stage
+            if stage == "score" and entry.get("threshold_applied") != threshold_applied:
+                return stage
+        return None
+
+    def record(self, name: str, content_hash: str, threshold_applied: bool, records: list[dict]) -> None:
+        """Caches the scored ``records`` of filing ``name`` and marks it as processed with the current settings."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with open(self._cache_path(name), "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False)
+        self.files[name] = {
+            "content_hash": content_hash,
+            **self.hashes,
+            "threshold_applied": threshold_applied,
+        }
+
+    def cached_records(self, name: str) -> list[dict]:
+        """Returns the scored records cached for filing ``name``."""
+        with open(self._cache_path(name), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save(self) -> None:
+        """Writes the manifest, replacing the previous one only once it is complete."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp: Path = self.path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "stages": {
+                    stage: {"hash": self.hashes[stage], "settings": self.settings[stage]} for stage in STAGES
+                },
+                "files": self.files,
+            }, f, ensure_ascii=False, indent=2)
+        tmp.replace(self.path)
+        logger.info("Preprocessing manifest with %d filings written to %s", len(self.files), self.path)
+
+    def _cache_path(self, name: str) -> Path:
+        return self.cache_dir / f"{name}.json"
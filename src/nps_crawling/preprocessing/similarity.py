@@ -1,6 +1,7 @@
 """Pipeline to score context windows via semantic similarity against a reference NPS description."""
 
 import logging
+from functools import cached_property
 
 # silence errors
 import transformers
@@ -30,8 +31,9 @@ def _detect_device():
 class SimilarityPipeline:
     """Scores each context window by cosine similarity to a reference NPS text.
 
-    Embeds the reference text once at init time.  For every record that has
-    context windows, each window is embedded and compared.
+    Loads the embedding model and embeds the reference text once, on first use.
+    For every record that has context windows, each window is embedded and
+    compared.
 
     Decision logic
     --------------
@@ -44,7 +46,15 @@ class SimilarityPipeline:
     """
 
     def __init__(self):
-        """Initialize embedding model and pre-compute the reference embedding."""
+        """Initialize the threshold. The embedding model is loaded on first use."""
+        self.threshold_context = Config.SIMILARITY_THRESHOLD_CONTEXT_WINDOW
+
+    @cached_property
+    def embeddings(self):
+        """The embedding model, loaded when the first text is embedded.
+
+        Runs that only split cached scores never load it.
+        """
         device = _detect_device()
         batch_size = 512 if device == "cuda" else 64
 
@@ -52,19 +62,21 @@ class SimilarityPipeline:
             "Loading embedding model '%s' on %s (batch_size=%d) …",
             Config.SIMILARITY_EMBEDDING_MODEL, device, batch_size,
         )
-        self.embeddings = HuggingFaceEmbeddings(
+        embeddings = HuggingFaceEmbeddings(
             model_name=Config.SIMILARITY_EMBEDDING_MODEL,
             model_kwargs={"device": device},
             encode_kwargs={"batch_size": batch_size},
         )
-        self.reference_embedding = np.array(
-            self.embeddings.embed_query(Config.SIMILARITY_REFERENCE_TEXT),
-        )
-        self.threshold_context = Config.SIMILARITY_THRESHOLD_CONTEXT_WINDOW
         logger.info(
             "Similarity pipeline ready (device=%s, window threshold=%.2f)",
             device, self.threshold_context,
         )
+        return embeddings
+
+    @cached_property
+    def reference_embedding(self):
+        """Embedding of the reference text, computed once."""
+        return np.array(self.embeddings.embed_query(Config.SIMILARITY_REFERENCE_TEXT))
 
     # ------------------------------------------------------------------
     # Public helpers used by the chunked pipeline in utils.py
@@ -43,10 +43,13 @@ class SaveToJSONPipeline(Config):
         for record in records_to_save:
             record.pop("core_text", None)
 
-        # Save preprocessed json, only if there's anything to save
+        # Save preprocessed json, only if there's anything to save. Otherwise
+        # drop the output of an earlier run for the same source.
         if records_to_save:
             with open(out_path, "w", encoding="utf-8") as f:
                 json.dump(records_to_save, f, ensure_ascii=False, indent=2)
+        else:
+            out_path.unlink(missing_ok=True)
 
         # Update the path in the database for each record saved in this batch
         if update_db and hasattr(self, 'db') and self.db is not None:
@@ -3,9 +3,11 @@
 import json
 import logging
 import os
+import queue
+import threading
 import time
-from concurrent.futures import ProcessPoolExecutor
-from pathlib import Path
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
 
 import matplotlib
 matplotlib.use('Agg')
@@ -14,9 +16,11 @@ from tqdm import tqdm
 
 from nps_crawling.config import Config
 from nps_crawling.db.db_adapter import DbAdapter
+from nps_crawling.utils.raw_store import create_raw_store
 
 from .cleaning import CleanTextPipeline
 from .filtering import NpsMentionFilterPipeline
+from .manifest import STAGES, PreprocessingManifest
 from .similarity import SimilarityPipeline
 from .storage import SaveToJSONPipeline
 
@@ -28,31 +32,40 @@ logger = logging.getLogger(__name__)
 
 _worker_cleaner = None
 _worker_filter = None
+_worker_store = None
 
 
-def _init_worker():
-    """Create per-process cleaner and filter instances (called once per worker)."""
-    global _worker_cleaner, _worker_filter  # noqa: PLW0603
+def _init_worker(store_kind, store_root):
+    """Create per-process cleaner, filter and raw store instances (called once per worker)."""
+    global _worker_cleaner, _worker_filter, _worker_store  # noqa: PLW0603
     _worker_cleaner = CleanTextPipeline()
     _worker_filter = NpsMentionFilterPipeline()
+    _worker_store = create_raw_store(store_kind, store_root)
 
 
 def _process_single_file(file_path):
-    """Load, clean, and filter one JSON file.
+    """Load, clean, and filter one raw filing.
 
+    ``file_path`` is a key of the raw store (a file path for the JSON store).
     Returns ``(file_path, records)`` on success, or ``None`` on error / empty.
     ``core_text`` is dropped from every record before returning to free memory.
     """
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            records = json.load(f)
-    except json.JSONDecodeError:
-        return None
+    records = _worker_store.get(file_path)
 
     if not records:
         return None
 
-    records = _worker_cleaner.cleaning_workflow(records)
+    # Records whose raw text cannot contain a filter phrase skip the HTML
+    # parsing. Filtering their emptied text gives the same "no context"
+    # result the cleaned text would have given.
+    candidates = []
+    for record in records:
+        if not Config.PREPROCESS_RAW_PRESCREEN or _worker_filter.may_contain_phrase(record.get("core_text")):
+            candidates.append(record)
+        else:
+            record["core_text"] = ""
+
+    _worker_cleaner.cleaning_workflow(candidates)
     records = _worker_filter.filtering_workflow(records)
 
     # core_text is no longer needed after filtering — drop it to save memory
@@ -63,27 +76,121 @@ def _process_single_file(file_path):
     return (file_path, records)
 
 
+# ---------------------------------------------------------------------------
+# Streaming stages
+# ---------------------------------------------------------------------------
+
+# End marker put into a stage queue by the stage before it
+_DONE = object()
+
+
+class _StageQueue(queue.Queue):
+    """Bounded queue between two pipeline stages, ``closed`` once the end marker was taken."""
+
+    closed = False
+
+    def _get(self):
+        item = super()._get()
+        if item is _DONE:
+            self.closed = True
+        return item
+
+
+@dataclass
+class _PreprocessingStats:
+    """Aggregate statistics of a preprocessing run, collected by the store stage."""
+
+    filings_total: int = 0
+    filings_accepted: int = 0
+    filings_accepted_fully: int = 0
+    filings_rejected: int = 0
+    filings_rejected_fully: int = 0
+    total_context_windows_accepted: int = 0
+    total_context_windows_rejected: int = 0
+    scoped_context_windows_accepted: int = 0
+    scoped_context_windows_rejected: int = 0
+    total_context_windows_excluded: int = 0
+    filings_excluded_by_exclude_list: int = 0
+    filings_skipped_no_context: int = 0
+    all_similarity_scores: list = field(default_factory=list)
+    all_filings_averages: list = field(default_factory=list)
+
+    def add(self, records):
+        """Collect per-record statistics of one stored file."""
+        for record in records:
+            meta = record.get("metadata", {})
+            cw_accept = meta.get("Context Windows Accept", 0)
+            cw_reject = meta.get("Context Windows Reject", 0)
+            cw_total = meta.get("Context Windows total", 0)
+            cw_excluded = meta.get("Context Windows Excluded", 0)
+
+            self.total_context_windows_excluded += cw_excluded
+
+            if meta.get("Filing Excluded By Exclude List"):
+                self.filings_excluded_by_exclude_list += 1
+                continue
+
+            if cw_total == 0:
+                self.filings_skipped_no_context += 1
+                continue
+
+            self.filings_total += 1
+            self.total_context_windows_accepted += cw_accept
+            self.total_context_windows_rejected += cw_reject
+            if meta.get("threshold_applied", True):
+                self.scoped_context_windows_accepted += cw_accept
+                self.scoped_context_windows_rejected += cw_reject
+
+            if cw_accept > 0:
+                self.filings_accepted += 1
+            if cw_accept == cw_total:
+                self.filings_accepted_fully += 1
+            if cw_reject > 0:
+                self.filings_rejected += 1
+            if cw_reject == cw_total:
+                self.filings_rejected_fully += 1
+
+            for ctx in record.get("context", []):
+                if "similarity_score" in ctx:
+                    self.all_similarity_scores.append(ctx["similarity_score"])
+
+            if "filings_average" in record:
+                self.all_filings_averages.append(record["filings_average"])
+
+
 class PreProcessingPipeline(Config):
     """Pre-processing pipeline class to clean, filter, and store data.
 
     Pipeline per file
     -----------------
-    1. **Clean** – HTML/XML → plain text.
+    1. **Clean** – HTML/XML → plain text. Skipped for records whose raw text
+       cannot contain a filter phrase.
     2. **Filter** – extract context windows around NPS-related phrases.
     3. **Score** – semantic similarity of each window against a reference text.
     4. **Split** – splits contexts based on threshold.
     5. **Store** – high-scoring contexts go to ``json_processed/``; low-scoring
        contexts go to ``json_reject/``. Both are saved.
+
+    The steps run as a streaming pipeline: a persistent process pool cleans and
+    filters, one thread batch-embeds and scores, another thread splits and stores.
+    All stages work at the same time on different files.
+
+    Runs are incremental: a :class:`PreprocessingManifest` per version records
+    the content hash of every stored raw file and the settings of every stage.
+    Only new or changed files are cleaned and filtered. Files whose scoring or
+    split settings changed re-enter the pipeline at that stage from their cached
+    scored records, all others are only counted in the summary.
     """
 
-    # Number of files per processing chunk.  Controls peak memory: all
-    # cleaned/filtered records for one chunk are held in RAM while their
-    # context windows are batch-embedded on the GPU.
+    # Number of files buffered between two stages.  Controls peak memory: a
+    # slower stage pauses the stages before it once its queue is full.
     FILES_PER_CHUNK = Config.PREPROCESS_FILES_PER_CHUNK
+    # Number of context windows embedded at once when files are waiting.
+    EMBED_BATCH_SIZE = Config.PREPROCESS_EMBED_BATCH_SIZE
 
     def __init__(self):
         """Initialize the PreProcessingPipeline."""
-        self.json_raw_dir = Config.RAW_JSON_PATH_CRAWLER / "files"
+        self.raw_store = create_raw_store()
 
         # Create version-specific directories on demand
         Config.NPS_CONTEXT_JSON_PATH.mkdir(parents=True, exist_ok=True)
@@ -103,11 +210,15 @@ class PreProcessingPipeline(Config):
             DbAdapter() if (self._keyword_filter or self._threshold_scope) else None
         )
 
-    def pre_processing_workflow(self):
-        """Run the full pre-processing workflow over all raw JSON files."""
+    def pre_processing_workflow(self, force=False):
+        """Run the pre-processing workflow over all raw filings.
+
+        Args:
+            force: process every file from the start, ignoring the manifest.
+        """
         start_time = time.time()
 
-        json_files = sorted(self.json_raw_dir.glob("*.json"))
+        json_files = self.raw_store.keys()
         if not json_files:
             logger.info("No raw JSON files found to process")
             return None
@@ -121,155 +232,59 @@ class PreProcessingPipeline(Config):
                 logger.info("No files passed the keyword filter")
                 return None
 
+        manifest = PreprocessingManifest(Config.NPS_CONTEXT_JSON_PATH)
+        runs, content_hashes = self._plan_runs(json_files, apply_threshold_map, manifest, force)
+
         # Determine worker count — leave one core free for the main process.
         max_workers = max(1, (os.cpu_count() or 1) - 1)
+        buffer_files = max(1, self.FILES_PER_CHUNK)
         logger.info(
-            "Starting preprocessing: %d files, %d CPU workers, chunk_size=%d",
-            len(json_files), max_workers, self.FILES_PER_CHUNK,
+            "Starting preprocessing: %d files (%d to extract, %d to re-score, %d to re-split, %d current), "
+            "%d CPU workers, buffer=%d files, embed_batch_size=%d",
+            len(json_files), len(runs["extract"]), len(runs["score"]), len(runs["split"]), len(runs[None]),
+            max_workers, buffer_files, self.EMBED_BATCH_SIZE,
         )
 
-        # ---- Aggregate statistics ----
-        filings_total = 0
-        filings_accepted = 0
-        filings_accepted_fully = 0
-        filings_rejected = 0
-        filings_rejected_fully = 0
-        total_context_windows_accepted = 0
-        total_context_windows_rejected = 0
-        scoped_context_windows_accepted = 0
-        scoped_context_windows_rejected = 0
-        total_context_windows_excluded = 0
-        filings_excluded_by_exclude_list = 0
-        filings_skipped_no_context = 0
-        all_similarity_scores = []
-        all_filings_averages = []
-
-        total_files = len(json_files)
-        progress = tqdm(total=total_files, desc="Pre-processing documents", unit="file")
-
-        for chunk_start in range(0, total_files, self.FILES_PER_CHUNK):
-            chunk_files = json_files[chunk_start : chunk_start + self.FILES_PER_CHUNK]
-
-            # ----------------------------------------------------------
-            # Phase 1: Parallel clean + filter (CPU-bound, multiprocess)
-            # ----------------------------------------------------------
-            file_results = []  # list of (Path, records_list)
-            with ProcessPoolExecutor(
-                max_workers=max_workers,
-                initializer=_init_worker,
-            ) as pool:
-                for result in pool.map(_process_single_file, chunk_files):
-                    progress.update(1)
-                    if result is not None:
-                        file_results.append(result)
-
-            if not file_results:
-                continue
-
-            # ----------------------------------------------------------
-            # Phase 2: Batch-embed all context windows in this chunk
-            # ----------------------------------------------------------
-            all_texts = []
-            index_map = []  # (file_result_idx, record_idx, context_idx)
-
-            for fr_idx, (path, records) in enumerate(file_results):
-                file_apply_threshold = apply_threshold_map.get(path, True)
-                for rec_idx, record in enumerate(records):
-                    if "metadata" not in record:
-                        record["metadata"] = {}
-                    record["metadata"]["experiment"] = Config.PREPROCESSING_VERSION
-                    record["metadata"]["threshold_applied"] = file_apply_threshold
-                    contexts = record.get("context", [])
-                    record["metadata"]["Context Windows total"] = len(contexts)
-                    if not contexts:
-                        record["metadata"]["Context Windows Accept"] = 0
-                        record["metadata"]["Context Windows Reject"] = 0
-                        continue
-                    # Skip embedding for filings outside the threshold scope:
-                    # their windows are auto-accepted regardless of score.
-                    if not file_apply_threshold:
-                        continue
-                    for ctx_idx, ctx in enumerate(contexts):
-                        all_texts.append(ctx["context"])
-                        index_map.append((fr_idx, rec_idx, ctx_idx))
-
-            if all_texts:
-                all_scores = self.similarity.embed_and_score(all_texts)
-                for i, (fr_idx, rec_idx, ctx_idx) in enumerate(index_map):
-                    file_results[fr_idx][1][rec_idx]["context"][ctx_idx][
-                        "similarity_score"
-                    ] = round(float(all_scores[i]), 4)
-
-            # ----------------------------------------------------------
-            # Phase 3: Per-file metadata, split, store, collect stats
-            # ----------------------------------------------------------
-            for file_path, records in file_results:
-                self.similarity.compute_record_metadata(records)
-                accepted_records, rejected_records = self.similarity.split_records(
-                    records,
-                )
-
-                self.storage.storage_workflow(
-                    accepted_records,
-                    source_filename=Path(file_path).stem,
-                    reject=False,
-                    update_db=True,
-                )
-                self.storage.storage_workflow(
-                    rejected_records,
-                    source_filename=Path(file_path).stem,
-                    reject=True,
-                    update_db=False,
-                )
-
-                # Collect per-record statistics
-                for record in records:
-                    meta = record.get("metadata", {})
-                    cw_accept = meta.get("Context Windows Accept", 0)
-                    cw_reject = meta.get("Context Windows Reject", 0)
-                    cw_total = meta.get("Context Windows total", 0)
-                    cw_excluded = meta.get("Context Windows Excluded", 0)
-
-                    total_context_windows_excluded += cw_excluded
-
-                    if meta.get("Filing Excluded By Exclude List"):
-                        filings_excluded_by_exclude_list += 1
-                        continue
-
-                    if cw_total == 0:
-                        filings_skipped_no_context += 1
-                        continue
-
-                    filings_total += 1
-                    total_context_windows_accepted += cw_accept
-                    total_context_windows_rejected += cw_reject
-                    if meta.get("threshold_applied", True):
-                        scoped_context_windows_accepted += cw_accept
-                        scoped_context_windows_rejected += cw_reject
-
-                    if cw_accept > 0:
-                        filings_accepted += 1
-                    if cw_accept == cw_total:
-                        filings_accepted_fully += 1
-                    if cw_reject > 0:
-                        filings_rejected += 1
-                    if cw_reject == cw_total:
-                        filings_rejected_fully += 1
+        stats = _PreprocessingStats()
+        progress = tqdm(total=len(json_files) - len(runs[None]), desc="Pre-processing documents", unit="file")
+
+        # clean + filter (process pool) -> embed + score (thread) -> store (thread)
+        to_embed = _StageQueue(maxsize=buffer_files)
+        to_store = _StageQueue(maxsize=buffer_files)
+        errors = []
+        stages = [
+            threading.Thread(target=self._run_stage, name="preprocess-embed",
+                             args=(self._embed_stage, to_embed, to_store, errors, apply_threshold_map)),
+            threading.Thread(target=self._run_stage, name="preprocess-store",
+                             args=(self._store_stage, to_store, None, errors, stats, manifest, content_hashes,
+                                   apply_threshold_map)),
+        ]
+        for stage in stages:
+            stage.start()
+
+        try:
+            self._clean_stage(runs["extract"], to_embed, max_workers, progress, errors)
+            # Cached files re-enter the pipeline at the first stage they need
+            self._replay_cached(runs["score"], to_embed, manifest, progress, errors, rescore=True)
+            self._replay_cached(runs["split"], to_store, manifest, progress, errors)
+        finally:
+            to_embed.put(_DONE)
+            for stage in stages:
+                stage.join()
+            progress.close()
+            manifest.save()
+        if errors:
+            raise errors[0]
+
+        # Current files only count towards the summary of the whole version
+        for file_path in runs[None]:
+            stats.add(manifest.cached_records(self.raw_store.source_name(file_path)))
 
-                    for ctx in record.get("context", []):
-                        if "similarity_score" in ctx:
-                            all_similarity_scores.append(ctx["similarity_score"])
-
-                    if "filings_average" in record:
-                        all_filings_averages.append(record["filings_average"])
-
-            # Free chunk data before processing the next chunk
-            del file_results, all_texts, index_map
-
-        progress.close()
         elapsed_seconds = round(time.time() - start_time, 2)
 
         # ---- Write experiment summary JSON ----
+        scores: list[float] = stats.all_similarity_scores
+        averages: list[float] = stats.all_filings_averages
         summary = {
             "preprocessing_duration_seconds": elapsed_seconds,
             "experiment_setup": {
@@ -286,26 +301,34 @@ class PreProcessingPipeline(Config):
                 "threshold_keyword_scope": Config.THRESHOLD_KEYWORD_SCOPE,
                 "threshold_keyword_scope_strict": Config.THRESHOLD_KEYWORD_SCOPE_STRICT,
             },
+            "incremental_run": {
+                "forced": force,
+                "files_extracted": len(runs["extract"]),
+                "files_rescored": len(runs["score"]),
+                "files_resplit": len(runs["split"]),
+                "files_current": len(runs[None]),
+            },
             "processed_filings": {
-                "filings_to_be_processed_total": filings_total + filings_excluded_by_exclude_list + filings_skipped_no_context,
-                "filings_excluded_by_exclude_list": filings_excluded_by_exclude_list,
-                "filings_skipped_no_context": filings_skipped_no_context,
-                "filings_processed_total": filings_total,
-                "filings_accepted_total": filings_accepted,
-                "filings_accepted_full": filings_accepted_fully,
-                "filings_accepted_partial": filings_accepted - filings_accepted_fully,
-                "filings_rejected_total": filings_rejected,
-                "filings_rejected_full": filings_rejected_fully,
-                "filings_rejected_partial": filings_rejected - filings_rejected_fully,
-                "context_windows_accepted": total_context_windows_accepted,
-                "context_windows_rejected": total_context_windows_rejected,
-                "context_windows_excluded_by_exclude_list": total_context_windows_excluded,
-                "lowest_similarity_context": round(min(all_similarity_scores), 4) if all_similarity_scores else None,
-                "highest_similarity_context": round(max(all_similarity_scores), 4) if all_similarity_scores else None,
-                "average_similarity_context": round(sum(all_similarity_scores) / len(all_similarity_scores), 4) if all_similarity_scores else None,
-                "lowest_similarity_filing": round(min(all_filings_averages), 4) if all_filings_averages else None,
-                "highest_similarity_filing": round(max(all_filings_averages), 4) if all_filings_averages else None,
-                "average_similarity_filing": round(sum(all_filings_averages) / len(all_filings_averages), 4) if all_filings_averages else None,
+                "filings_to_be_processed_total": (stats.filings_total + stats.filings_excluded_by_exclude_list
+                                                  + stats.filings_skipped_no_context),
+                "filings_excluded_by_exclude_list": stats.filings_excluded_by_exclude_list,
+                "filings_skipped_no_context": stats.filings_skipped_no_context,
+                "filings_processed_total": stats.filings_total,
+                "filings_accepted_total": stats.filings_accepted,
+                "filings_accepted_full": stats.filings_accepted_fully,
+                "filings_accepted_partial": stats.filings_accepted - stats.filings_accepted_fully,
+                "filings_rejected_total": stats.filings_rejected,
+                "filings_rejected_full": stats.filings_rejected_fully,
+                "filings_rejected_partial": stats.filings_rejected - stats.filings_rejected_fully,
+                "context_windows_accepted": stats.total_context_windows_accepted,
+                "context_windows_rejected": stats.total_context_windows_rejected,
+                "context_windows_excluded_by_exclude_list": stats.total_context_windows_excluded,
+                "lowest_similarity_context": round(min(scores), 4) if scores else None,
+                "highest_similarity_context": round(max(scores), 4) if scores else None,
+                "average_similarity_context": round(sum(scores) / len(scores), 4) if scores else None,
+                "lowest_similarity_filing": round(min(averages), 4) if averages else None,
+                "highest_similarity_filing": round(max(averages), 4) if averages else None,
+                "average_similarity_filing": round(sum(averages) / len(averages), 4) if averages else None,
             },
         }
 
@@ -313,9 +336,9 @@ class PreProcessingPipeline(Config):
         with open(summary_path, "w", encoding="utf-8") as f:
             json.dump(summary, f, ensure_ascii=False, indent=2)
 
-        if all_similarity_scores:
+        if stats.all_similarity_scores:
             plt.figure(figsize=(10, 6))
-            N, bins, patches = plt.hist(all_similarity_scores, bins=50, edgecolor='black')
+            N, bins, patches = plt.hist(stats.all_similarity_scores, bins=50, edgecolor='black')
 
             for i in range(len(patches)):
                 bin_mid = (bins[i] + bins[i + 1]) / 2
@@ -327,14 +350,17 @@ class PreProcessingPipeline(Config):
             title_main = f"Similarity Score Distribution (Experiment: {Config.PREPROCESSING_VERSION})"
             if Config.THRESHOLD_KEYWORD_SCOPE is not None:
                 scope_str = ", ".join(Config.THRESHOLD_KEYWORD_SCOPE)
-                title_sub = f"context_windows_accepted: {scoped_context_windows_accepted}, context_windows_rejected: {scoped_context_windows_rejected}"
+                title_sub = (f"context_windows_accepted: {stats.scoped_context_windows_accepted}, "
+                             f"context_windows_rejected: {stats.scoped_context_windows_rejected}")
                 title_scope = f"Threshold scope: {scope_str} (scored windows only)"
                 plt.title(f"{title_main}\n{title_sub}\n{title_scope}", fontsize=12)
             else:
-                title_sub = f"context_windows_accepted: {total_context_windows_accepted}, context_windows_rejected: {total_context_windows_rejected}"
+                title_sub = (f"context_windows_accepted: {stats.total_context_windows_accepted}, "
+                             f"context_windows_rejected: {stats.total_context_windows_rejected}")
                 plt.title(f"{title_main}\n{title_sub}", fontsize=12)
 
-            plt.axvline(Config.SIMILARITY_THRESHOLD_CONTEXT_WINDOW, color='darkred', linestyle='dashed', linewidth=2, label='Threshold')
+            plt.axvline(Config.SIMILARITY_THRESHOLD_CONTEXT_WINDOW, color='darkred', linestyle='dashed', linewidth=2,
+                        label='Threshold')
             plt.legend()
 
             plt.xlabel("Similarity Score")
@@ -352,18 +378,195 @@ class PreProcessingPipeline(Config):
             "%d rejected (%d full, %d partial). "
             "Context windows: %d accepted, %d rejected.",
             Config.PREPROCESSING_VERSION,
-            filings_total,
-            filings_accepted, filings_accepted_fully, filings_accepted - filings_accepted_fully,
-            filings_rejected, filings_rejected_fully, filings_rejected - filings_rejected_fully,
-            total_context_windows_accepted, total_context_windows_rejected,
+            stats.filings_total,
+            stats.filings_accepted, stats.filings_accepted_fully, stats.filings_accepted - stats.filings_accepted_fully,
+            stats.filings_rejected, stats.filings_rejected_fully, stats.filings_rejected - stats.filings_rejected_fully,
+            stats.total_context_windows_accepted, stats.total_context_windows_rejected,
         )
 
         return None
 
+    # ------------------------------------------------------------------
+    # Pipeline stages
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _run_stage(stage, inbox, outbox, errors, *args):
+        """Run a stage thread. A failed stage keeps draining its inbox so the stages before it never block."""
+        try:
+            stage(inbox, outbox, *args)
+        except Exception as e:
+            logger.exception("Preprocessing stage %s failed", threading.current_thread().name)
+            errors.append(e)
+            if outbox is not None:
+                outbox.put(_DONE)
+            while not inbox.closed:
+                inbox.get()
+
+    def _clean_stage(self, json_files, outbox, max_workers, progress, errors):
+        """Clean and filter files in one persistent process pool, two files per worker in flight."""
+        files = iter(json_files)
+        pending = set()
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(self.raw_store.kind, self.raw_store.root),
+        ) as pool:
+            while True:
+                # Stop feeding the pool once a later stage failed
+                while len(pending) < 2 * max_workers and not errors:
+                    file_path = next(files, _DONE)
+                    if file_path is _DONE:
+                        break
+                    pending.add(pool.submit(_process_single_file, file_path))
+                if not pending:
+                    return
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    progress.update(1)
+                    result = future.result()
+                    if result is not None:
+                        outbox.put(result)
+
+    def _replay_cached(self, json_files, outbox, manifest, progress, errors, rescore=False):
+        """Feed the cached scored records of ``json_files`` into a later stage.
+
+        With ``rescore`` the old similarity scores are dropped first, so the
+        embed stage scores the windows again.
+        """
+        for file_path in json_files:
+            # Stop feeding once a later stage failed
+            if errors:
+                return
+            records = manifest.cached_records(self.raw_store.source_name(file_path))
+            if rescore:
+                for record in records:
+                    record.pop("filings_average", None)
+                    for ctx in record.get("context", []):
+                        ctx.pop("similarity_score", None)
+            progress.update(1)
+            outbox.put((file_path, records))
+
+    def _embed_stage(self, inbox, outbox, apply_threshold_map):
+        """Score the context windows of cleaned files in batches.
+
+        Waits for the next file, then also takes the files that are already queued,
+        up to ``EMBED_BATCH_SIZE`` context windows: batches grow when the embedder is
+        the bottleneck and stay small while it waits for the cleaning stage.
+        """
+        done = False
+        while not done:
+            batch = []
+            texts = 0
+            item = inbox.get()
+            while item is not _DONE:
+                batch.append(item)
+                texts += sum(len(record.get("context", [])) for record in item[1])
+                if texts >= self.EMBED_BATCH_SIZE:
+                    break
+                try:
+                    item = inbox.get_nowait()
+                except queue.Empty:
+                    break
+            done = item is _DONE
+
+            if batch:
+                self._score_files(batch, apply_threshold_map)
+                for file_result in batch:
+                    outbox.put(file_result)
+        outbox.put(_DONE)
+
+    def _score_files(self, file_results, apply_threshold_map):
+        """Batch-embed all context windows of ``file_results`` and set their similarity scores."""
+        all_texts = []
+        index_map = []  # (file_result_idx, record_idx, context_idx)
+
+        for fr_idx, (path, records) in enumerate(file_results):
+            file_apply_threshold = apply_threshold_map.get(path, True)
+            for rec_idx, record in enumerate(records):
+                if "metadata" not in record:
+                    record["metadata"] = {}
+                record["metadata"]["experiment"] = Config.PREPROCESSING_VERSION
+                record["metadata"]["threshold_applied"] = file_apply_threshold
+                contexts = record.get("context", [])
+                record["metadata"]["Context Windows total"] = len(contexts)
+                if not contexts:
+                    record["metadata"]["Context Windows Accept"] = 0
+                    record["metadata"]["Context Windows Reject"] = 0
+                    continue
+                # Skip embedding for filings outside the threshold scope:
+                # their windows are auto-accepted regardless of score.
+                if not file_apply_threshold:
+                    continue
+                for ctx_idx, ctx in enumerate(contexts):
+                    all_texts.append(ctx["context"])
+                    index_map.append((fr_idx, rec_idx, ctx_idx))
+
+        if all_texts:
+            all_scores = self.similarity.embed_and_score(all_texts)
+            for i, (fr_idx, rec_idx, ctx_idx) in enumerate(index_map):
+                file_results[fr_idx][1][rec_idx]["context"][ctx_idx][
+                    "similarity_score"
+                ] = round(float(all_scores[i]), 4)
+
+    def _store_stage(self, inbox, outbox, stats, manifest, content_hashes, apply_threshold_map):
+        """Split scored files into accepted and rejected contexts, store both and collect statistics.
+
+        Stored files are recorded in the manifest together with their scored records.
+        """
+        while (item := inbox.get()) is not _DONE:
+            file_path, records = item
+            self.similarity.compute_record_metadata(records)
+            accepted_records, rejected_records = self.similarity.split_records(
+                records,
+            )
+
+            self.storage.storage_workflow(
+                accepted_records,
+                source_filename=self.raw_store.source_name(file_path),
+                reject=False,
+                update_db=True,
+            )
+            self.storage.storage_workflow(
+                rejected_records,
+                source_filename=self.raw_store.source_name(file_path),
+                reject=True,
+                update_db=False,
+            )
+            manifest.record(
+                self.raw_store.source_name(file_path),
+                content_hashes[file_path],
+                apply_threshold_map.get(file_path, True),
+                records,
+            )
+            stats.add(records)
+
     # ------------------------------------------------------------------
     # Helpers
     # ------------------------------------------------------------------
 
+    def _plan_runs(self, json_files, apply_threshold_map, manifest, force):
+        """Decide for every file the stage it has to be processed from.
+
+        Returns:
+            tuple[dict, dict]: raw store keys per first stage (``None`` for
+            current files), and a ``{key: content_hash}`` map.
+        """
+        runs = {stage: [] for stage in (*STAGES, None)}
+        content_hashes = {}
+        for json_file in tqdm(json_files, desc="Checking for changes", unit="file"):
+            content_hashes[json_file] = self.raw_store.content_hash(json_file)
+            if force:
+                stage = "extract"
+            else:
+                stage = manifest.first_stage(
+                    self.raw_store.source_name(json_file),
+                    content_hashes[json_file],
+                    apply_threshold_map.get(json_file, True),
+                )
+            runs[stage].append(json_file)
+        return runs, content_hashes
+
     def _resolve_files_and_scopes(self, json_files):
         """Decide per-file inclusion AND whether the similarity threshold applies.
 
@@ -377,8 +580,8 @@ class PreProcessingPipeline(Config):
             threshold applies to every kept file (legacy behavior).
 
         Returns:
-            tuple[list[Path], dict[Path, bool]]: kept files, and a
-            ``{path: apply_threshold}`` map. Paths not present in the map
+            tuple[list, dict]: kept raw store keys, and a
+            ``{key: apply_threshold}`` map. Keys not present in the map
             default to ``True`` (apply threshold).
         """
         if isinstance(self._keyword_filter, list):
@@ -398,16 +601,9 @@ class PreProcessingPipeline(Config):
         scope_apply_count = 0
 
         for json_file in tqdm(json_files, desc="Checking keyword filter", unit="file"):
-            try:
-                with open(json_file, "r", encoding="utf-8") as f:
-                    records = json.load(f)
-            except json.JSONDecodeError:
-                continue
-            if not records:
-                continue
-            filing_id = records[0].get("metadata", {}).get("filing", {}).get("id")
+            filing_id = self.raw_store.filing_id(json_file)
             if not filing_id:
-                logger.warning("No filing id in %s — skipping", json_file.name)
+                logger.warning("No filing id in %s — skipping", self.raw_store.source_name(json_file))
                 continue
             raw_keywords = self._db.return_keywords(filing_id)
             cleaned_keywords = [k.strip("\"'").lower() for k in raw_keywords]
@@ -429,7 +625,7 @@ class PreProcessingPipeline(Config):
             if not include:
                 logger.debug(
                     "Skipping %s — keywords %s don't match single-keyword filter '%s'",
-                    json_file.name, cleaned_keywords, self._keyword_filter,
+                    self.raw_store.source_name(json_file), cleaned_keywords, self._keyword_filter,
                 )
                 continue
 
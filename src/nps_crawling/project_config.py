@@ -28,7 +28,39 @@ def deep_merge(base: dict[str, Any], override: dict[str, Any]) -> dict[str, Any]
 DEFAULT_CRAWL_CONFIG: dict[str, Any] = {
     "query_path": "query",
     "sec_query_limit_count": 10_000,
-    "download_delay": 0.2,
+    "download_delay": 0.0,
+    "sec_requests_per_second": 10.0,
+    "sec_min_requests_per_second": 0.5,
+    "prefetch_max_concurrency": 8,
+    "prefetch_max_retries": 5,
+    "prefetch_cache_ttl_hours": 24,
+    "ticker_cache_ttl_hours": 24,
+    "offline": False,
+    "sec_base_url": None,
+    "response_cache": True,
+    "db_flush_items": 100,
+    "db_flush_seconds": 10.0,
+    "raw_store": "json",
+    "incremental": False,
+    "merge_queries": False,
+    "queue_batch_size": 50,
+    "queue_lease_seconds": 600.0,
+    "queue_max_attempts": 3,
+    "queue_workers": 1,
+    "bulk_chunk_size": 50_000,
+    "event_bus_queued": True,
+    "event_coalesce_seconds": 0.2,
+    "pdf_workers": 2,
+    "pdf_max_pages": 0,
+    "pdf_max_bytes": 50 * 1024 * 1024,
+    "download_truncate_bytes": {
+        "htm": 64 * 1024 * 1024,
+        "html": 64 * 1024 * 1024,
+        "txt": 64 * 1024 * 1024,
+        "xml": 64 * 1024 * 1024,
+    },
+    "download_warn_bytes": 16 * 1024 * 1024,
+    "pdf_stop_on_keyword": False,
 }
 
 DEFAULT_PREPROCESS_CONFIG: dict[str, Any] = {
@@ -91,6 +123,9 @@ DEFAULT_PREPROCESS_CONFIG: dict[str, Any] = {
     "max_context_chars_before_keyword": 600,
     "max_context_chars_after_keyword": 600,
     "files_per_chunk": 1000,
+    "embed_batch_size": 2048,
+    "fast_html_extraction": True,
+    "raw_prescreen": True,
 }
 
 DEFAULT_CLASSIFICATION_CONFIG: dict[str, Any] = {
@@ -360,6 +395,33 @@ def apply_project_data(config_cls, project_data: dict[str, Any], root_dir: Path)
     config_cls.QUERY_PATH = root_dir / crawl["query_path"]
     config_cls.CRAWL_SEC_QUERY_LIMIT_COUNT = crawl["sec_query_limit_count"]
     config_cls.CRAWL_DOWNLOAD_DELAY = crawl["download_delay"]
+    config_cls.CRAWL_SEC_REQUESTS_PER_SECOND = crawl["sec_requests_per_second"]
+    config_cls.CRAWL_SEC_MIN_REQUESTS_PER_SECOND = crawl["sec_min_requests_per_second"]
+    config_cls.CRAWL_PREFETCH_MAX_CONCURRENCY = crawl["prefetch_max_concurrency"]
+    config_cls.CRAWL_PREFETCH_MAX_RETRIES = crawl["prefetch_max_retries"]
+    config_cls.CRAWL_PREFETCH_CACHE_TTL_HOURS = crawl["prefetch_cache_ttl_hours"]
+    config_cls.CRAWL_TICKER_CACHE_TTL_HOURS = crawl["ticker_cache_ttl_hours"]
+    config_cls.CRAWL_OFFLINE = crawl["offline"]
+    config_cls.CRAWL_SEC_BASE_URL = crawl["sec_base_url"]
+    config_cls.CRAWL_RESPONSE_CACHE = crawl["response_cache"]
+    config_cls.CRAWL_DB_FLUSH_ITEMS = crawl["db_flush_items"]
+    config_cls.CRAWL_DB_FLUSH_SECONDS = crawl["db_flush_seconds"]
+    config_cls.CRAWL_RAW_STORE = crawl["raw_store"]
+    config_cls.CRAWL_INCREMENTAL = crawl["incremental"]
+    config_cls.CRAWL_MERGE_QUERIES = crawl["merge_queries"]
+    config_cls.CRAWL_QUEUE_BATCH_SIZE = crawl["queue_batch_size"]
+    config_cls.CRAWL_QUEUE_LEASE_SECONDS = crawl["queue_lease_seconds"]
+    config_cls.CRAWL_QUEUE_MAX_ATTEMPTS = crawl["queue_max_attempts"]
+    config_cls.CRAWL_QUEUE_WORKERS = crawl["queue_workers"]
+    config_cls.CRAWL_BULK_CHUNK_SIZE = crawl["bulk_chunk_size"]
+    config_cls.CRAWL_EVENT_BUS_QUEUED = crawl["event_bus_queued"]
+    config_cls.CRAWL_EVENT_COALESCE_SECONDS = crawl["event_coalesce_seconds"]
+    config_cls.CRAWL_PDF_WORKERS = crawl["pdf_workers"]
+    config_cls.CRAWL_PDF_MAX_PAGES = crawl["pdf_max_pages"]
+    config_cls.CRAWL_PDF_MAX_BYTES = crawl["pdf_max_bytes"]
+    config_cls.CRAWL_DOWNLOAD_TRUNCATE_BYTES = crawl["download_truncate_bytes"]
+    config_cls.CRAWL_DOWNLOAD_WARN_BYTES = crawl["download_warn_bytes"]
+    config_cls.CRAWL_PDF_STOP_ON_KEYWORD = crawl["pdf_stop_on_keyword"]
 
     config_cls.PREPROCESSING_VERSION = preprocess["version"]
     config_cls.SINGLE_KEYWORD_FILTER = preprocess["single_keyword_filter"]
@@ -388,6 +450,9 @@ def apply_project_data(config_cls, project_data: dict[str, Any], root_dir: Path)
         "max_context_chars_after_keyword"
     ]
     config_cls.PREPROCESS_FILES_PER_CHUNK = preprocess["files_per_chunk"]
+    config_cls.PREPROCESS_EMBED_BATCH_SIZE = preprocess["embed_batch_size"]
+    config_cls.PREPROCESS_FAST_HTML_EXTRACTION = preprocess["fast_html_extraction"]
+    config_cls.PREPROCESS_RAW_PRESCREEN = preprocess["raw_prescreen"]
 
     config_cls.CLASSIFICATION_VERSION = classification["version"]
     config_cls.CLASSIFICATION_RANDOM_SEED = classification["random_seed"]
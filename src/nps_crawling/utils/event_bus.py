@@ -1,22 +1,139 @@
-from collections import defaultdict
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, defaultdict, deque
 from typing import Callable
 
+logger = logging.getLogger(__name__)
+
+# Topics published per request during a crawl whose latest value supersedes the earlier ones,
+# unlike per-filing topics such as ``crawl.result``
+STATUS_TOPICS: tuple[str, ...] = ("crawler.status", "paging.info")
+
+
 class EventBus:
+    """Publish/subscribe hub between the crawler and its listeners (e.g. a TUI).
+
+    Events are delivered synchronously on the publishing thread until :meth:`start` is
+    called. Afterwards publishing only enqueues the event and a dispatcher thread calls
+    the subscribers, so slow listeners never block the publisher (e.g. the Twisted reactor).
+    Topics registered with :meth:`coalesce` are rate-limited in queued mode: subscribers
+    get the latest value at most once per interval, :meth:`counts` still counts every event.
+    """
+
     def __init__(self):
         self._listeners = defaultdict(list)
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._pending: deque = deque()
+        self._intervals: dict[str, float] = {}
+        self._latest: dict[str, tuple[tuple, dict]] = {}
+        self._next_delivery: dict[str, float] = {}
+        self._counts: Counter = Counter()
+        self._thread: threading.Thread | None = None
+        self._running: bool = False
+        self._atexit_registered: bool = False
 
     def subscribe(self, event_name: str, callback: Callable):
         """Subscribe a callback function to an event."""
-        self._listeners[event_name].append(callback)
+        with self._lock:
+            self._listeners[event_name].append(callback)
 
     def unsubscribe(self, event_name: str, callback: Callable):
         """Unsubscribe a callback function from an event."""
-        if callback in self._listeners[event_name]:
-            self._listeners[event_name].remove(callback)
+        with self._lock:
+            if callback in self._listeners[event_name]:
+                self._listeners[event_name].remove(callback)
+
+    def coalesce(self, event_name: str, interval: float):
+        """Deliver only the latest event of ``event_name`` at most every ``interval`` seconds in queued mode."""
+        with self._lock:
+            self._intervals[event_name] = interval
 
     def publish(self, event_name: str, *args, **kwargs):
-        """Publish an event and call all subscribed callbacks."""
-        for callback in self._listeners[event_name]:
+        """Publish an event: call all subscribed callbacks, or enqueue it for the dispatcher thread."""
+        with self._lock:
+            self._counts[event_name] += 1
+            if self._running:
+                if event_name in self._intervals:
+                    self._latest[event_name] = (args, kwargs)
+                else:
+                    self._pending.append((event_name, args, kwargs))
+                self._wakeup.notify()
+                return
+            callbacks: list[Callable] = list(self._listeners[event_name])
+
+        for callback in callbacks:
             callback(*args, **kwargs)
 
-bus: EventBus = EventBus()
\ No newline at end of file
+    def counts(self) -> dict[str, int]:
+        """Returns the number of published events per topic, including coalesced ones."""
+        with self._lock:
+            return dict(self._counts)
+
+    @property
+    def queued(self) -> bool:
+        """True while events are delivered by the dispatcher thread."""
+        return self._running
+
+    def start(self):
+        """Switches to queued delivery on a dispatcher thread. Does nothing if it already runs."""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            self._thread = threading.Thread(target=self._dispatch, name="event-bus", daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.stop)
+                self._atexit_registered = True
+
+    def stop(self, timeout: float | None = 5.0):
+        """Delivers all queued events and switches back to synchronous delivery."""
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            self._wakeup.notify()
+            thread, self._thread = self._thread, None
+        thread.join(timeout)
+
+    def _due_events(self, flush: bool) -> tuple[list[tuple], float | None]:
+        """Takes the queued and due coalesced events. Returns them and the seconds until the next is due."""
+        events: list[tuple] = list(self._pending)
+        self._pending.clear()
+
+        now: float = time.monotonic()
+        wait: float | None = None
+        for event_name in list(self._latest):
+            due: float = self._next_delivery.get(event_name, 0.0)
+            if flush or now >= due:
+                args, kwargs = self._latest.pop(event_name)
+                events.append((event_name, args, kwargs))
+                self._next_delivery[event_name] = now + self._intervals.get(event_name, 0.0)
+            else:
+                wait = due - now if wait is None else min(wait, due - now)
+        return events, wait
+
+    def _dispatch(self):
+        while True:
+            with self._lock:
+                events, wait = self._due_events(flush=not self._running)
+                while not events and self._running:
+                    self._wakeup.wait(wait)
+                    events, wait = self._due_events(flush=not self._running)
+                if not events and not self._running:
+                    return
+                deliveries: list[tuple] = [(list(self._listeners[event_name]), args, kwargs)
+                                           for event_name, args, kwargs in events]
+
+            for callbacks, args, kwargs in deliveries:
+                for callback in callbacks:
+                    try:
+                        callback(*args, **kwargs)
+                    except Exception:
+                        logger.exception(f"Event subscriber {callback!r} failed.")
+
+
+bus: EventBus = EventBus()
@@ -0,0 +1,84 @@
+"""Case-insensitive matching of many keywords in one pass over a text."""
+from __future__ import annotations
+
+import re
+from collections.abc import Collection, Iterable, Iterator
+
+
+class KeywordMatcher:
+    """Finds which of a fixed set of keywords occur in a text.
+
+    All keywords are compiled into one case-insensitive regular expression, longest
+    alternatives first. Each search returns the longest keyword at the next position
+    where any keyword starts. Shorter keywords that are prefixes of it match at the
+    same position, keywords inside it are found by resuming the search one character
+    later. This gives the same result as ``keyword.lower() in text.lower()`` for every
+    keyword, without lowering (and copying) the text.
+    """
+
+    def __init__(self, keywords: Iterable[str]):
+        """Compiles the matcher for ``keywords``. Empty keywords never match."""
+        self.keywords: list[str] = [keyword for keyword in keywords if keyword]
+
+        # Keywords that only differ in case share one alternative.
+        self._by_folded: dict[str, list[str]] = {}
+        for keyword in self.keywords:
+            self._by_folded.setdefault(keyword.lower(), []).append(keyword)
+
+        folded: list[str] = sorted(self._by_folded, key=len, reverse=True)
+        # All keywords (lowered) matching at the start of each alternative.
+        self._prefixes: dict[str, list[str]] = {
+            alternative: [other for other in folded if alternative.startswith(other)]
+            for alternative in folded
+        }
+        self._pattern: re.Pattern | None = (
+            re.compile("|".join(re.escape(alternative) for alternative in folded), re.IGNORECASE)
+            if folded else None
+        )
+
+    def __bool__(self) -> bool:
+        """Returns True if the matcher has at least one keyword to look for."""
+        return self._pattern is not None
+
+    def search(self, text: str) -> bool:
+        """Returns True if any keyword occurs in ``text``."""
+        return bool(text) and self._pattern is not None and self._pattern.search(text) is not None
+
+    def find_all(self, text: str) -> list[str]:
+        """Returns the keywords occurring in ``text``, in the order they were given."""
+        if not text or self._pattern is None:
+            return []
+
+        found: set[str] = set()
+        pos: int = 0
+        while len(found) < len(self._by_folded):
+            match = self._pattern.search(text, pos)
+            if match is None:
+                break
+            found.update(self._prefixes.get(match.group(0).lower(), ()))
+            pos = match.start() + 1
+
+        return self.in_given_order(found)
+
+    def occurrences(self, text: str) -> Iterator[tuple[int, int, str]]:
+        """Yields ``(start, end, keyword)`` for every occurrence of every keyword in ``text``.
+
+        Occurrences come in order of their start, keywords are lowered. Overlapping and
+        nested occurrences are all reported.
+        """
+        if not text or self._pattern is None:
+            return
+
+        pos: int = 0
+        while True:
+            match = self._pattern.search(text, pos)
+            if match is None:
+                return
+            start: int = match.start()
+            for keyword in self._prefixes.get(match.group(0).lower(), ()):
+                yield start, start + len(keyword), keyword
+            pos = start + 1
+
+    def in_given_order(self, found: Collection[str]) -> list[str]:
+        """Returns the keywords whose lowered form is in ``found``, in the order they were given."""
+        return [keyword for keyword in self.keywords if keyword.lower() in found]
@@ -0,0 +1,310 @@
+"""Storage backends for raw crawled filings.
+
+Two backends are available:
+
+- ``json``: one pretty-printed JSON file per filing under ``json_raw/files``.
+- ``segments``: append-only segment files under ``json_raw/segments``. Every filing
+  is stored as one zlib-compressed frame, and a SQLite index maps the filing ID to
+  the segment and offset of its frame for random access. Every store instance
+  appends only to segments it created, so several crawl workers can write to the
+  same directory at once.
+
+Both backends store the same payload: the list of records of a filing.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import struct
+import time
+import zlib
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any
+
+from nps_crawling.config import Config
+
+# Windows erlaubt keine : * ? " < > | / \ in Dateinamen.
+_UNSAFE_FILENAME_CHARS = str.maketrans(':*?"<>|/\\', '_________')
+
+# Frame header: length of the filing ID and length of the compressed payload.
+_FRAME_HEADER = struct.Struct(">II")
+
+# Seconds a writer waits for the index while another process commits to it.
+_INDEX_TIMEOUT_SECONDS = 60
+
+
+def safe_filename(filing_id: str) -> str:
+    """Returns ``filing_id`` with all characters replaced that are not allowed in file names."""
+    return str(filing_id).translate(_UNSAFE_FILENAME_CHARS)
+
+
+class RawStore(ABC):
+    """Storage of raw filings, addressed by keys returned from :meth:`keys`."""
+
+    kind: str = ""
+
+    def __init__(self, root: Path):
+        """Initializes the store below ``root``."""
+        self.root: Path = Path(root)
+
+    @abstractmethod
+    def put(self, filing_id: str, records: list[dict]) -> str:
+        """Stores the records of a filing and returns their location."""
+
+    @abstractmethod
+    def get(self, key: Any) -> list[dict]:
+        """Returns the records stored under ``key``, or an empty list."""
+
+    @abstractmethod
+    def keys(self) -> list[Any]:
+        """Returns the keys of all stored filings in a stable order."""
+
+    @abstractmethod
+    def filing_id(self, key: Any) -> str | None:
+        """Returns the filing ID stored under ``key``."""
+
+    @abstractmethod
+    def source_name(self, key: Any) -> str:
+        """Returns a file-name-safe name for ``key`` used by downstream outputs."""
+
+    def content_hash(self, key: Any) -> str:
+        """Returns a hash that changes whenever the records stored under ``key`` change."""
+        return hashlib.sha256(json.dumps(self.get(key), sort_keys=True).encode("utf-8")).hexdigest()
+
+    def flush(self) -> None:
+        """Makes all stored filings durable."""
+
+    def close(self) -> None:
+        """Flushes and releases all resources."""
+        self.flush()
+
+
+class JsonFileRawStore(RawStore):
+    """One JSON file per filing, keyed by file path."""
+
+    kind = "json"
+
+    def __init__(self, root: Path):
+        """Initializes the store below ``root``."""
+        super().__init__(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def put(self, filing_id: str, records: list[dict]) -> str:
+        """Writes the records of a filing to its JSON file and returns the file path."""
+        path = self.root / f"{safe_filename(filing_id)}.json"
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False, indent=2)
+        return str(path.absolute())
+
+    def get(self, key: Path) -> list[dict]:
+        """Returns the records of the JSON file ``key``, or an empty list if it is not valid JSON."""
+        try:
+            with open(key, "r", encoding="utf-8") as f:
+                return json.load(f) or []
+        except json.JSONDecodeError:
+            return []
+
+    def keys(self) -> list[Path]:
+        """Returns the paths of all JSON files, sorted."""
+        return sorted(self.root.glob("*.json"))
+
+    def filing_id(self, key: Path) -> str | None:
+        """Returns the filing ID from the metadata of the first record in ``key``."""
+        records = self.get(key)
+        if not records:
+            return None
+        return records[0].get("metadata", {}).get("filing", {}).get("id")
+
+    def source_name(self, key: Path) -> str:
+        """Returns the file name of ``key`` without suffix."""
+        return Path(key).stem
+
+    def content_hash(self, key: Path) -> str:
+        """Returns the SHA-256 of the JSON file ``key``."""
+        digest = hashlib.sha256()
+        with open(key, "rb") as f:
+            while chunk := f.read(1024 * 1024):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+
+class SegmentRawStore(RawStore):
+    """Append-only compressed segment files with a SQLite offset index, keyed by filing ID.
+
+    Segments are never shared between writers: every instance starts its own segment
+    named after its creation time and process ID, and never appends to a segment it did
+    not create. Concurrent writers in several processes therefore cannot interleave
+    frames or record wrong offsets; their index updates are serialized by SQLite.
+    """
+
+    kind = "segments"
+
+    SEGMENT_MAX_BYTES: int = 256 * 1024 * 1024
+
+    def __init__(self, root: Path, compression_level: int = 6):
+        """Initializes the store below ``root``."""
+        super().__init__(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.compression_level: int = compression_level
+
+        self._index = sqlite3.connect(self.root / "index.sqlite", timeout=_INDEX_TIMEOUT_SECONDS)
+        self._index.execute("PRAGMA journal_mode=WAL")
+        self._index.execute("PRAGMA synchronous=NORMAL")
+        self._index.execute(
+            "CREATE TABLE IF NOT EXISTS filings "
+            "(id TEXT PRIMARY KEY, segment TEXT NOT NULL, offset INTEGER NOT NULL, length INTEGER NOT NULL)",
+        )
+        self._index.commit()
+
+        self._writer = None
+        self._writer_name: str | None = None
+        self._readers: dict[str, Any] = {}
+
+    def _segment_names(self) -> list[str]:
+        """Returns the names of all segments in the order they were started."""
+        return sorted(path.name for path in self.root.glob("segment-*.seg"))
+
+    def _open_writer(self):
+        """Returns the segment file to append to, starting a new one when it is full.
+
+        New segments are created exclusively, so no other writer can ever append to them.
+        """
+        if self._writer is not None and self._writer.tell() < self.SEGMENT_MAX_BYTES:
+            return self._writer
+
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+        name = f"segment-{time.time_ns():020d}-{os.getpid()}.seg"
+        self._writer = open(self.root / name, "xb")  # noqa: SIM115
+        self._writer_name = name
+        return self._writer
+
+    def put(self, filing_id: str, records: list[dict]) -> str:
+        """Appends the records of a filing as one frame and returns ``<segment path>@<offset>``."""
+        payload = zlib.compress(json.dumps(records, ensure_ascii=False).encode("utf-8"), self.compression_level)
+        id_bytes = str(filing_id).encode("utf-8")
+
+        writer = self._open_writer()
+        offset = writer.tell()
+        writer.write(_FRAME_HEADER.pack(len(id_bytes), len(payload)))
+        writer.write(id_bytes)
+        writer.write(payload)
+
+        self._index.execute(
+            "INSERT OR REPLACE INTO filings (id, segment, offset, length) VALUES (?, ?, ?, ?)",
+            (str(filing_id), self._writer_name, offset, _FRAME_HEADER.size + len(id_bytes) + len(payload)),
+        )
+        return f"{(self.root / self._writer_name).absolute()}@{offset}"
+
+    def _read_frame(self, segment: str, offset: int, length: int) -> tuple[str, bytes]:
+        if self._writer is not None and self._writer_name == segment:
+            self._writer.flush()
+        reader = self._readers.get(segment)
+        if reader is None:
+            reader = self._readers[segment] = open(self.root / segment, "rb")  # noqa: SIM115
+        reader.seek(offset)
+        frame = reader.read(length)
+        id_length, payload_length = _FRAME_HEADER.unpack_from(frame)
+        start = _FRAME_HEADER.size
+        filing_id = frame[start:start + id_length].decode("utf-8")
+        return filing_id, frame[start + id_length:start + id_length + payload_length]
+
+    def get(self, key: str) -> list[dict]:
+        """Returns the records of filing ``key``, or an empty list if it is not stored."""
+        row = self._index.execute("SELECT segment, offset, length FROM filings WHERE id = ?", (key,)).fetchone()
+        if row is None:
+            return []
+        _, payload = self._read_frame(*row)
+        return json.loads(zlib.decompress(payload).decode("utf-8"))
+
+    def keys(self) -> list[str]:
+        """Returns the IDs of all stored filings, sorted."""
+        return [row[0] for row in self._index.execute("SELECT id FROM filings ORDER BY id")]
+
+    def filing_id(self, key: str) -> str | None:
+        """Returns ``key``, the filing ID."""
+        return key
+
+    def source_name(self, key: str) -> str:
+        """Returns the filing ID ``key`` made file-name-safe."""
+        return safe_filename(key)
+
+    def content_hash(self, key: str) -> str:
+        """Returns the SHA-256 of the compressed frame of filing ``key``."""
+        row = self._index.execute("SELECT segment, offset, length FROM filings WHERE id = ?", (key,)).fetchone()
+        if row is None:
+            return hashlib.sha256(b"").hexdigest()
+        _, payload = self._read_frame(*row)
+        return hashlib.sha256(payload).hexdigest()
+
+    def rebuild_index(self) -> int:
+        """Rebuilds the index by scanning all segments, e.g. after a crash. Returns the number of filings.
+
+        Segments are scanned in the order they were started, so the frame of the newest
+        segment wins if several writers stored the same filing.
+        """
+        self.flush()
+        self._index.execute("DELETE FROM filings")
+        for name in self._segment_names():
+            with open(self.root / name, "rb") as f:
+                offset = 0
+                while header := f.read(_FRAME_HEADER.size):
+                    if len(header) < _FRAME_HEADER.size:
+                        break
+                    id_length, payload_length = _FRAME_HEADER.unpack(header)
+                    id_bytes = f.read(id_length)
+                    if len(f.read(payload_length)) < payload_length:
+                        # Truncated frame from an interrupted write.
+                        break
+                    length = _FRAME_HEADER.size + id_length + payload_length
+                    self._index.execute(
+                        "INSERT OR REPLACE INTO filings (id, segment, offset, length) VALUES (?, ?, ?, ?)",
+                        (id_bytes.decode("utf-8"), name, offset, length),
+                    )
+                    offset += length
+        self._index.commit()
+        return self._index.execute("SELECT COUNT(*) FROM filings").fetchone()[0]
+
+    def flush(self) -> None:
+        """Flushes the open segment and commits the index."""
+        if self._writer is not None:
+            self._writer.flush()
+        self._index.commit()
+
+    def close(self) -> None:
+        """Flushes and closes the open segment, all readers and the index."""
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        for reader in self._readers.values():
+            reader.close()
+        self._readers.clear()
+        self._index.close()
+
+
+_RAW_STORES: dict[str, tuple[type[RawStore], str]] = {
+    "json": (JsonFileRawStore, "files"),
+    "segments": (SegmentRawStore, "segments"),
+}
+
+
+def create_raw_store(kind: str | None = None, root: Path | None = None) -> RawStore:
+    """Creates the raw store of type ``kind`` (default: ``Config.CRAWL_RAW_STORE``).
+
+    Args:
+        kind: ``json`` or ``segments``.
+        root: Directory of the store. Defaults to the backend's directory below
+            ``Config.RAW_JSON_PATH_CRAWLER``.
+    """
+    kind = kind or Config.CRAWL_RAW_STORE
+    entry = _RAW_STORES.get(kind)
+    if not entry:
+        raise ValueError(f"Unknown raw store: '{kind}'")
+    store_cls, subdir = entry
+    return store_cls(root if root is not None else Config.RAW_JSON_PATH_CRAWLER / subdir)
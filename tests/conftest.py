@@ -0,0 +1,113 @@
+import itertools
+from collections.abc import Callable
+
+import pytest
+
+from nps_crawling.crawler.pre_fetch_utils.filings import Filing
+from nps_crawling.crawler.pre_fetch_utils.sec_params import SecSearchParams
+
+
+class FakeDbAdapter:
+    """In-memory stand-in of the filings table and the crawl work queue, leases never expire."""
+
+    def __init__(self):
+        # Filings table: IDs that count as crawled, IDs seeded from bulk data, duplicate lookups
+        # and stored batches
+        self.existing: set[str] = set()
+        self.seeded: set[str] = set()
+        self.lookups: list[tuple[list[str], dict | None]] = []
+        self.batches: list[list[dict]] = []
+        # Work queue rows by filing ID
+        self.rows: dict[str, dict] = {}
+
+    def get_existing_filing_ids(self, filing_ids, keywords=None, chunk_size=1000):
+        self.lookups.append((list(filing_ids), keywords))
+        return self.existing & set(filing_ids)
+
+    def add_filings_bulk(self, rows):
+        self.batches.append(rows)
+        return 1
+
+    def copy_filings_bulk(self, rows, chunk_size=50_000, on_commit=None):
+        inserted = 0
+        rows = iter(rows)
+        while chunk := list(itertools.islice(rows, chunk_size)):
+            new = {row["id"] for row in chunk} - self.existing - self.seeded
+            self.seeded |= new
+            inserted += len(new)
+            if on_commit is not None:
+                on_commit([row["id"] for row in chunk if row["id"] in self.seeded])
+        return inserted
+
+    def ensure_crawl_queue_exists(self):
+        pass
+
+    def enqueue_crawl_work(self, rows):
+        new = [row for row in rows if row["id"] not in self.rows]
+        for row in new:
+            self.rows[row["id"]] = {"filing": row["filing"], "status": "pending", "worker": None, "attempts": 0}
+        return len(new)
+
+    def claim_crawl_work(self, worker, limit, lease_seconds, max_attempts):
+        claimed = []
+        for filing_id, row in self.rows.items():
+            if len(claimed) < limit and row["status"] == "pending":
+                row.update(status="leased", worker=worker, attempts=row["attempts"] + 1)
+                claimed.append({"id": filing_id, "filing": row["filing"]})
+        return claimed
+
+    def complete_crawl_work(self, worker, filing_ids):
+        done = [i for i in filing_ids if self.rows[i]["worker"] == worker and self.rows[i]["status"] == "leased"]
+        for filing_id in done:
+            self.rows[filing_id]["status"] = "done"
+        return len(done)
+
+    def fail_crawl_work(self, worker, filing_ids, max_attempts):
+        failed = [i for i in filing_ids if self.rows[i]["worker"] == worker and self.rows[i]["status"] == "leased"]
+        for filing_id in failed:
+            row = self.rows[filing_id]
+            row.update(status="failed" if row["attempts"] >= max_attempts else "pending", worker=None)
+        return len(failed)
+
+    def crawl_queue_open_count(self, max_attempts):
+        return sum(1 for row in self.rows.values()
+                   if row["status"] == "pending" or (row["status"] == "leased" and row["attempts"] < max_attempts))
+
+    def crawl_queue_counts(self):
+        counts: dict[str, int] = {}
+        for row in self.rows.values():
+            counts[row["status"]] = counts.get(row["status"], 0) + 1
+        return counts
+
+
+def _filing(filing_id: str, **fields) -> Filing:
+    adsh, file_path_name = filing_id.split(":")
+    return Filing(**{
+        "_id": filing_id, "_index": "edgar_file", "ciks": ["0000000001"], "ticker": ["TST"], "period_ending": None,
+        "file_num": [], "display_names": ["Test Inc."], "xsl": None, "sequence": 1, "root_forms": ["10-K"],
+        "file_date": "2025-01-01", "biz_states": [], "sics": [], "form": "10-K", "adsh": adsh, "film_num": [],
+        "biz_locations": [], "file_type": "10-K", "file_description": "", "inc_states": [],
+        "file_path_name": file_path_name, "keyword": "nps", **fields,
+    })
+
+
+def _params(**kwargs) -> SecSearchParams:
+    return SecSearchParams(query_base="https://efts.sec.gov/LATEST/search-index?", keyword="nps", id="q1", **kwargs)
+
+
+@pytest.fixture
+def fake_db() -> FakeDbAdapter:
+    """An empty in-memory filings table and work queue."""
+    return FakeDbAdapter()
+
+
+@pytest.fixture
+def make_filing() -> Callable[..., Filing]:
+    """Factory of 10-K filings by ID (``<adsh>:<file name>``), keyword arguments override fields."""
+    return _filing
+
+
+@pytest.fixture
+def make_params() -> Callable[..., SecSearchParams]:
+    """Factory of the search parameters of query ``q1`` for keyword ``nps``."""
+    return _params
@@ -0,0 +1,61 @@
+import pytest
+
+from nps_crawling.preprocessing.cleaning import CleanTextPipeline
+
+KPI_TABLE = """
+<table>
+  <tr><th>Metric</th><th>Weight</th><th>Target</th><th>Result</th></tr>
+  <tr><td colspan="4">Customer Satisfaction</td></tr>
+  <tr><td>Net Promoter Score (NPS) 1</td><td>12%</td><td>45</td><td>40</td></tr>
+  <tr><td>Revenue</td><td>30%</td><td>$1.2B</td><td>$1.3B</td></tr>
+</table>
+"""
+
+LAYOUT_TABLE = """
+<table><tr><td>&#8226;</td><td>We measure customer loyalty through our Net Promoter Score survey, which we send to
+every customer after each completed service visit.</td></tr></table>
+"""
+
+DOCUMENTS = {
+    "prose": "<html><head><title>10-K</title><style>p {color: red}</style></head>"
+             "<body><p>Our NPS&nbsp;rose.</p><script>var nps = 1;</script><p>By: /s/ Jane Doe</p></body></html>",
+    "kpi table with heading": f"<div><b>2024 Performance Metrics</b></div>{KPI_TABLE}<p>After the table.</p>",
+    "caption": f"<table><caption>Scorecard</caption>{KPI_TABLE[9:-10]}</table>",
+    "previous table is collapsed": f"<p>Short</p>{KPI_TABLE}<!-- gap -->{KPI_TABLE}",
+    "heading holds a collapsed table": f"<div><p>NPS</p>{KPI_TABLE}</div>{KPI_TABLE}",
+    "nested tables": f"<table><tr><td>Net promoter</td><td>2024</td></tr><tr><td>{KPI_TABLE}</td></tr></table>"
+                     f"<table><tr><td>Totals</td><td>{KPI_TABLE}</td></tr></table>",
+    "layout table": LAYOUT_TABLE,
+    "excluded phrase": "<table><tr><td>SNPS</td><td>12</td></tr></table>",
+    "hidden cells": "<table>NPS<tr><rt><td>4 NPS</td></rt></tr><template><tr><td>NPS 5</td></tr></template></table>",
+    "comments and processing instructions": "<p>a<!--x-->b<?php echo 1; ?>c</p><![CDATA[nps]]>",
+    "xml document": '<?xml version="1.0" encoding="UTF-8"?><doc><item>NPS of 72</item></doc>',
+    "unclosed markup": "<table><tr><td>NPS<td>45<p>text" + "x" * 600 + "<textarea><td>NPS</td>",
+    "empty": "",
+}
+
+
+@pytest.fixture
+def cleaner():
+    return CleanTextPipeline()
+
+
+@pytest.mark.parametrize("html", DOCUMENTS.values(), ids=DOCUMENTS.keys())
+def test_fast_extraction_matches_beautifulsoup(cleaner, html):
+    assert cleaner.extract_text(html, fast=True) == cleaner.extract_text(html, fast=False)
+
+
+def test_fast_extraction_collapses_keyword_tables(cleaner):
+    text = cleaner.extract_text(DOCUMENTS["kpi table with heading"], fast=True)
+
+    assert text == (
+        "2024 Performance Metrics [TABLE] 2024 Performance Metrics: Customer Satisfaction — "
+        "Metric: Net Promoter Score (NPS) | Weight: 12% | Target: 45 | Result: 40 [/TABLE]. After the table."
+    )
+
+
+def test_markup_lxml_rejects_falls_back_to_beautifulsoup(cleaner, monkeypatch):
+    html = "<p>Our NPS&nbsp;rose.</p><p>By: /s/ Jane Doe</p>"
+    monkeypatch.setattr(CleanTextPipeline, "_extract_text_fast", lambda self, html: None)
+
+    assert cleaner.process_item({"core_text": html}) == {"core_text": "Our NPS rose. "}
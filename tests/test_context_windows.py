@@ -0,0 +1,46 @@
+import pytest
+
+from nps_crawling.config import Config
+from nps_crawling.preprocessing.filtering import NpsMentionFilterPipeline
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    monkeypatch.setattr(Config, "LIST_OF_PHRASES_TO_FILTER_FILINGS_FOR", ["NPS", "net promoter score", "rose. the"])
+    monkeypatch.setattr(Config, "LIST_OF_PHRASES_TO_EXCLUDE", ["NPS Reservation System"])
+    monkeypatch.setattr(Config, "AMOUNT_SENTENCES_INCLUDED_BEFORE", 1)
+    monkeypatch.setattr(Config, "AMOUNT_SENTENCES_INCLUDED_AFTER", 1)
+    return NpsMentionFilterPipeline()
+
+
+def test_sentence_offsets_keep_tables_whole(pipeline):
+    text = "  Intro here.\tOur [TABLE] Messrs. Doe: 1. 2 [/TABLE]. Done!  \n"
+
+    text, starts, ends = pipeline._sentence_offsets(text)
+
+    assert [text[start:end] for start, end in zip(starts, ends)] == [
+        "Intro here.", "Our [TABLE] Messrs. Doe: 1. 2 [/TABLE].", "Done!",
+    ]
+    assert pipeline._sentence_offsets(" \t ") == (" \t ", [], [])
+
+
+def test_context_windows_are_cut_around_hit_sentences(pipeline):
+    text = "Sales rose. The  Net Promoter Score (NPS) was 45.   Costs fell. Filler. Our NPS dipped."
+
+    record = pipeline.filtering_workflow([{"core_text": text}])[0]
+
+    assert [(hit["matched_phrase"], hit["context"], hit["context_start_index"], hit["context_end_index"])
+            for hit in record["context"]] == [
+        ("nps, net promoter score", "Sales rose. The Net Promoter Score (NPS) was 45. Costs fell.", 0, 3),
+        ("nps", "Filler. Our NPS dipped.", 3, 5),
+    ]
+    assert record["all_context_windows"] == (
+        "Sales rose. The  Net Promoter Score (NPS) was 45. Costs fell. Filler. Our NPS dipped."
+    )
+
+
+def test_excluded_phrases_in_a_window_exclude_the_filing(pipeline):
+    record = pipeline.filtering_workflow([{"core_text": "Our NPS rose. See the NPS Reservation System."}])[0]
+
+    assert record["context"] == []
+    assert record["metadata"]["Filing Excluded By Exclude List"] is True
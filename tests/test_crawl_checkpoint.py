@@ -0,0 +1,36 @@
+from nps_crawling.crawler.crawl_checkpoint import CrawlCheckpoint
+from nps_crawling.crawler.pre_fetch_utils.filings import Filing
+from nps_crawling.crawler.spiders.better_spider import BetterSpider
+
+
+def test_filing_state_round_trip(make_filing):
+    filing = Filing.from_state(make_filing("0001-25-000001:a.htm").to_state())
+
+    assert filing.id == "0001-25-000001:a.htm"
+    assert filing.file_container_type == "htm"
+    assert filing.get_url() == make_filing("0001-25-000001:a.htm").get_url()
+
+
+def test_restarted_crawl_skips_completed_and_resumes_in_flight(tmp_path, make_filing):
+    checkpoint = CrawlCheckpoint(tmp_path / "checkpoint.sqlite")
+    first_run = [make_filing(f"0001-25-00000{i}:a.htm") for i in range(4)]
+    checkpoint.mark_dispatched(first_run)
+    checkpoint.mark_completed(["0001-25-000000:a.htm", "0001-25-000001:a.htm"])
+    checkpoint.close()
+
+    spider = BetterSpider(filings=[make_filing("0001-25-000001:a.htm"), make_filing("0001-25-000009:a.htm")],
+                          checkpoint=CrawlCheckpoint(tmp_path / "checkpoint.sqlite"))
+    pending = spider._resume(spider.filings)
+
+    assert [filing.id for filing in pending] == [
+        "0001-25-000002:a.htm", "0001-25-000003:a.htm", "0001-25-000009:a.htm",
+    ]
+
+
+def test_finished_crawl_clears_the_checkpoint(tmp_path, make_filing):
+    checkpoint = CrawlCheckpoint(tmp_path / "checkpoint.sqlite")
+    checkpoint.mark_dispatched([make_filing("0001-25-000001:a.htm")])
+
+    BetterSpider(checkpoint=checkpoint).closed("finished")
+
+    assert CrawlCheckpoint(tmp_path / "checkpoint.sqlite").in_flight() == []
@@ -0,0 +1,95 @@
+from nps_crawling.crawler.crawl_queue import CrawlQueue
+
+
+def test_workers_claim_disjoint_batches_until_drained(fake_db, make_filing):
+    first = CrawlQueue(db=fake_db, worker_id="a", batch_size=2, lease_seconds=60, max_attempts=3)
+    second = CrawlQueue(db=fake_db, worker_id="b", batch_size=2, lease_seconds=60, max_attempts=3)
+
+    assert first.enqueue([make_filing(f"0001-25-00000{i}:{i}.htm", keywords=["nps", "net promoter"])
+                          for i in range(3)]) == 3
+    assert first.enqueue([make_filing("0001-25-000000:0.htm")]) == 0
+
+    claimed_a, claimed_b = first.claim(), second.claim()
+    assert [f.id for f in claimed_a] == ["0001-25-000000:0.htm", "0001-25-000001:1.htm"]
+    assert [f.id for f in claimed_b] == ["0001-25-000002:2.htm"]
+    assert claimed_a[0].keywords == ["nps", "net promoter"]
+
+    # Only the leasing worker can complete a filing
+    assert second.complete([f.id for f in claimed_a]) == 0
+    first.complete([f.id for f in claimed_a])
+    assert not first.is_drained()
+    second.complete([f.id for f in claimed_b])
+    assert first.is_drained()
+
+
+def test_stored_filings_are_completed_in_the_work_queue(tmp_path, fake_db, make_filing):
+    from test_crawl_storage_pipeline import FakeSpider, _item, _pipeline
+
+    spider = FakeSpider(CRAWL_DB_FLUSH_ITEMS=1)
+    spider.work_queue = CrawlQueue(db=fake_db, worker_id="a", batch_size=10, lease_seconds=60, max_attempts=3)
+    spider.work_queue.enqueue([make_filing("a:1.htm")])
+    spider.work_queue.claim()
+    pipeline = _pipeline(tmp_path, spider, fake_db)
+
+    pipeline.process_item(_item("a:1.htm", "nps"), None)
+
+    assert fake_db.rows["a:1.htm"]["status"] == "done"
+
+
+def test_failed_filings_are_retried_until_max_attempts(fake_db, make_filing):
+    queue = CrawlQueue(db=fake_db, worker_id="a", batch_size=10, lease_seconds=60, max_attempts=2)
+    queue.enqueue([make_filing("a:1.htm")])
+
+    queue.claim()
+    assert queue.fail(["a:1.htm"]) == 1
+    assert fake_db.rows["a:1.htm"]["status"] == "pending"
+    queue.claim()
+    queue.fail(["a:1.htm"])
+
+    assert fake_db.rows["a:1.htm"]["status"] == "failed"
+    assert queue.is_drained()
+
+
+def test_filings_on_their_last_attempt_do_not_block_draining(fake_db, make_filing):
+    queue = CrawlQueue(db=fake_db, worker_id="a", batch_size=10, lease_seconds=60, max_attempts=1)
+    queue.enqueue([make_filing("a:1.htm")])
+    queue.claim()
+
+    assert queue.counts() == {"leased": 1}
+    assert queue.is_drained()
+
+
+def test_download_errors_release_the_filing(fake_db, make_filing):
+    from twisted.python.failure import Failure
+
+    from nps_crawling.crawler.spiders.better_spider import BetterSpider
+
+    queue = CrawlQueue(db=fake_db, worker_id="a", batch_size=10, lease_seconds=60, max_attempts=3)
+    queue.enqueue([make_filing("a:1.htm")])
+    spider = BetterSpider(work_queue=queue)
+    failure = Failure(OSError("404"))
+    failure.request = spider._request(queue.claim()[0], 0)
+
+    assert list(spider.download_failed(failure)) == []
+    assert fake_db.rows["a:1.htm"]["status"] == "pending"
+
+
+def test_filings_are_released_when_the_database_write_fails(tmp_path, monkeypatch, fake_db, make_filing):
+    from test_crawl_storage_pipeline import FakeSpider, _item, _pipeline
+
+    from nps_crawling.config import Config
+
+    monkeypatch.setattr(Config, "RAW_JSON_PATH_CRAWLER", tmp_path)
+    spider = FakeSpider(CRAWL_DB_FLUSH_ITEMS=1)
+    spider.work_queue = CrawlQueue(db=fake_db, worker_id="a", batch_size=10, lease_seconds=60, max_attempts=3)
+    spider.work_queue.enqueue([make_filing("a:1.htm")])
+    spider.work_queue.claim()
+    pipeline = _pipeline(tmp_path, spider, fake_db)
+    fake_db.add_filings_bulk = lambda rows: 1 / 0
+
+    pipeline.process_item(_item("a:1.htm", "nps"), None)
+    # The write is retried with the next flush
+    assert fake_db.rows["a:1.htm"]["status"] == "leased"
+
+    pipeline.close_spider(None)
+    assert fake_db.rows["a:1.htm"]["status"] == "pending"
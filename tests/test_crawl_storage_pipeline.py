@@ -0,0 +1,136 @@
+import json
+from types import SimpleNamespace
+
+from scrapy.settings import Settings
+
+from nps_crawling.crawler.pipelines.storage import SaveToJSONPipeline
+from nps_crawling.utils.raw_store import JsonFileRawStore
+
+
+class FakeSpider:
+    def __init__(self, **settings):
+        self.settings = Settings({"CRAWL_DB_FLUSH_SECONDS": 0, **settings})
+
+
+def _item(filing_id: str, keyword: str) -> dict:
+    return {
+        "filing": SimpleNamespace(id=filing_id, ciks=["1"], form="10-K", file_date="2025-01-01"),
+        "core_text": "<html>nps</html>",
+        "keyword": keyword,
+        "url": f"https://sec.gov/{filing_id}",
+    }
+
+
+def _pipeline(tmp_path, spider, db) -> SaveToJSONPipeline:
+    pipeline = SaveToJSONPipeline()
+    pipeline.raw_store = JsonFileRawStore(tmp_path)
+    pipeline.db = db
+    pipeline.open_spider(spider)
+    return pipeline
+
+
+def test_items_are_written_in_one_batch_when_buffer_is_full(tmp_path, fake_db):
+    pipeline = _pipeline(tmp_path, FakeSpider(CRAWL_DB_FLUSH_ITEMS=3), fake_db)
+
+    pipeline.process_item(_item("a:1.htm", "nps"), None)
+    pipeline.process_item(_item("b:2.htm", "nps"), None)
+    assert fake_db.batches == []
+
+    pipeline.process_item(_item("a:1.htm", "net promoter"), None)
+
+    assert len(fake_db.batches) == 1
+    rows = {row["id"]: row for row in fake_db.batches[0]}
+    assert rows["a:1.htm"]["keywords"] == ["nps", "net promoter"]
+    assert rows["a:1.htm"]["path_to_raw"] == str((tmp_path / "a_1.htm.json").absolute())
+    assert json.loads((tmp_path / "b_2.htm.json").read_text(encoding="utf-8"))[0]["url"] == "https://sec.gov/b:2.htm"
+    assert pipeline.stats["new_records_added_to_db"] == 1
+    assert pipeline.stats["existing_records_updated"] == 1
+
+
+def test_close_spider_flushes_remaining_items(tmp_path, monkeypatch, fake_db):
+    from nps_crawling.config import Config
+
+    monkeypatch.setattr(Config, "RAW_JSON_PATH_CRAWLER", tmp_path)
+    pipeline = _pipeline(tmp_path, FakeSpider(CRAWL_DB_FLUSH_ITEMS=100), fake_db)
+
+    pipeline.process_item(_item("a:1.htm", "nps"), None)
+    pipeline.close_spider(None)
+
+    assert [row["id"] for row in fake_db.batches[0]] == ["a:1.htm"]
+    assert pipeline.records == []
+
+
+def test_stored_filings_are_marked_completed_in_the_checkpoint(tmp_path, fake_db):
+    from nps_crawling.crawler.crawl_checkpoint import CrawlCheckpoint
+
+    spider = FakeSpider(CRAWL_DB_FLUSH_ITEMS=2)
+    spider.checkpoint = CrawlCheckpoint(tmp_path / "checkpoint.sqlite")
+    pipeline = _pipeline(tmp_path, spider, fake_db)
+
+    pipeline.process_item(_item("a:1.htm", "nps"), None)
+    assert spider.checkpoint.completed(["a:1.htm"]) == set()
+
+    pipeline.process_item(_item("b:2.htm", "nps"), None)
+    assert spider.checkpoint.completed(["a:1.htm", "b:2.htm", "c:3.htm"]) == {"a:1.htm", "b:2.htm"}
+
+
+class FailingDb:
+    """Filings table whose next ``failures`` bulk upserts raise."""
+
+    def __init__(self, db, failures: int):
+        self.db = db
+        self.failures = failures
+
+    def add_filings_bulk(self, rows):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("database unavailable")
+        return self.db.add_filings_bulk(rows)
+
+
+class FakeWorkQueue:
+    def __init__(self):
+        self.completed: list[str] = []
+        self.failed: list[str] = []
+
+    def complete(self, filing_ids):
+        self.completed += filing_ids
+
+    def fail(self, filing_ids):
+        self.failed += filing_ids
+
+
+def test_failed_batch_is_retried_with_the_next_flush(tmp_path, fake_db):
+    from nps_crawling.crawler.crawl_checkpoint import CrawlCheckpoint
+
+    spider = FakeSpider(CRAWL_DB_FLUSH_ITEMS=1)
+    spider.checkpoint = CrawlCheckpoint(tmp_path / "checkpoint.sqlite")
+    spider.work_queue = FakeWorkQueue()
+    pipeline = _pipeline(tmp_path, spider, FailingDb(fake_db, failures=1))
+
+    pipeline.process_item(_item("a:1.htm", "nps"), None)
+    assert fake_db.batches == []
+    assert spider.checkpoint.completed(["a:1.htm"]) == set()
+    assert spider.work_queue.completed == spider.work_queue.failed == []
+
+    pipeline.process_item(_item("b:2.htm", "nps"), None)
+    assert [row["id"] for row in fake_db.batches[0]] == ["a:1.htm", "b:2.htm"]
+    assert spider.checkpoint.completed(["a:1.htm", "b:2.htm"]) == {"a:1.htm", "b:2.htm"}
+    assert spider.work_queue.completed == ["a:1.htm", "b:2.htm"]
+    assert pipeline.failed_rows == {}
+
+
+def test_close_spider_releases_filings_that_could_not_be_stored(tmp_path, monkeypatch, fake_db):
+    from nps_crawling.config import Config
+
+    monkeypatch.setattr(Config, "RAW_JSON_PATH_CRAWLER", tmp_path)
+    spider = FakeSpider(CRAWL_DB_FLUSH_ITEMS=1)
+    spider.work_queue = FakeWorkQueue()
+    pipeline = _pipeline(tmp_path, spider, FailingDb(fake_db, failures=2))
+
+    pipeline.process_item(_item("a:1.htm", "nps"), None)
+    pipeline.close_spider(None)
+
+    assert fake_db.batches == []
+    assert spider.work_queue.completed == []
+    assert spider.work_queue.failed == ["a:1.htm"]
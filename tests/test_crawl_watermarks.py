@@ -0,0 +1,39 @@
+from types import SimpleNamespace
+
+from nps_crawling.crawler.pre_fetch_utils.crawl_watermarks import CrawlWatermarks, query_key
+from nps_crawling.crawler.pre_fetch_utils.sec_params import SecSearchParams
+
+
+def _filings(*hits: tuple[str, str]) -> list[SimpleNamespace]:
+    return [SimpleNamespace(file_date=date, adsh=adsh) for date, adsh in hits]
+
+
+def test_query_key_ignores_date_window_only(make_params):
+    assert query_key(make_params(from_date="2001-01-01")) == query_key(make_params(to_date="2025-01-01"))
+    assert query_key(make_params()) != query_key(SecSearchParams(keyword="net promoter", id="q1"))
+
+
+def test_first_crawl_is_not_narrowed(tmp_path, make_params):
+    params = make_params(from_date="2001-01-01", to_date="2025-12-31")
+
+    assert CrawlWatermarks(tmp_path / "state.sqlite").narrow(params) is False
+    assert params.from_date == "2001-01-01"
+
+
+def test_mark_narrows_the_next_query(tmp_path, make_params):
+    watermarks = CrawlWatermarks(tmp_path / "state.sqlite")
+    watermarks.advance(make_params(), _filings(("2025-03-01", "0001-25-000002"), ("2025-04-02", "0001-25-000009")))
+
+    params = make_params(from_date="2001-01-01")
+    assert watermarks.narrow(params) is True
+    assert params.from_date == "2025-04-02"
+    assert params.date_range == "custom"
+    assert "&startdt=2025-04-02&enddt=" in params.create_query(page=1)
+
+
+def test_mark_never_moves_backwards(tmp_path, make_params):
+    watermarks = CrawlWatermarks(tmp_path / "state.sqlite")
+    watermarks.advance(make_params(), _filings(("2025-04-02", "0001-25-000009")))
+
+    assert watermarks.advance(make_params(), _filings(("2024-01-01", "0001-24-000001"))) == "2025-04-02"
+    assert watermarks.advance(make_params(), []) == "2025-04-02"
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from scrapy.exceptions import StopDownload
+from scrapy.http import HtmlResponse
+from test_crawl_storage_pipeline import FakeSpider, _pipeline
+from twisted.internet.defer import CancelledError
+from twisted.python.failure import Failure
+
+from nps_crawling.config import Config
+from nps_crawling.crawler.spiders.better_spider import BetterSpider
+
+
+@pytest.fixture
+def budgets(monkeypatch):
+    monkeypatch.setattr(Config, "CRAWL_DOWNLOAD_TRUNCATE_BYTES", {"htm": 100})
+    monkeypatch.setattr(Config, "CRAWL_PDF_MAX_BYTES", 1000)
+
+
+def test_requests_carry_the_budget_of_their_container_type(budgets, make_filing):
+    spider = BetterSpider()
+
+    html = spider._request(make_filing("0001-24-000001:doc.htm"), 0)
+    pdf = spider._request(make_filing("0001-24-000001:doc.pdf"), 1)
+
+    assert html.meta["download_truncate_bytes"] == 100 and "download_maxsize" not in html.meta
+    assert pdf.meta["download_maxsize"] == 1000 and "download_truncate_bytes" not in pdf.meta
+
+
+def test_downloads_stop_at_the_truncation_budget(budgets, make_filing):
+    spider = BetterSpider()
+    request = spider._request(make_filing("0001-24-000001:doc.htm"), 0)
+
+    spider.bytes_received(b"x" * 60, request, spider)
+    with pytest.raises(StopDownload) as stop:
+        spider.bytes_received(b"x" * 60, request, spider)
+    assert stop.value.fail is False
+
+
+def test_oversized_documents_are_truncated_and_recorded(budgets, tmp_path, make_filing, fake_db):
+    spider = BetterSpider()
+    request = spider._request(make_filing("0001-24-000001:doc.htm"), 0)
+    response = HtmlResponse(url=request.url, body=b"<p>nps</p>" + b"x" * 500, request=request,
+                            flags=["download_stopped"])
+
+    async def parse():
+        return [item async for item in spider.parse(response)]
+
+    item = asyncio.run(parse())[0]
+    assert item["download_status"] == "truncated"
+    assert len(item["core_text"]) == 100
+
+    pipeline = _pipeline(tmp_path, FakeSpider(), fake_db)
+    pipeline.process_item(item, spider)
+    pipeline._flush_buffer()
+    assert fake_db.batches[0][0]["download_status"] == "truncated"
+    assert pipeline.stats["truncated_documents"] == ["0001-24-000001:doc.htm"]
+
+
+def test_cancelled_oversized_pdfs_are_recorded_as_skipped(budgets, make_filing):
+    spider = BetterSpider()
+    failure = Failure(CancelledError("larger than download max size"))
+    failure.request = spider._request(make_filing("0001-24-000001:doc.pdf"), 0)
+
+    items = list(spider.download_failed(failure))
+
+    assert [(item["filing"].id, item["core_text"], item["download_status"]) for item in items] == [
+        ("0001-24-000001:doc.pdf", "", "skipped"),
+    ]
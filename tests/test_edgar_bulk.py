@@ -0,0 +1,130 @@
+import gzip
+import json
+import zipfile
+
+import pytest
+from sqlalchemy import text
+
+from nps_crawling.config import Config
+from nps_crawling.crawler import utils as crawler_utils
+from nps_crawling.crawler.pre_fetch_utils.edgar_bulk import BulkFilter, filing_row, iter_bulk_filings
+from nps_crawling.crawler.pre_fetch_utils.filings import CompanyTicker, FilingsCategoryCollectionCoarse
+from nps_crawling.crawler.pre_fetch_utils.sec_params import SecSearchParams
+from nps_crawling.db.db_adapter import DbAdapter
+from nps_crawling.db.nps_filings_db import NpsFilingsDB
+
+MASTER_IDX = """Description:           Master Index of EDGAR Dissemination Feed
+Last Data Received:    March 31, 2024
+
+CIK|Company Name|Form Type|Date Filed|Filename
+--------------------------------------------------------------------------------
+1000045|NICHOLAS FINANCIAL INC|10-Q|2024-02-09|edgar/data/1000045/0000950170-24-012345.txt
+320193|Apple Inc.|10-K|2024-01-05|edgar/data/320193/0000320193-24-000001.txt
+320193|Apple Inc.|4|2024-03-01|edgar/data/320193/0000320193-24-000002.txt
+"""
+
+
+def _submissions(path):
+    recent = {
+        "accessionNumber": ["0000320193-24-000010", "0000320193-23-000099"],
+        "filingDate": ["2024-02-02", "2023-11-03"],
+        "reportDate": ["2023-12-30", "2023-09-30"],
+        "form": ["10-Q", "10-K"],
+        "primaryDocument": ["aapl-20231230.htm", ""],
+        "primaryDocDescription": ["10-Q", "10-K"],
+        "fileNumber": ["001-36743", "001-36743"],
+        "filmNumber": ["24588800", "231373899"],
+    }
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("CIK0000320193.json", json.dumps({
+            "cik": "320193", "name": "Apple Inc.", "tickers": ["AAPL"], "sic": "3571",
+            "stateOfIncorporation": "CA",
+            "addresses": {"business": {"city": "CUPERTINO", "stateOrCountry": "CA"}},
+            "filings": {"recent": recent, "files": []},
+        }))
+        archive.writestr("CIK0000320193-submissions-001.json", json.dumps({
+            "accessionNumber": ["0000320193-05-000001"], "filingDate": ["2005-01-01"], "form": ["10-K"],
+        }))
+        archive.writestr("CIK0000000002.json", json.dumps({"name": "Other", "filings": {"recent": {
+            "accessionNumber": ["0000000002-24-000001"], "filingDate": ["2024-01-01"], "form": ["10-K"],
+        }}}))
+
+
+def test_full_index_is_filtered_by_form(tmp_path):
+    path = tmp_path / "2024" / "QTR1" / "master.idx.gz"
+    path.parent.mkdir(parents=True)
+    with gzip.open(path, "wt", encoding="latin-1") as f:
+        f.write(MASTER_IDX)
+
+    filings = list(iter_bulk_filings(tmp_path, [BulkFilter(forms=frozenset({"10-K", "10-Q"}))]))
+
+    assert [filing.id for filing in filings] == ["0000950170-24-012345:0000950170-24-012345.txt",
+                                                 "0000320193-24-000001:0000320193-24-000001.txt"]
+    apple = filings[1]
+    assert (apple.ciks, apple.form, apple.file_date, apple.keywords) == (["0000320193"], "10-K", "2024-01-05", [])
+    assert apple.display_names == ["Apple Inc.  (CIK 0000320193)"]
+    assert apple.get_url()[0].endswith("/edgar/data/0000320193/000032019324000001/0000320193-24-000001.txt")
+
+
+def test_submissions_are_filtered_by_query(tmp_path):
+    path = tmp_path / "submissions.zip"
+    _submissions(path)
+    params = SecSearchParams(keyword="nps", from_date="2023-01-01",
+                             individual_search=CompanyTicker(ticker=["AAPL"], cik="320193", title="Apple Inc."),
+                             filing_category=FilingsCategoryCollectionCoarse.CUSTOM, filing_categories=["10-K"])
+
+    filings = list(iter_bulk_filings(path, [BulkFilter.from_params(params)]))
+
+    assert [filing.id for filing in filings] == ["0000320193-23-000099:0000320193-23-000099.txt"]
+    row = filing_row(filings[0])
+    assert row["display_names"] == ["Apple Inc.  (AAPL)  (CIK 0000320193)"]
+    assert (row["period_ending"], row["film_num"], row["keywords"]) == ("2023-09-30", ["231373899"], [])
+
+
+def test_submissions_overflow_files_use_the_company_data(tmp_path):
+    path = tmp_path / "submissions.zip"
+    _submissions(path)
+
+    filings = {filing.adsh: filing for filing in iter_bulk_filings(path)}
+
+    assert len(filings) == 4
+    assert filings["0000320193-05-000001"].ticker == ["AAPL"]
+    assert filings["0000320193-24-000010"].file_path_name == "aapl-20231230.htm"
+
+
+def test_bulk_ingest_queues_only_uncrawled_filings(monkeypatch, fake_db, make_filing):
+    filings = [make_filing(f"0001-24-00000{i}:{i}.txt") for i in range(4)]
+    fake_db.existing = {filings[1].id}
+    fake_db.seeded = {filings[2].id}
+    monkeypatch.setattr(Config, "CRAWL_BULK_CHUNK_SIZE", 2)
+    monkeypatch.setattr(crawler_utils, "DbAdapter", lambda: fake_db)
+    monkeypatch.setattr(crawler_utils, "create_search_params_from_config", lambda path: [])
+    monkeypatch.setattr(crawler_utils, "iter_bulk_filings", lambda path, filters: iter(filings))
+
+    crawler_utils.CrawlerPipeline()._ingest_bulk("bulk", ["query.json"], dry_run=False, enqueue=True)
+
+    assert list(fake_db.rows) == [filings[0].id, filings[2].id, filings[3].id]
+
+
+def _is_db_available() -> bool:
+    try:
+        return DbAdapter().is_db_available()
+    except Exception:
+        return False
+
+
+@pytest.mark.skipif(not _is_db_available(), reason="Database connection is not available")
+def test_seeded_filings_are_not_duplicates_until_crawled(monkeypatch):
+    monkeypatch.setattr(Config, "DATABASE_TABLE_NAME", "test_bulk_seed_db")
+    monkeypatch.setattr(NpsFilingsDB, "TABLE", "test_bulk_seed_db")
+    adapter = DbAdapter()
+    adapter.ensure_table_exists()
+    try:
+        assert adapter.copy_filings_bulk([{"id": "seeded:a.htm", "form": "10-K"}]) == 1
+        assert adapter.get_existing_filing_ids(["seeded:a.htm"]) == set()
+
+        adapter.add_filings_bulk([{"id": "seeded:a.htm", "form": "10-K", "path_to_raw": "raw.json"}])
+        assert adapter.get_existing_filing_ids(["seeded:a.htm"]) == {"seeded:a.htm"}
+    finally:
+        with adapter.engine.begin() as conn:
+            conn.execute(text(f"DROP TABLE IF EXISTS {adapter.table_name}"))
@@ -0,0 +1,79 @@
+import threading
+import time
+
+from nps_crawling.utils.event_bus import STATUS_TOPICS, EventBus
+
+
+def test_events_are_delivered_synchronously_by_default():
+    bus = EventBus()
+    received = []
+    bus.subscribe("crawl.result", lambda filing: received.append((filing, threading.current_thread())))
+
+    bus.publish("crawl.result", "f1")
+
+    assert received == [("f1", threading.current_thread())]
+    assert bus.counts() == {"crawl.result": 1}
+
+
+def test_slow_subscribers_do_not_block_publishers():
+    bus = EventBus()
+    received = []
+    bus.subscribe("crawler.stop", lambda: (time.sleep(0.05), received.append("stop")))
+    bus.start()
+
+    started = time.perf_counter()
+    for _ in range(10):
+        bus.publish("crawler.stop")
+    publish_seconds = time.perf_counter() - started
+    bus.stop()
+
+    assert publish_seconds < 0.05
+    assert received == ["stop"] * 10
+
+
+def test_coalesced_topics_deliver_the_latest_value():
+    bus = EventBus()
+    received = []
+    bus.subscribe("crawler.status", lambda status, url: received.append(url))
+    bus.coalesce("crawler.status", 60.0)
+    bus.start()
+
+    bus.publish("crawler.status", "Dispatching", "u0")
+    deadline = time.monotonic() + 2
+    while not received and time.monotonic() < deadline:
+        time.sleep(0.01)
+    for i in range(1, 1000):
+        bus.publish("crawler.status", "Dispatching", f"u{i}")
+    bus.stop()
+
+    assert received == ["u0", "u999"]
+    assert bus.counts()["crawler.status"] == 1000
+    assert not bus.queued
+
+
+def test_crawl_results_are_not_coalesced_with_the_status_topics():
+    bus = EventBus()
+    received = []
+    bus.subscribe("crawl.result", received.append)
+    for topic in STATUS_TOPICS:
+        bus.coalesce(topic, 60.0)
+    bus.start()
+
+    for i in range(100):
+        bus.publish("crawl.result", f"f{i}")
+    bus.stop()
+
+    assert received == [f"f{i}" for i in range(100)]
+
+
+def test_failing_subscribers_are_isolated():
+    bus = EventBus()
+    received = []
+    bus.subscribe("paging.info", lambda done, total: 1 / 0)
+    bus.subscribe("paging.info", lambda done, total: received.append(done))
+    bus.start()
+
+    bus.publish("paging.info", 1, 2)
+    bus.stop()
+
+    assert received == [1]
@@ -0,0 +1,53 @@
+import requests
+
+from benchmarks.fake_sec_server import FakeEdgarCorpus, FakeSecServer
+from benchmarks.recorder import percentile
+from nps_crawling.crawler.pre_fetch_utils.rate_limiter import AdaptiveTokenBucket
+from nps_crawling.crawler.pre_fetch_utils.sec_params import SecSearchParams
+from nps_crawling.crawler.pre_fetch_utils.sec_prefetch import SecPrefetcher
+from nps_crawling.crawler.pre_fetch_utils.sec_query import SecQuery
+
+
+def _query(url: str, **kwargs) -> SecQuery:
+    params = SecSearchParams(query_base=f"{url}/LATEST/search-index?", keyword="nps", id="q1", **kwargs)
+    return SecQuery(sec_params=params, db=None)
+
+
+def test_prefetch_pages_through_the_fake_search():
+    corpus = FakeEdgarCorpus.synthetic(filings=250)
+    with FakeSecServer(corpus) as server:
+        query = _query(server.url, filing_limit=-1)
+        pages = SecPrefetcher(requests_per_second=1000, max_concurrency=4).prefetch([query])[0]
+
+    ids = [hit["_id"] for page in pages for hit in page["hits"]["hits"]]
+    assert len(ids) == len(set(ids)) == 250
+    assert (query.results, query.complete) == (250, True)
+    assert server.requests["search"] == 3
+
+
+def test_throttled_requests_are_retried():
+    with FakeSecServer(FakeEdgarCorpus.synthetic(filings=10), throttle_rate=0.5, seed=1) as server:
+        prefetcher = SecPrefetcher(max_retries=10, backoff_base=0.01,
+                                   bucket=AdaptiveTokenBucket(rate=1000, burst=1000, cooldown=0))
+        pages = prefetcher.prefetch([_query(server.url, to_date="2024-12-31")])[0]
+
+    assert sum(len(page["hits"]["hits"]) for page in pages) == 10
+    assert server.requests["throttled"] >= 1
+
+
+def test_documents_and_tickers_are_served():
+    corpus = FakeEdgarCorpus.synthetic(filings=5, companies=2, html_bytes=10_000, pdf_pages=2)
+    with FakeSecServer(corpus) as server:
+        html = requests.get(f"{server.url}/Archives/edgar/data/1/1/doc0.htm", timeout=5)
+        pdf = requests.get(f"{server.url}/Archives/edgar/data/1/1/doc1.pdf", timeout=5)
+        tickers = requests.get(f"{server.url}/files/company_tickers.json", timeout=5).json()
+
+    assert html.headers["Content-Type"] == "text/html" and len(html.content) >= 9_000
+    assert pdf.content.startswith(b"%PDF")
+    assert tickers["1"] == {"cik_str": 2, "ticker": "TCK1", "title": "Company 1 Inc."}
+
+
+def test_percentile():
+    assert percentile([3.0, 1.0, 2.0, 4.0], 50) == 2.0
+    assert percentile([3.0, 1.0, 2.0, 4.0], 99) == 4.0
+    assert percentile([], 50) is None
@@ -0,0 +1,46 @@
+import random
+
+from nps_crawling.utils.keyword_matcher import KeywordMatcher
+
+KEYWORDS = ["NPS", "net promoter score", "nps score", "nps of", "net promoter", "promoter", "Net Promotor"]
+
+
+def _naive(keywords: list[str], text: str) -> list[str]:
+    return [keyword for keyword in keywords if keyword and keyword.lower() in text.lower()]
+
+
+def test_reports_overlapping_and_nested_keywords():
+    matcher = KeywordMatcher(KEYWORDS)
+
+    assert matcher.find_all("Our Net Promoter Score and NPS of 42") == [
+        "NPS", "net promoter score", "nps of", "net promoter", "promoter",
+    ]
+    assert matcher.find_all("SNPS reported") == ["NPS"]
+    assert matcher.find_all("nothing here") == []
+
+
+def test_matches_the_naive_substring_semantics():
+    rng = random.Random(7)
+    alphabet = ["nps", " ", "score", "net ", "promoter", "promotor", "of", "N", "P", "S", "x"]
+    matcher = KeywordMatcher(KEYWORDS)
+
+    for _ in range(500):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+        assert matcher.find_all(text) == _naive(KEYWORDS, text), text
+
+
+def test_empty_keywords_never_match():
+    matcher = KeywordMatcher(["", "nps"])
+
+    assert matcher.find_all("nps") == ["nps"]
+    assert not KeywordMatcher([]).search("anything")
+    assert KeywordMatcher(["Reservation System"]).search("NPS reservation system")
+
+
+def test_occurrences_reports_every_position():
+    matcher = KeywordMatcher(KEYWORDS)
+
+    assert list(matcher.occurrences("Net Promoter Score, nps")) == [
+        (0, 18, "net promoter score"), (0, 12, "net promoter"), (4, 12, "promoter"), (20, 23, "nps"),
+    ]
+    assert matcher.in_given_order({"nps", "promoter"}) == ["NPS", "promoter"]
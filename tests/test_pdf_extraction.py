@@ -0,0 +1,66 @@
+import asyncio
+from types import SimpleNamespace
+
+from nps_crawling.config import Config
+from nps_crawling.crawler.pattern_strategy.data_processing.pdf_processing_strategy import (
+    PdfProcessingStrategy,
+    extract_pdf_text,
+)
+
+
+def _pdf(pages: list[str]) -> bytes:
+    """Builds a minimal PDF with one line of text per page."""
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(len(pages)))
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(pages):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>")
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for i, obj in enumerate(objects):
+        offsets.append(len(out))
+        out += f"{i + 1} 0 obj\n{obj}\nendobj\n".encode()
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += b"".join(f"{offset:010d} 00000 n \n".encode() for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+
+PDF = _pdf(["Annual report", "Our NPS rose", "Appendix"])
+
+
+def _response(body: bytes, keyword: str = "nps"):
+    return SimpleNamespace(url="https://www.sec.gov/a.pdf", body=body,
+                           meta={"filing": SimpleNamespace(keyword=keyword)})
+
+
+def test_extracts_all_pages_by_default():
+    assert extract_pdf_text(PDF).split("\n") == ["Annual report", "Our NPS rose", "Appendix"]
+
+
+def test_page_limit_and_keyword_stop():
+    assert extract_pdf_text(PDF, max_pages=1) == "Annual report"
+    assert extract_pdf_text(PDF, keywords=["nps"]).split("\n") == ["Annual report", "Our NPS rose"]
+
+
+def test_oversized_pdf_is_skipped():
+    strategy = PdfProcessingStrategy(max_pages=0, max_bytes=10, stop_on_keyword=False)
+
+    assert strategy.extract(_response(PDF)) == ""
+
+
+def test_extract_async_runs_off_the_calling_thread(monkeypatch):
+    monkeypatch.setattr(Config, "CRAWL_PDF_WORKERS", 0)
+    strategy = PdfProcessingStrategy(max_pages=0, max_bytes=0, stop_on_keyword=True)
+
+    text = asyncio.run(strategy.extract_async(_response(PDF, keyword='"NPS"')))
+
+    assert text.split("\n") == ["Annual report", "Our NPS rose"]
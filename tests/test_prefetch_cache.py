@@ -0,0 +1,129 @@
+import json
+
+from nps_crawling.crawler.pattern_strategy.pre_fetch import search_strategy
+from nps_crawling.crawler.pattern_strategy.pre_fetch.search_strategy import SearchStrategy
+from nps_crawling.crawler.pre_fetch_utils.prefetch_cache import PrefetchCache, cache_key
+from nps_crawling.crawler.pre_fetch_utils.sec_prefetch import SecPrefetcher
+
+
+def test_cache_round_trip(tmp_path, make_filing, make_params):
+    cache = PrefetchCache(tmp_path, ttl_hours=1)
+    filings = [make_filing("0001-25-000001:a.htm"), make_filing("0001-25-000002:b.pdf")]
+    cache.put(make_params(), filings, results=2, complete=True)
+
+    cached = cache.get(make_params())
+
+    assert [filing.id for filing in cached.filings] == ["0001-25-000001:a.htm", "0001-25-000002:b.pdf"]
+    assert cached.filings[1].file_container_type == "pdf"
+    assert cached.filings[0].ticker == ["TST"]
+    assert cached.filings[0].period_ending is None
+    assert (cached.results, cached.complete) == (2, True)
+
+
+def test_expired_or_changed_queries_miss(tmp_path, make_filing, make_params):
+    cache = PrefetchCache(tmp_path, ttl_hours=1)
+    cache.put(make_params(), [make_filing("0001-25-000001:a.htm")], results=1, complete=True)
+
+    assert PrefetchCache(tmp_path, ttl_hours=0).get(make_params()) is None
+    assert PrefetchCache(tmp_path, ttl_hours=-1e-9).get(make_params()) is None
+    assert PrefetchCache(tmp_path, ttl_hours=1).get(make_params(to_date="2025-01-01")) is None
+    assert cache_key(make_params()) != cache_key(make_params(filing_limit=5))
+
+
+def test_incomplete_results_are_not_cached(tmp_path, make_filing, make_params):
+    cache = PrefetchCache(tmp_path, ttl_hours=1)
+    cache.put(make_params(), [make_filing("0001-25-000001:a.htm")], results=5, complete=False)
+
+    assert cache.get(make_params()) is None
+
+
+def test_results_capped_by_the_filing_limit_are_cached(tmp_path, make_filing, make_params):
+    cache = PrefetchCache(tmp_path, ttl_hours=1)
+    cache.put(make_params(filing_limit=1), [make_filing("0001-25-000001:a.htm")], results=5, complete=False,
+              truncated=True)
+
+    cached = cache.get(make_params(filing_limit=1))
+    assert (cached.results, cached.complete, cached.truncated) == (5, False, True)
+    assert cache.get(make_params(filing_limit=2)) is None
+
+
+def _page() -> dict:
+    source = {
+        "ciks": ["0000000001"], "period_ending": "2024-12-31", "file_num": [], "display_names": [], "xsl": None,
+        "sequence": 1, "root_forms": ["10-K"], "file_date": "2025-01-01", "biz_states": [], "sics": [],
+        "form": "10-K", "adsh": "0001-25-000001", "film_num": [], "biz_locations": [], "file_type": "10-K",
+        "file_description": "", "inc_states": [],
+    }
+    return {"hits": {"total": {"value": 1}, "hits": [{"_id": "0001-25-000001:a.htm", "_index": "edgar_file",
+                                                      "_source": source}]}}
+
+
+def test_second_fetch_is_served_from_the_cache(tmp_path, monkeypatch, fake_db):
+    query_file = tmp_path / "query.json"
+    query_file.write_text(json.dumps({"queries": {"q1": {"keyword": "nps", "filing_limit": 10}}}), encoding="utf-8")
+
+    monkeypatch.setattr(search_strategy, "DbAdapter", lambda: fake_db)
+    monkeypatch.setattr(search_strategy, "PrefetchCache", lambda: PrefetchCache(tmp_path / "cache", ttl_hours=1))
+    calls = []
+
+    def prefetch(self, queries):
+        calls.extend(queries)
+        for query in queries:
+            query.results, query.complete = 1, True
+        return [[_page()] for _ in queries]
+
+    monkeypatch.setattr(SecPrefetcher, "prefetch", prefetch)
+
+    first = SearchStrategy().fetch(query_path=str(query_file))
+    second = SearchStrategy().fetch(query_path=str(query_file))
+    SearchStrategy().fetch(query_path=str(query_file), refresh=True)
+
+    assert [filing.id for filing in first] == [filing.id for filing in second] == ["0001-25-000001:a.htm"]
+    assert len(calls) == 2
+
+
+def test_filings_of_several_query_files_are_merged(tmp_path, monkeypatch, fake_db):
+    query_files = []
+    for keyword in ("nps", "net promoter"):
+        query_file = tmp_path / f"{keyword}.json"
+        query_file.write_text(json.dumps({"queries": {"q1": {"keyword": keyword}}}), encoding="utf-8")
+        query_files.append(str(query_file))
+
+    monkeypatch.setattr(search_strategy, "DbAdapter", lambda: fake_db)
+    monkeypatch.setattr(search_strategy, "PrefetchCache", lambda: PrefetchCache(tmp_path / "cache", ttl_hours=1))
+
+    def prefetch(self, queries):
+        for query in queries:
+            query.results, query.complete = 1, True
+        return [[_page()] for _ in queries]
+
+    monkeypatch.setattr(SecPrefetcher, "prefetch", prefetch)
+
+    filings = SearchStrategy().fetch_many(query_paths=query_files, ignore_lookup=True)
+    cached = SearchStrategy().fetch_many(query_paths=query_files)
+
+    assert [filing.id for filing in filings] == [filing.id for filing in cached] == ["0001-25-000001:a.htm"]
+    assert filings[0].keywords == cached[0].keywords == ["nps", "net promoter"]
+
+
+def test_failed_first_page_is_fetched_again(tmp_path, monkeypatch, fake_db):
+    query_file = tmp_path / "query.json"
+    query_file.write_text(json.dumps({"queries": {"q1": {"keyword": "nps", "filing_limit": 10}}}), encoding="utf-8")
+
+    monkeypatch.setattr(search_strategy, "DbAdapter", lambda: fake_db)
+    monkeypatch.setattr(search_strategy, "PrefetchCache", lambda: PrefetchCache(tmp_path / "cache", ttl_hours=1))
+    responses = [[], [_page()]]
+
+    def prefetch(self, queries):
+        pages = responses.pop(0)
+        for query in queries:
+            query.results, query.complete = len(pages), bool(pages)
+        return [pages for _ in queries]
+
+    monkeypatch.setattr(SecPrefetcher, "prefetch", prefetch)
+
+    assert SearchStrategy().fetch(query_path=str(query_file)) == []
+    retried = SearchStrategy().fetch(query_path=str(query_file))
+
+    assert [filing.id for filing in retried] == ["0001-25-000001:a.htm"]
+    assert responses == []
@@ -0,0 +1,129 @@
+import json
+
+import numpy as np
+import pytest
+
+from nps_crawling.config import Config
+from nps_crawling.preprocessing.similarity import SimilarityPipeline
+from nps_crawling.preprocessing.utils import PreProcessingPipeline
+from nps_crawling.utils.raw_store import JsonFileRawStore
+
+
+class FakeSimilarity(SimilarityPipeline):
+    """Scores windows that mention "recommend" above the threshold, without an embedding model."""
+
+    def __init__(self):
+        self.threshold_context = 0.5
+        self.batches = []
+
+    def embed_and_score(self, texts):
+        self.batches.append(len(texts))
+        return np.array([0.9 if "recommend" in text else 0.1 for text in texts])
+
+
+class FakeStorage:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.saved = {}
+
+    def storage_workflow(self, records, source_filename, reject=False, update_db=True):
+        if self.fail:
+            raise OSError("disk full")
+        self.saved[(source_filename, reject)] = sum(len(record["context"]) for record in records)
+
+
+def _pipeline(tmp_path, monkeypatch, files=6, storage=None):
+    monkeypatch.setattr(Config, "NPS_CONTEXT_JSON_PATH", tmp_path / "processed")
+    (tmp_path / "processed").mkdir()
+    store = JsonFileRawStore(tmp_path / "raw")
+    for i in range(files):
+        store.put(f"000{i}:doc.htm", [{
+            "metadata": {"filing": {"id": f"000{i}:doc.htm"}},
+            "core_text": "<p>Our NPS rose. Customers recommend us.</p><p>Filler text.</p><p>The NPS fell.</p>",
+        }])
+
+    pipeline = PreProcessingPipeline.__new__(PreProcessingPipeline)
+    pipeline.raw_store = store
+    pipeline.similarity = FakeSimilarity()
+    pipeline.storage = storage or FakeStorage()
+    pipeline._db = None
+    return pipeline
+
+
+def test_files_stream_through_all_stages(tmp_path, monkeypatch):
+    pipeline = _pipeline(tmp_path, monkeypatch)
+    pipeline.FILES_PER_CHUNK = 2
+
+    pipeline.pre_processing_workflow()
+
+    assert {name for name, reject in pipeline.storage.saved} == {f"000{i}_doc.htm" for i in range(6)}
+    assert sum(pipeline.similarity.batches) == sum(pipeline.storage.saved.values())
+    summary = json.loads((tmp_path / "processed" / f"preprocessing_{Config.PREPROCESSING_VERSION}.json").read_text())
+    assert summary["processed_filings"]["filings_processed_total"] == 6
+
+
+def test_failing_stage_stops_the_pipeline(tmp_path, monkeypatch):
+    pipeline = _pipeline(tmp_path, monkeypatch, files=20, storage=FakeStorage(fail=True))
+    pipeline.FILES_PER_CHUNK = 1
+
+    with pytest.raises(OSError, match="disk full"):
+        pipeline.pre_processing_workflow()
+
+
+def _rerun(pipeline):
+    """A new pipeline over the raw store and output directory of ``pipeline``."""
+    rerun = PreProcessingPipeline.__new__(PreProcessingPipeline)
+    rerun.raw_store = pipeline.raw_store
+    rerun.similarity = FakeSimilarity()
+    rerun.storage = FakeStorage()
+    rerun._db = None
+    return rerun
+
+
+def _summary(tmp_path):
+    return json.loads((tmp_path / "processed" / f"preprocessing_{Config.PREPROCESSING_VERSION}.json").read_text())
+
+
+def test_reruns_skip_current_files(tmp_path, monkeypatch):
+    pipeline = _pipeline(tmp_path, monkeypatch, files=3)
+    pipeline.pre_processing_workflow()
+
+    rerun = _rerun(pipeline)
+    rerun.pre_processing_workflow()
+
+    assert rerun.similarity.batches == [] and rerun.storage.saved == {}
+    summary = _summary(tmp_path)
+    assert summary["incremental_run"]["files_current"] == 3
+    assert summary["processed_filings"]["filings_processed_total"] == 3
+
+
+def test_changed_files_are_processed_again(tmp_path, monkeypatch):
+    pipeline = _pipeline(tmp_path, monkeypatch, files=3)
+    pipeline.pre_processing_workflow()
+    pipeline.raw_store.put("0001:doc.htm", [{
+        "metadata": {"filing": {"id": "0001:doc.htm"}},
+        "core_text": "<p>Our NPS rose again.</p>",
+    }])
+
+    rerun = _rerun(pipeline)
+    rerun.pre_processing_workflow()
+
+    assert {name for name, reject in rerun.storage.saved} == {"0001_doc.htm"}
+    assert _summary(tmp_path)["incremental_run"]["files_extracted"] == 1
+
+
+def test_threshold_changes_only_split_cached_scores(tmp_path, monkeypatch):
+    pipeline = _pipeline(tmp_path, monkeypatch, files=3)
+    pipeline.pre_processing_workflow()
+    accepted = _summary(tmp_path)["processed_filings"]["context_windows_accepted"]
+
+    monkeypatch.setattr(Config, "SIMILARITY_THRESHOLD_CONTEXT_WINDOW", 0.95)
+    rerun = _rerun(pipeline)
+    rerun.similarity.threshold_context = 0.95
+    rerun.pre_processing_workflow()
+
+    assert rerun.similarity.batches == []
+    assert len(rerun.storage.saved) == 6
+    summary = _summary(tmp_path)
+    assert summary["incremental_run"]["files_resplit"] == 3
+    assert summary["processed_filings"]["context_windows_accepted"] == 0 < accepted
@@ -0,0 +1,85 @@
+import json
+import random
+
+import pytest
+from test_preprocessing_pipeline import _pipeline
+
+from nps_crawling.config import Config
+from nps_crawling.preprocessing import utils
+from nps_crawling.preprocessing.cleaning import CleanTextPipeline
+from nps_crawling.preprocessing.filtering import NpsMentionFilterPipeline, raw_phrase_pattern
+from nps_crawling.utils.raw_store import JsonFileRawStore
+
+PHRASES = ["NPS", "net promoter score", "nps score", "nps of", "net promoter", "net promotor"]
+
+
+@pytest.mark.parametrize("html", [
+    "<p>Our Net Promoter Score rose</p>",
+    "<td>Net</td><td>promoter</td>",
+    "net&nbsp;<!-- a > b --><b class='x>y'>promoter</b>",
+    "net <SCRIPT>var x;</SCRIPT>promoter",
+    "&#78;&#x70;s",
+    "n</b>ps",
+])
+def test_phrases_split_by_markup_and_entities_are_found(html):
+    assert raw_phrase_pattern(PHRASES).search(html)
+
+
+@pytest.mark.parametrize("html", [
+    "<p>Revenue grew</p>",
+    "<p>N PS</p>",
+    "net promote revenue",
+    "<p class='n p s'>x</p>",
+])
+def test_texts_without_phrases_are_screened_out(html):
+    assert not raw_phrase_pattern(PHRASES).search(html)
+
+
+def test_no_phrase_of_the_cleaned_text_is_screened_out():
+    cleaner, filt = CleanTextPipeline(), NpsMentionFilterPipeline()
+    fragments = ["n", "P", "s", "net", " ", "promoter", "score", "of", "&#78;", "&nbsp;", "\n", "<b>", "</b>",
+                 "<!-- a>b -->", "<script>x</script>", "<![CDATA[z]]>", "<td>", "<p class='a>b'>", "<template>",
+                 "<rt>", "</td>", "&amp;", "<", ">", "/s/ ", "1"]
+    rng = random.Random(3)
+
+    for _ in range(2000):
+        html = "".join(rng.choice(fragments) for _ in range(rng.randint(1, 25)))
+        cleaned = cleaner.process_item({"core_text": html})["core_text"]
+        if filt._filter_matcher.search(cleaned):
+            assert filt.may_contain_phrase(html), html
+
+
+def test_screened_out_records_get_the_no_context_result_without_cleaning(tmp_path, monkeypatch):
+    store = JsonFileRawStore(tmp_path / "raw")
+    key = store.put("0001:doc.htm", [
+        {"metadata": {}, "core_text": "<p>Our NPS rose.</p>"},
+        {"metadata": {}, "core_text": "<p>Revenue grew.</p>"},
+    ])
+    cleaner = CleanTextPipeline()
+    monkeypatch.setattr(utils, "_worker_store", store)
+    monkeypatch.setattr(utils, "_worker_cleaner", cleaner)
+    monkeypatch.setattr(utils, "_worker_filter", NpsMentionFilterPipeline())
+
+    monkeypatch.setattr(Config, "PREPROCESS_RAW_PRESCREEN", False)
+    expected = utils._process_single_file(key)
+    monkeypatch.setattr(Config, "PREPROCESS_RAW_PRESCREEN", True)
+    cleaned = []
+    process_item = cleaner.process_item
+    monkeypatch.setattr(cleaner, "process_item", lambda item: cleaned.append(item["core_text"]) or process_item(item))
+
+    assert utils._process_single_file(key) == expected
+    assert cleaned == ["<p>Our NPS rose.</p>"]
+
+
+def test_screened_out_files_count_as_skipped_without_context(tmp_path, monkeypatch):
+    pipeline = _pipeline(tmp_path, monkeypatch, files=2)
+    pipeline.raw_store.put("0009:doc.htm", [{
+        "metadata": {"filing": {"id": "0009:doc.htm"}},
+        "core_text": "<p>Revenue grew.</p>",
+    }])
+
+    pipeline.pre_processing_workflow()
+
+    summary = json.loads((tmp_path / "processed" / f"preprocessing_{Config.PREPROCESSING_VERSION}.json").read_text())
+    assert summary["processed_filings"]["filings_skipped_no_context"] == 1
+    assert summary["processed_filings"]["filings_processed_total"] == 2
@@ -0,0 +1,84 @@
+import pytest
+
+from nps_crawling.utils.raw_store import JsonFileRawStore, SegmentRawStore, create_raw_store
+
+
+def _records(filing_id: str) -> list[dict]:
+    return [{"metadata": {"filing": {"id": filing_id}}, "core_text": "<p>NPS</p>" * 100, "url": "u"}]
+
+
+def test_segment_store_round_trip_and_random_access(tmp_path):
+    store = SegmentRawStore(tmp_path)
+    for i in range(5):
+        store.put(f"000{i}-25-000001:doc.htm", _records(f"000{i}-25-000001:doc.htm"))
+    store.close()
+
+    reader = SegmentRawStore(tmp_path)
+    assert reader.keys() == [f"000{i}-25-000001:doc.htm" for i in range(5)]
+    assert reader.get("0003-25-000001:doc.htm") == _records("0003-25-000001:doc.htm")
+    assert reader.get("missing") == []
+    assert reader.source_name("0003-25-000001:doc.htm") == "0003-25-000001_doc.htm"
+    assert len(list(tmp_path.glob("segment-*.seg"))) == 1
+    reader.close()
+
+
+def test_segment_store_rolls_over_and_rebuilds_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(SegmentRawStore, "SEGMENT_MAX_BYTES", 1)
+    store = SegmentRawStore(tmp_path)
+    store.put("a", _records("a"))
+    store.put("b", _records("b"))
+    store.put("a", [{"updated": True}])
+    store.flush()
+
+    assert len(list(tmp_path.glob("segment-*.seg"))) == 3
+    assert store.rebuild_index() == 2
+    assert store.get("a") == [{"updated": True}]
+    store.close()
+
+
+def test_concurrent_segment_writers_never_share_a_segment(tmp_path):
+    first, second = SegmentRawStore(tmp_path), SegmentRawStore(tmp_path)
+    for i in range(20):
+        writer = first if i % 2 else second
+        writer.put(f"f{i:02d}", _records(f"f{i:02d}"))
+        writer.flush()
+    first.close()
+    second.close()
+
+    reader = SegmentRawStore(tmp_path)
+    assert len(list(tmp_path.glob("segment-*.seg"))) == 2
+    assert all(reader.get(f"f{i:02d}") == _records(f"f{i:02d}") for i in range(20))
+    assert reader.rebuild_index() == 20
+    assert reader.get("f07") == _records("f07")
+    reader.close()
+
+
+def test_json_store_keeps_one_file_per_filing(tmp_path):
+    store = create_raw_store("json", tmp_path)
+    assert isinstance(store, JsonFileRawStore)
+
+    location = store.put("0001-25-000001:doc.htm", _records("0001-25-000001:doc.htm"))
+    (key,) = store.keys()
+
+    assert location == str((tmp_path / "0001-25-000001_doc.htm.json").absolute())
+    assert store.filing_id(key) == "0001-25-000001:doc.htm"
+    assert store.source_name(key) == "0001-25-000001_doc.htm"
+
+
+@pytest.mark.parametrize("kind", ["json", "segments"])
+def test_content_hash_follows_the_stored_records(tmp_path, kind):
+    store = create_raw_store(kind, tmp_path)
+    store.put("a", _records("a"))
+    store.put("b", _records("b"))
+    key_a, key_b = store.keys()
+    before = store.content_hash(key_a)
+
+    store.put("b", [{"updated": True}])
+
+    assert store.content_hash(key_a) == before != store.content_hash(key_b)
+    store.close()
+
+
+def test_unknown_raw_store_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        create_raw_store("tar", tmp_path)
@@ -0,0 +1,63 @@
+import pytest
+from scrapy.exceptions import IgnoreRequest
+from scrapy.http import HtmlResponse, Request, Response
+
+from nps_crawling.crawler.middlewares import ArchiveResponseCacheMiddleware
+from nps_crawling.crawler.response_cache import ResponseCache, is_archive_url
+
+URL = "https://sec.gov/Archives/edgar/data/1/000000000125000001/a.htm"
+
+
+class FakeStats:
+    def __init__(self):
+        self.values: dict = {}
+
+    def inc_value(self, key, count=1):
+        self.values[key] = self.values.get(key, 0) + count
+
+
+def test_identical_bodies_are_stored_once(tmp_path):
+    cache = ResponseCache(tmp_path)
+    cache.put(URL, 200, {"Content-Type": ["text/html"]}, b"<html>NPS</html>")
+    cache.put(URL.replace("/a.htm", "/b.htm"), 200, {}, b"<html>NPS</html>")
+
+    cached = cache.get(URL.replace("https://sec.gov", "http://www.sec.gov"))
+
+    assert (cached.status, cached.body) == (200, b"<html>NPS</html>")
+    assert len(cache) == 2
+    assert len(list((tmp_path / "blobs").rglob("*.z"))) == 1
+    assert cache.get(URL.replace("/a.htm", "/c.htm")) is None
+
+
+def test_only_archive_documents_are_cached():
+    assert is_archive_url(URL)
+    assert not is_archive_url("https://efts.sec.gov/LATEST/search-index?q=nps")
+    assert not is_archive_url("https://www.sec.gov/files/company_tickers.json")
+
+
+def test_middleware_stores_downloads_and_replays_them(tmp_path):
+    stats = FakeStats()
+    middleware = ArchiveResponseCacheMiddleware(cache=ResponseCache(tmp_path), stats=stats)
+    request = Request(URL)
+
+    assert middleware.process_request(request) is None
+    middleware.process_response(request, Response(URL, status=200, body=b"<html>NPS</html>",
+                                                  headers={"Content-Type": "text/html",
+                                                           "Content-Encoding": "gzip"}))
+    response = middleware.process_request(request)
+
+    assert isinstance(response, HtmlResponse)
+    assert response.body == b"<html>NPS</html>"
+    assert "cached" in response.flags and "Content-Encoding" not in response.headers
+    assert stats.values == {"response_cache/miss": 1, "response_cache/stored": 1,
+                            "response_cache/hit": 1, "response_cache/hit_bytes": 16}
+
+
+def test_replay_only_drops_uncached_requests(tmp_path):
+    stats = FakeStats()
+    middleware = ArchiveResponseCacheMiddleware(cache=ResponseCache(tmp_path), stats=stats, replay_only=True)
+
+    with pytest.raises(IgnoreRequest):
+        middleware.process_request(Request(URL))
+    assert middleware.process_request(Request("https://efts.sec.gov/LATEST/search-index?q=nps")) is None
+    assert stats.values["response_cache/ignored"] == 1
@@ -0,0 +1,107 @@
+from urllib.parse import parse_qs, urlparse
+
+from nps_crawling.crawler.pre_fetch_utils.rate_limiter import TokenBucket
+from nps_crawling.crawler.pre_fetch_utils.sec_params import SecSearchParams
+from nps_crawling.crawler.pre_fetch_utils.sec_prefetch import SecPrefetcher
+from nps_crawling.crawler.pre_fetch_utils.sec_query import SecQuery
+
+
+def _make_query(limit: int = -1) -> SecQuery:
+    params = SecSearchParams(query_base="https://efts.sec.gov/LATEST/search-index?",
+                             keyword="nps",
+                             filing_limit=limit)
+    return SecQuery(sec_params=params)
+
+
+def _fake_search(total: int, failing_pages: set[int] = frozenset()):
+    calls: list[int] = []
+
+    def request(url: str) -> dict:
+        args = parse_qs(urlparse(url).query)
+        page = int(args.get("page", ["1"])[0])
+        calls.append(page)
+        if page in failing_pages:
+            raise ConnectionError("boom")
+        start = (page - 1) * 100
+        hits = [{"_id": f"id-{i}"} for i in range(start, min(total, start + 100))]
+        return {"hits": {"total": {"value": total}, "hits": hits}}
+
+    return request, calls
+
+
+def _prefetcher(**kwargs) -> SecPrefetcher:
+    return SecPrefetcher(requests_per_second=1000, backoff_base=0, **kwargs)
+
+
+def test_prefetch_fetches_all_pages_in_order():
+    prefetcher = _prefetcher()
+    prefetcher._request, calls = _fake_search(total=250)
+
+    pages = prefetcher.prefetch([_make_query()])[0]
+
+    assert sorted(calls) == [1, 2, 3]
+    assert [hit["_id"] for page in pages for hit in page["hits"]["hits"]] == [f"id-{i}" for i in range(250)]
+
+
+def test_prefetch_trims_to_filing_limit():
+    prefetcher = _prefetcher()
+    prefetcher._request, calls = _fake_search(total=1000)
+
+    query = _make_query(limit=150)
+    pages = prefetcher.prefetch([query])[0]
+
+    assert sorted(calls) == [1, 2]
+    assert sum(len(page["hits"]["hits"]) for page in pages) == 150
+    assert (query.complete, query.truncated) == (False, True)
+
+
+def test_prefetch_returns_partial_results_after_retries():
+    prefetcher = _prefetcher(max_retries=2)
+    prefetcher._request, calls = _fake_search(total=300, failing_pages={2})
+
+    query = _make_query()
+    pages = prefetcher.prefetch([query])[0]
+
+    assert calls.count(2) == 3
+    assert len(pages) == 2
+    assert (query.complete, query.truncated) == (False, False)
+
+
+def test_token_bucket_reserves_waiting_time_once_empty():
+    bucket = TokenBucket(rate=10, burst=2)
+
+    assert bucket.reserve() == 0
+    assert bucket.reserve() == 0
+    assert 0 < bucket.reserve() <= 0.1
+
+
+def test_queries_beyond_the_hit_ceiling_are_split_into_date_shards(monkeypatch):
+    import datetime
+
+    from nps_crawling.crawler.pre_fetch_utils import sec_prefetch
+
+    monkeypatch.setattr(sec_prefetch, "EDGAR_MAX_HITS", 250)
+    first_day = datetime.date(2020, 1, 1)
+    filings = [(f"id-{i}", (first_day + datetime.timedelta(days=i // 4)).isoformat()) for i in range(1000)]
+
+    def request(url: str) -> dict:
+        args = {key: values[0] for key, values in parse_qs(urlparse(url).query).items()}
+        start, end = args.get("startdt", "0000"), args.get("enddt", "9999")
+        matching = [(_id, day) for _id, day in filings if start <= day <= end]
+        offset = int(args.get("from", 0))
+        visible = matching[:250][offset:offset + 100]
+        total = {"value": min(len(matching), 250), "relation": "gte" if len(matching) > 250 else "eq"}
+        return {"hits": {"total": total, "hits": [{"_id": _id, "_source": {"file_date": day}} for _id, day in visible]}}
+
+    params = SecSearchParams(query_base="https://efts.sec.gov/LATEST/search-index?", keyword="nps",
+                             from_date="2020-01-01", to_date="2020-12-31", filing_limit=5000)
+    query = SecQuery(sec_params=params)
+    prefetcher = _prefetcher()
+    prefetcher._request = request
+
+    pages = prefetcher.prefetch([query])[0]
+    ids = [hit["_id"] for page in pages for hit in page["hits"]["hits"]]
+
+    assert sorted(ids) == sorted(_id for _id, _ in filings)
+    assert query.results == 1000
+    assert query.complete is True
@@ -0,0 +1,63 @@
+import json
+import pickle
+
+import pytest
+
+from nps_crawling.crawler.pre_fetch_utils.sec_params import SecSearchParams
+from nps_crawling.crawler.pre_fetch_utils.sec_query import SecQuery
+
+
+def _hit(_id: str, display_names: list[str] | None = None) -> dict:
+    return {
+        "_id": _id,
+        "_index": "edgar_file",
+        "_source": {
+            "ciks": ["0000000001"], "period_ending": "2024-12-31", "file_num": [], "display_names": display_names or [],
+            "xsl": None, "sequence": 1, "root_forms": ["10-K"], "file_date": "2025-01-01", "biz_states": [],
+            "sics": [], "form": "10-K", "adsh": _id.split(":")[0], "film_num": [], "biz_locations": [],
+            "file_type": "10-K", "file_description": "", "inc_states": [],
+        },
+    }
+
+
+def _query(db, force_crawl: bool = False) -> SecQuery:
+    params = SecSearchParams(keyword="nps", force_crawl=force_crawl)
+    return SecQuery(sec_params=params, db=db)
+
+
+def test_existing_filings_are_filtered_with_one_lookup(fake_db):
+    fake_db.existing = {"0001-25-000001:a.htm"}
+    query = _query(fake_db)
+    filings = query.create_filings([{"hits": {"hits": [_hit("0001-25-000001:a.htm"), _hit("0001-25-000002:b.htm")]}}])
+
+    remaining = query.are_filings_present_in_db(filings)
+
+    assert [filing.id for filing in remaining] == ["0001-25-000002:b.htm"]
+    assert len(fake_db.lookups) == 1
+    assert fake_db.lookups[0][1] == {"0001-25-000001:a.htm": "nps", "0001-25-000002:b.htm": "nps"}
+
+
+def test_bypass_filter_keeps_existing_filings_without_keyword_update(fake_db):
+    fake_db.existing = {"0001-25-000001:a.htm"}
+    query = _query(fake_db)
+    filings = query.create_filings([{"hits": {"hits": [_hit("0001-25-000001:a.htm")]}}])
+
+    remaining = query.are_filings_present_in_db(filings, bypass_filter=True)
+
+    assert [filing.id for filing in remaining] == ["0001-25-000001:a.htm"]
+    assert fake_db.lookups[0][1] is None
+
+
+def test_created_filings_are_immutable_and_share_repeated_values(fake_db):
+    names = ["Test Inc.  (TST, TSTW)  (CIK 0000000001)"]
+    page = {"hits": {"hits": [_hit("0001-25-000001:a.htm", names), _hit("0001-25-000002:b.pdf", names)]}}
+    # Parsed JSON holds a separate copy of every string
+    first, second = _query(fake_db).create_filings([json.loads(json.dumps(page))])
+
+    assert first.ticker == second.ticker == ["TST", "TSTW"]
+    assert first.form is second.form and first.root_forms[0] is second.root_forms[0]
+    assert second.file_container_type == "pdf"
+    assert first.to_json()["keyword"] == "nps"
+    with pytest.raises(AttributeError):
+        first.form = "8-K"
+    assert pickle.loads(pickle.dumps(second)).to_dict() == second.to_dict()
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+from scrapy.http import Request, Response
+
+from nps_crawling.crawler.middlewares import SecRateLimitMiddleware
+from nps_crawling.crawler.pre_fetch_utils.rate_limiter import AdaptiveTokenBucket, parse_retry_after
+
+
+class FakeStats:
+    def __init__(self):
+        self.values: dict = {}
+
+    def set_value(self, key, value):
+        self.values[key] = value
+
+    def inc_value(self, key, count=1):
+        self.values[key] = self.values.get(key, 0) + count
+
+    def min_value(self, key, value):
+        self.values[key] = min(self.values.get(key, value), value)
+
+
+def _middleware(bucket: AdaptiveTokenBucket) -> tuple[SecRateLimitMiddleware, FakeStats]:
+    stats = FakeStats()
+    middleware = SecRateLimitMiddleware(bucket=bucket,
+                                        hosts=["www.sec.gov", "efts.sec.gov"],
+                                        throttle_codes=[429, 503],
+                                        stats=stats)
+    return middleware, stats
+
+
+def test_bucket_shrinks_on_throttle_and_recovers_after_cooldown():
+    bucket = AdaptiveTokenBucket(rate=10, burst=10, min_rate=1, max_rate=10, cooldown=0)
+
+    assert bucket.throttle() == 5
+    assert bucket.throttle() == 2.5
+    assert bucket.throttle() == 2.5 * 0.5
+    assert bucket.throttle() == 1
+
+    rates = [bucket.recover() for _ in range(200)]
+    assert rates == sorted(rates)
+    assert rates[-1] == 10
+
+
+def test_retry_after_delays_the_next_token():
+    bucket = AdaptiveTokenBucket(rate=10, burst=10, cooldown=0)
+    bucket.throttle(retry_after=3)
+
+    assert bucket.reserve() == pytest.approx(3 + 1 / bucket.rate, abs=0.05)
+
+
+def test_bucket_does_not_recover_during_cooldown():
+    bucket = AdaptiveTokenBucket(rate=10, burst=10, cooldown=60)
+    bucket.throttle()
+
+    assert bucket.recover() == 5
+
+
+def test_max_rate_caps_the_bucket_without_compounding():
+    bucket = AdaptiveTokenBucket(rate=10, burst=10, min_rate=0.5)
+
+    bucket.set_max_rate(2.5)
+    bucket.set_max_rate(2.5)
+
+    assert (bucket.rate, bucket.max_rate, bucket.capacity) == (2.5, 2.5, 2)
+
+
+def test_parse_retry_after():
+    assert parse_retry_after(b"7") == 7
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_middleware_lowers_rate_on_throttled_sec_response():
+    middleware, stats = _middleware(AdaptiveTokenBucket(rate=8, burst=8, cooldown=0))
+    request = Request("https://www.sec.gov/Archives/edgar/data/1/a.htm")
+
+    middleware.process_response(request, Response(request.url, status=429, headers={"Retry-After": "0"}))
+
+    assert stats.values["sec_rate_limit/rate"] == 4
+    assert stats.values["sec_rate_limit/throttled"] == 1
+
+    middleware.process_response(request, Response(request.url, status=200))
+    assert stats.values["sec_rate_limit/rate"] > 4
+
+
+def test_middleware_ignores_other_hosts():
+    bucket = AdaptiveTokenBucket(rate=8, burst=1, cooldown=0)
+    middleware, stats = _middleware(bucket)
+    request = Request("https://example.com/a.htm")
+
+    assert asyncio.run(middleware.process_request(request)) is None
+    middleware.process_response(request, Response(request.url, status=429))
+
+    assert bucket.rate == 8
+    assert "sec_rate_limit/throttled" not in stats.values
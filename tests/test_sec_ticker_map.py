@@ -0,0 +1,75 @@
+import pytest
+
+from nps_crawling.config import Config
+from nps_crawling.crawler.pre_fetch_utils import sec_ticker_map
+from nps_crawling.crawler.pre_fetch_utils.sec_ticker_map import SecTickerMap
+
+
+class FakeResponse:
+    def __init__(self, status_code: int, payload: dict | None = None, headers: dict | None = None):
+        self.status_code = status_code
+        self._payload = payload or {}
+        self.headers = headers or {}
+
+    def json(self) -> dict:
+        return self._payload
+
+    def raise_for_status(self) -> None:
+        pass
+
+
+@pytest.fixture
+def ticker_env(tmp_path, monkeypatch):
+    monkeypatch.setattr(Config, "DATA_PATH", tmp_path)
+    monkeypatch.setattr(Config, "CRAWL_OFFLINE", False)
+    monkeypatch.setattr(Config, "CRAWL_TICKER_CACHE_TTL_HOURS", 24)
+    monkeypatch.setattr(SecTickerMap, "_instance", None)
+
+    calls: list[dict] = []
+    responses: list[FakeResponse] = []
+
+    def fake_get(url, headers=None, timeout=None):
+        calls.append(headers)
+        return responses.pop(0)
+
+    monkeypatch.setattr(sec_ticker_map.requests, "get", fake_get)
+    return calls, responses
+
+
+def _fresh_map(monkeypatch) -> SecTickerMap:
+    monkeypatch.setattr(SecTickerMap, "_instance", None)
+    return SecTickerMap()
+
+
+def test_ticker_map_is_loaded_lazily_and_cached(ticker_env, monkeypatch):
+    calls, responses = ticker_env
+    responses.append(FakeResponse(200, {"0": {"cik_str": 320193, "ticker": "AAPL", "title": "Apple Inc."}},
+                                  {"ETag": '"abc"'}))
+
+    mapper = SecTickerMap()
+    assert calls == []
+    assert mapper.get_ticker("320193") == "AAPL"
+    assert len(calls) == 1
+
+    # A new process within the TTL reads the cache file without a request.
+    assert _fresh_map(monkeypatch).get_fuzzy_data() == [("0000320193", "AAPL", "Apple Inc.")]
+    assert len(calls) == 1
+
+
+def test_ticker_map_refresh_is_conditional(ticker_env, monkeypatch):
+    calls, responses = ticker_env
+    responses.append(FakeResponse(200, {"0": {"cik_str": 1, "ticker": "ONE", "title": "One"}}, {"ETag": '"v1"'}))
+    SecTickerMap().get_ticker("1")
+
+    monkeypatch.setattr(Config, "CRAWL_TICKER_CACHE_TTL_HOURS", 0)
+    responses.append(FakeResponse(304))
+    assert _fresh_map(monkeypatch).get_ticker("1") == "ONE"
+    assert calls[-1]["If-None-Match"] == '"v1"'
+
+
+def test_ticker_map_offline_mode_never_requests(ticker_env, monkeypatch):
+    calls, _ = ticker_env
+    monkeypatch.setattr(Config, "CRAWL_OFFLINE", True)
+
+    assert SecTickerMap().get_ticker("1") is None
+    assert calls == []